@@ -0,0 +1,299 @@
+# app_index.py – Index aller startbaren Programme für "öffne …/starte …"
+# Quellen: .desktop-Dateien (Name, GenericName, Keywords inkl. [de]) + ausführbare Dateien im PATH.
+# Cache auf Platte (app_index.json), pro Verzeichnis nur neu eingelesen, wenn sich dessen mtime ändert.
+
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+from pathlib import Path
+from utils import lade_json, speichere_json, logging
+
+CACHE_NAME = "app_index.json"
+CACHE_VERSION = 1
+MIN_AEHNLICHKEIT = 0.55        # Dice-Koeffizient der Trigramme, darunter gilt es als "nicht gefunden"
+NEU_PRUEFEN_S = 10             # Fehlschläge prüfen höchstens so oft, ob neue Programme dazugekommen sind
+
+# Gewichte je Feld – bei Gleichstand gewinnt der "bessere" Treffer
+GEWICHT = {"name": 1.0, "id": 0.95, "generic": 0.9, "keyword": 0.8, "exec": 0.75, "path": 0.6}
+SPRACHEN = ("de_DE", "de")
+
+_lock = threading.Lock()
+_index = None          # {"apps": [...], "begriffe": {begriff: [(app_nr, gewicht)]}, "trigramme": {tri: set(begriff)}}
+_stand = None          # Verzeichnis-mtimes, aus denen _index gebaut wurde
+_geprueft = 0.0
+
+
+def desktop_verzeichnisse() -> list[str]:
+    home = Path.home()
+    daten = [os.environ.get("XDG_DATA_HOME", str(home / ".local/share"))]
+    daten += os.environ.get("XDG_DATA_DIRS", "/usr/local/share:/usr/share").split(":")
+    daten += [str(home / ".local/share/flatpak/exports/share"), "/var/lib/flatpak/exports/share"]
+    gesehen, ergebnis = set(), []
+    for d in daten:
+        pfad = os.path.join(d, "applications")
+        if d and pfad not in gesehen and os.path.isdir(pfad):
+            gesehen.add(pfad)
+            ergebnis.append(pfad)
+    return ergebnis
+
+
+def path_verzeichnisse() -> list[str]:
+    gesehen, ergebnis = set(), []
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        if d and d not in gesehen and os.path.isdir(d):
+            gesehen.add(d)
+            ergebnis.append(d)
+    return ergebnis
+
+
+def normalisieren(text: str) -> str:
+    return re.sub(r"[^\wäöüß+]+", " ", text.lower()).strip()
+
+
+# ────────────────────────────────────────────────
+# Einlesen
+# ────────────────────────────────────────────────
+def _desktop_lesen(pfad: str) -> dict | None:
+    felder = {}
+    in_eintrag = False
+    try:
+        with open(pfad, "r", encoding="utf-8", errors="replace") as f:
+            for zeile in f:
+                zeile = zeile.strip()
+                if zeile.startswith("["):
+                    if in_eintrag:
+                        break                     # nur [Desktop Entry], keine Actions
+                    in_eintrag = zeile == "[Desktop Entry]"
+                    continue
+                if in_eintrag and "=" in zeile and not zeile.startswith("#"):
+                    k, v = zeile.split("=", 1)
+                    felder[k.strip()] = v.strip()
+    except OSError:
+        return None
+
+    if felder.get("Type") != "Application" or felder.get("Hidden") == "true" or not felder.get("Exec"):
+        return None
+
+    def lokal(schluessel):
+        for sprache in SPRACHEN:
+            if f"{schluessel}[{sprache}]" in felder:
+                return felder[f"{schluessel}[{sprache}]"]
+        return None
+
+    begriffe = []
+    for feld, art in (("Name", "name"), ("GenericName", "generic")):
+        for wert in (felder.get(feld), lokal(feld)):
+            if wert:
+                begriffe.append((wert, art))
+    for wert in (felder.get("Keywords"), lokal("Keywords")):
+        for kw in (wert or "").split(";"):
+            if kw.strip():
+                begriffe.append((kw.strip(), "keyword"))
+
+    desktop_id = os.path.basename(pfad)[:-len(".desktop")]
+    begriffe.append((desktop_id.split(".")[-1], "id"))      # org.gimp.GIMP → gimp
+    try:
+        begriffe.append((os.path.basename(shlex.split(felder["Exec"])[0]), "exec"))
+    except ValueError:
+        pass
+
+    return {
+        "name": lokal("Name") or felder.get("Name", desktop_id),
+        "exec": felder["Exec"],
+        "terminal": felder.get("Terminal") == "true",
+        "versteckt": felder.get("NoDisplay") == "true",
+        "begriffe": begriffe,
+    }
+
+
+def _verzeichnis_scannen(verzeichnis: str, art: str) -> list[dict]:
+    apps = []
+    try:
+        eintraege = list(os.scandir(verzeichnis))
+    except OSError:
+        return apps
+
+    for e in eintraege:
+        if art == "desktop":
+            if e.name.endswith(".desktop"):
+                app = _desktop_lesen(e.path)
+                if app:
+                    apps.append(app)
+        else:
+            try:
+                if e.is_file() and os.access(e.path, os.X_OK):
+                    apps.append({"name": e.name, "exec": e.name, "terminal": False, "versteckt": False,
+                                 "begriffe": [(e.name, "path")]})
+            except OSError:
+                continue
+    return apps
+
+
+def _cache_aktualisieren() -> dict:
+    """Lädt den Cache und liest nur Verzeichnisse neu ein, deren mtime sich geändert hat"""
+    cache = lade_json(CACHE_NAME, {}, use_cache=False)
+    if cache.get("version") != CACHE_VERSION:
+        cache = {"version": CACHE_VERSION, "verzeichnisse": {}}
+
+    alt = cache["verzeichnisse"]
+    neu, geaendert = {}, 0
+    for art, verzeichnisse in (("desktop", desktop_verzeichnisse()), ("path", path_verzeichnisse())):
+        for v in verzeichnisse:
+            try:
+                mtime = os.stat(v).st_mtime
+            except OSError:
+                continue
+            if v in alt and alt[v]["mtime"] == mtime and alt[v]["art"] == art:
+                neu[v] = alt[v]
+            else:
+                neu[v] = {"art": art, "mtime": mtime, "apps": _verzeichnis_scannen(v, art)}
+                geaendert += 1
+
+    cache["verzeichnisse"] = neu
+    if geaendert or set(neu) != set(alt):
+        try:
+            speichere_json(CACHE_NAME, cache, indent=None)
+        except Exception:
+            pass            # Cache ist nur Beschleunigung
+        logging.info(f"App-Index: {geaendert} Verzeichnis(se) neu eingelesen")
+    return cache
+
+
+def _trigramme(begriff: str) -> set:
+    b = f"  {begriff} "
+    return {b[i:i + 3] for i in range(len(b) - 2)}
+
+
+def _verzeichnis_stand() -> tuple:
+    stand = []
+    for v in desktop_verzeichnisse() + path_verzeichnisse():
+        try:
+            stand.append((v, os.stat(v).st_mtime))
+        except OSError:
+            pass
+    return tuple(stand)
+
+
+def index_laden(neu: bool = False) -> dict:
+    """Baut den In-Memory-Index (Begriff → Apps, Trigramm → Begriffe) aus dem Cache.
+    neu=True prüft die Verzeichnis-mtimes und baut nur neu, wenn sich eines geändert hat."""
+    global _index, _stand, _geprueft
+    with _lock:
+        if _index is not None and not neu:
+            return _index
+        stand = _verzeichnis_stand()
+        _geprueft = time.monotonic()
+        if _index is not None and stand == _stand:
+            return _index
+        _stand = stand
+
+        cache = _cache_aktualisieren()
+        apps, begriffe, trigramme = [], {}, {}
+        gesehen_exec = set()
+
+        # .desktop zuerst, damit PATH-Einträge desselben Programms nicht doppelt auftauchen
+        for eintrag in sorted(cache["verzeichnisse"].values(), key=lambda e: e["art"] != "desktop"):
+            for app in eintrag["apps"]:
+                if eintrag["art"] == "path":
+                    if app["exec"] in gesehen_exec:
+                        continue
+                    gesehen_exec.add(app["exec"])
+                nr = len(apps)
+                apps.append(app)
+                for text, art in app["begriffe"]:
+                    if art == "exec":
+                        gesehen_exec.add(text)
+                    b = normalisieren(text)
+                    if not b:
+                        continue
+                    gewicht = GEWICHT[art] * (0.9 if app["versteckt"] else 1.0)
+                    begriffe.setdefault(b, []).append((nr, gewicht))
+                    # Mehrwort-Namen zusätzlich über die einzelnen Wörter auffindbar
+                    for wort in b.split():
+                        if wort != b and len(wort) > 2:
+                            begriffe.setdefault(wort, []).append((nr, gewicht * 0.85))
+
+        for b in begriffe:
+            for t in _trigramme(b):
+                trigramme.setdefault(t, set()).add(b)
+
+        _index = {"apps": apps, "begriffe": begriffe, "trigramme": trigramme}
+        logging.info(f"App-Index geladen: {len(apps)} Programme, {len(begriffe)} Suchbegriffe")
+        return _index
+
+
+# ────────────────────────────────────────────────
+# Suchen & Starten
+# ────────────────────────────────────────────────
+def _bester(treffer: list) -> int:
+    return max(treffer, key=lambda t: t[1])[0]
+
+
+def app_finden(anfrage: str) -> dict | None:
+    """Exakter Begriff → O(1); sonst unscharfe Suche über Trigramm-Ähnlichkeit.
+    Ohne Treffer wird gegen die Verzeichnis-mtimes geprüft (neu installierte Programme) – höchstens alle
+    NEU_PRUEFEN_S, damit Tippfehler-Serien nicht jedes Mal alle Verzeichnisse abklappern."""
+    app = _suchen(index_laden(), anfrage)
+    if app is None and normalisieren(anfrage) and time.monotonic() - _geprueft >= NEU_PRUEFEN_S:
+        app = _suchen(index_laden(neu=True), anfrage)
+    return app
+
+
+def _suchen(idx: dict, anfrage: str) -> dict | None:
+    q = normalisieren(anfrage)
+    if not q:
+        return None
+
+    if q in idx["begriffe"]:
+        return idx["apps"][_bester(idx["begriffe"][q])]
+
+    q_tri = _trigramme(q)
+    kandidaten = {}
+    for t in q_tri:
+        for b in idx["trigramme"].get(t, ()):
+            kandidaten[b] = kandidaten.get(b, 0) + 1
+
+    bester, beste_wertung = None, 0.0
+    for b, gemeinsam in kandidaten.items():
+        aehnlichkeit = 2 * gemeinsam / (len(q_tri) + len(_trigramme(b)))
+        if aehnlichkeit < MIN_AEHNLICHKEIT:
+            continue
+        nr = _bester(idx["begriffe"][b])
+        gewicht = max(g for n, g in idx["begriffe"][b] if n == nr)
+        wertung = aehnlichkeit * gewicht
+        if wertung > beste_wertung:
+            bester, beste_wertung = nr, wertung
+
+    return idx["apps"][bester] if bester is not None else None
+
+
+def _exec_argv(exec_zeile: str) -> list[str]:
+    # Feldcodes (%f %U %i …) entfernen, "%%" bleibt als "%"
+    teile = shlex.split(exec_zeile)
+    return [t.replace("%%", "%") for t in teile if not re.fullmatch(r"%[a-zA-Z]", t)]
+
+
+def app_starten(app: dict) -> bool:
+    try:
+        argv = _exec_argv(app["exec"])
+        if app.get("terminal"):
+            argv = ["xterm", "-e"] + argv
+        subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        return True
+    except Exception as e:
+        logging.error(f"App-Start fehlgeschlagen ({app.get('name')}): {e}")
+        return False
+
+
+if __name__ == "__main__":
+    import sys
+
+    index_laden()
+    for anfrage in sys.argv[1:] or ["bildbearbeitung", "firefox", "taschenrechner", "gimp"]:
+        start = time.perf_counter()
+        app = app_finden(anfrage)
+        dauer = (time.perf_counter() - start) * 1e6
+        print(f"{anfrage:20} → {app['name'] if app else '–':40} ({dauer:.0f} µs)")
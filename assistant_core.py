@@ -1,9 +1,52 @@
-import requests
 import logging
 import subprocess
 import os
+import re
+import concurrent.futures
+import contextvars
+import threading
 from datetime import datetime
-from utils import sprich, lade_json, speichere_json, telegram_senden
+from utils import sprich, lade_json, speichere_json, telegram_senden, http_statistik
+from tool_engine import ENGINE
+from tracing import span, neue_befehl_id, statistik, chrome_trace_exportieren
+
+# ──────────────────────────────
+# Schlüsselwörter der Befehlszweige (es zählt das vorderste Schlüsselwort, Reihenfolge nur bei Gleichstand)
+# ──────────────────────────────
+BACKUP_KEYWORDS     = ["backup", "mach backup", "backup machen", "erstelle backup", "daten sichern", "sichere daten", "backup erstellen"]
+OPEN_KEYWORDS       = ["öffne", "starte", "mach auf", "start", "open", "aufrufen", "lade", "rufe auf"]
+MAIL_KEYWORDS       = ["mail an", "email an", "schreibe email", "schreibe mail"]
+CLOSE_KEYWORDS      = ["schließe", "beende", "mach zu", "kill", "stopp", "ende", "beenden", "terminiere"]
+FENSTER_KEYWORDS    = ["welche fenster", "fenster offen", "fensterliste", "offene fenster", "aktive fenster"]
+SCREENSHOT_KEYWORDS = ["screenshot", "mach screenshot", "bildschirmfoto", "screen shot"]
+AUDIO_KEYWORDS      = ["lauter", "leiser", "stumm", "lautstärke hoch", "lautstärke runter", "mute"]
+WETTER_KEYWORDS     = ["wetter"]
+ZEIT_KEYWORDS       = ["wie spät", "uhrzeit", "zeit", "datum", "tag ist heute"]
+NOTIZ_KEYWORDS      = ["notiz"]
+TERMIN_KEYWORDS     = ["termin", "termine", "kalender", "was habe ich"]
+SUCHE_KEYWORDS      = ["suche"]
+
+INTENTS = [
+    ("backup",     BACKUP_KEYWORDS),
+    ("öffnen",     OPEN_KEYWORDS),
+    ("mail",       MAIL_KEYWORDS),
+    ("schließen",  CLOSE_KEYWORDS),
+    ("fenster",    FENSTER_KEYWORDS),
+    ("screenshot", SCREENSHOT_KEYWORDS),
+    ("audio",      AUDIO_KEYWORDS),
+    ("wetter",     WETTER_KEYWORDS),
+    ("zeit",       ZEIT_KEYWORDS),
+    ("notiz",      NOTIZ_KEYWORDS),
+    ("termin",     TERMIN_KEYWORDS),
+    ("suche",      SUCHE_KEYWORDS),
+]
+
+# Intents, die etwas verändern – laufen bei Mehrfach-Befehlen strikt nacheinander
+SEITENEFFEKT_INTENTS = {"backup", "öffnen", "mail", "schließen", "screenshot", "audio", "notiz", "kalender"}
+# Intents, deren Argument-Liste sich per "und" fortsetzen lässt → Präfix für Folgeteile
+LISTEN_INTENTS = {"wetter": "wetter"}
+
+_kontext_lock = threading.Lock()
 
 def kontext_laden():
     return lade_json("kontext.json", {"historie": []})
@@ -11,6 +54,16 @@ def kontext_laden():
 def kontext_speichern(d):
     speichere_json("kontext.json", d)
 
+def _tool(func, *args, **kwargs) -> str:
+    """Tool über die ToolEngine ausführen (Timeout + abbrechbar per "stopp")"""
+    name = getattr(func, "__name__", "Tool")
+    try:
+        return ENGINE.ausfuehren(func, *args, **kwargs)
+    except TimeoutError:
+        return f"{name} hat zu lange gebraucht – abgebrochen."
+    except concurrent.futures.CancelledError:
+        return f"{name} wurde abgebrochen."
+
 def zeige_hilfemenue() -> str:
     sprich("Hier ist das Hilfemenü.")
 
@@ -27,13 +80,14 @@ Notizen & Kalender
   • notiz kauf Milch
   • termin arzt morgen 14 uhr
   • termine heute / was habe ich heute
+  • kalender import ~/termine.ics / kalender export ~/pia.ics
 
 Musik & Lautstärke
   • play / pause / next / weiter / vorheriger
   • lauter / leiser / stumm
 
 Programme & Fenster
-  • öffne firefox / starte brave / mach chrome auf
+  • öffne firefox / starte brave / mach chrome auf / öffne bildbearbeitung
   • öffne thunderbird / mail / email
   • beende firefox / schließe vlc
   • welche fenster sind offen? / fensterliste
@@ -54,8 +108,19 @@ Backup
 E-Mail (Thunderbird)
   • mail an max / email an chef / schreibe email an anna
 
+Mehrere Befehle auf einmal
+  • wetter Berlin und Eschwege und termine heute
+  • mach backup, dann notiz backup erledigt
+
 Hilfe
   • hilfe / was kannst du / ?
+  • http statistik (Latenz & Fehler pro Webdienst)
+  • stopp / abbrechen (laufende Aktion abbrechen)
+  • stats (Latenzen p50/p95/p99 pro Stufe und Tool) / trace export
+  • modelle (geladene Modelle, Speicherbedarf & RSS)
+  • dienste (gTTS, Piper, Ollama, Wetter, Suche: erreichbar? Fehler, Latenz)
+  • mikrofon statistik (Jitter, verlorene Frames, STT-Worker)
+  • spekulation (Trefferquote & gesparte Zeit beim Vorausrechnen im Sprachmodus)
 
 Sag einfach, was du willst – ich versuche es direkt zu machen!
 Bei unbekannten Befehlen fragt Pia jetzt Ollama (llama3:8b).
@@ -70,10 +135,248 @@ Bei unbekannten Befehlen fragt Pia jetzt Ollama (llama3:8b).
     return hilfe_text.strip()
 
 
+# ──────────────────────────────
+# Mehrfach-Befehle ("wetter berlin und eschwege und termine heute")
+# ──────────────────────────────
+MAX_INTENTS = 6
+_intent_pool = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_INTENTS, thread_name_prefix="pia-intent")
+_TRENNER = re.compile(r"\s*(?:,|;|\bund dann\b|\bund\b|\bdann\b|\bdanach\b)\s*")
+# "kalender import <pfad>" – der Pfad wird nie nach Schlüsselwörtern oder Trennern durchsucht
+ICS_MUSTER = re.compile(r"\s*kalender (import|export)\w*\s+(.+)", re.IGNORECASE)
+
+def intent_erkennen(text: str) -> str | None:
+    """Welcher Zweig von befehl_verarbeiten würde diesen Text bedienen? Es zählt das am weitesten vorn
+    stehende Schlüsselwort ("notiz backup erledigt" → notiz, "kalender heute" → termin statt "ende");
+    bei gleicher Position entscheidet die Reihenfolge in INTENTS."""
+    if ICS_MUSTER.match(text):
+        return "kalender"
+    bester, vorn = None, None
+    for intent, keywords in INTENTS:
+        pos = min((text.find(kw) for kw in keywords if kw in text), default=None)
+        if pos is not None and (vorn is None or pos < vorn):
+            bester, vorn = intent, pos
+    return bester
+
+# Reine Kalender-Abfragen – alles andere mit "termin" legt einen Termin an ("termin kino heute abend um 8")
+TERMIN_ABFRAGEN = {"was habe ich", "was habe ich heute", "was habe ich heute vor", "was hab ich heute vor",
+                   "kalender", "kalender heute", "meine termine", "welche termine habe ich heute"}
+
+def termin_abfrage(text: str) -> bool:
+    text = text.strip(" ?!.")
+    return text in TERMIN_ABFRAGEN or text.startswith("termine")
+
+def hat_seiteneffekt(intent: str, text: str) -> bool:
+    if intent == "termin":
+        return not termin_abfrage(text)
+    return intent in SEITENEFFEKT_INTENTS
+
+def intents_zerlegen(clean: str) -> list[str]:
+    """Zerlegt einen Satz an "und"/"dann"/Komma in unabhängige Befehle.
+    Teile ohne eigenes Schlüsselwort gehören zum vorherigen Befehl ("notiz milch und brot"),
+    außer bei Listen-Intents wie Wetter: "wetter berlin und eschwege" → zwei Wetterabfragen."""
+    teile = [t for t in _TRENNER.split(clean) if t]
+    if len(teile) < 2 or ICS_MUSTER.match(clean):
+        return [clean]
+
+    intents = []          # [(intent, text)]
+    for teil in teile:
+        intent = intent_erkennen(teil)
+        if intent:
+            intents.append((intent, teil))
+        elif not intents:
+            return [clean]                     # beginnt ohne bekannten Befehl → als Ganzes behandeln
+        elif intents[-1][0] in LISTEN_INTENTS:
+            vorher = intents[-1][0]
+            intents.append((vorher, f"{LISTEN_INTENTS[vorher]} {teil}"))
+        else:
+            intents[-1] = (intents[-1][0], f"{intents[-1][1]} und {teil}")
+
+    if len(intents) > MAX_INTENTS:
+        return [clean]
+    return [text for _, text in intents]
+
+def _mehrfach_ausfuehren(teile: list[str]) -> str:
+    """Lesende Intents laufen parallel, Intents mit Seiteneffekt nacheinander in Originalreihenfolge
+    (als eine Kette, die selbst parallel zu den lesenden läuft). Gesamtdauer ≈ max statt Summe."""
+    ergebnisse = [None] * len(teile)
+    lesend = [(i, t) for i, t in enumerate(teile) if not hat_seiteneffekt(intent_erkennen(t), t)]
+    schreibend = [(i, t) for i, t in enumerate(teile) if hat_seiteneffekt(intent_erkennen(t), t)]
+
+    def kette():
+        # Bricht ein Schritt ab, laufen die folgenden nicht ("mach backup, dann notiz backup erledigt")
+        ergebnis = []
+        for n, (i, t) in enumerate(schreibend):
+            try:
+                ergebnis.append((i, _einzelbefehl(t)))
+            except Exception as e:
+                logging.error(f"Intent '{t}' fehlgeschlagen: {e}")
+                ergebnis.append((i, f"{t}: fehlgeschlagen."))
+                ergebnis.extend((j, f"{u}: übersprungen, weil „{t}“ fehlgeschlagen ist.") for j, u in schreibend[n + 1:])
+                break
+        return ergebnis
+
+    futures = {i: _intent_pool.submit(contextvars.copy_context().run, _einzelbefehl, t) for i, t in lesend}
+    kette_future = _intent_pool.submit(contextvars.copy_context().run, kette) if schreibend else None
+
+    for i, f in futures.items():
+        try:
+            ergebnisse[i] = f.result()
+        except Exception as e:
+            logging.error(f"Intent '{teile[i]}' fehlgeschlagen: {e}")
+            ergebnisse[i] = f"{teile[i]}: fehlgeschlagen."
+    if kette_future:
+        try:
+            for i, antwort in kette_future.result():
+                ergebnisse[i] = antwort
+        except Exception as e:
+            logging.error(f"Intent-Kette fehlgeschlagen: {e}")
+            for i, t in schreibend:
+                ergebnisse[i] = ergebnisse[i] or f"{t}: fehlgeschlagen."
+
+    return "\n".join(str(e) for e in ergebnisse if e)
+
+
+# ──────────────────────────────
+# Embedding-Treffer → Befehl in Schlüsselwort-Form (läuft dann durch den normalen Zweig)
+# ──────────────────────────────
+def _ort(text: str) -> str:
+    m = re.search(r"\b(?:in|für|bei)\s+([a-zäöüß][\wäöüß -]*)$", text)
+    return m.group(1).strip() if m else ""
+
+def _ohne_einleitung(text: str, muster: str) -> str:
+    return re.sub(rf"^(?:{muster})\s*", "", text).strip()
+
+TOOL_BEFEHL = {
+    "wetter_holen":     lambda t: f"wetter {_ort(t)}",
+    "termine_heute":    lambda t: "termine heute",
+    "jetzt_sagen":      lambda t: "datum" if any(w in t for w in ("tag", "wieviel", "datum")) else "uhrzeit",
+    "schnellnotiz":     lambda t: "notiz " + _ohne_einleitung(t, r"merk dir( dass)?|schreib( dir)? auf|notier( dir)?|vergiss nicht"),
+    "web_suche":        lambda t: "suche " + _ohne_einleitung(t, r"google( mal)?|finde( im internet)?( etwas)?( über| zu)?|recherchiere|schau online nach"),
+    "backup_erstellen": lambda t: "backup",
+}
+
+# ──────────────────────────────
+# Unscharfe Schlüsselwörter ("wetta berlin", "termiene heute")
+# ──────────────────────────────
+_korrektur = None
+
+def _korrektur_holen():
+    global _korrektur
+    if _korrektur is None:
+        from intent_matcher import KeywordKorrektur
+        _korrektur = KeywordKorrektur(kw for _, keywords in INTENTS for kw in keywords)
+    return _korrektur
+
+def schluesselwoerter_korrigieren(clean: str) -> str:
+    """Korrigiert Hörfehler im führenden Befehlswort – nur wenn danach ein Befehlszweig ohne Seiteneffekt greift"""
+    if ICS_MUSTER.match(clean):
+        return clean
+    kk = _korrektur_holen()
+    korrigiert, aenderungen = kk.korrigieren(clean, _TRENNER)
+    # Nur übernehmen, wenn sich dadurch das Routing (pro Teilbefehl) ändert – "welches datum haben wir"
+    # bleibt so unangetastet, obwohl "welche"/"habe" Befehlswörter sind
+    teile = [t for t in _TRENNER.split(korrigiert) if t]
+    vorher = [intent_erkennen(t) for t in _TRENNER.split(clean) if t]
+    nachher = [intent_erkennen(t) for t in teile]
+    if not aenderungen or nachher == vorher or not any(nachher):
+        return clean
+    # Nie in etwas korrigieren, das handelt (Mute, Programm schließen, Backup …) – aus "gute nacht" wird kein "mute"
+    if any(neu and neu != alt and hat_seiteneffekt(neu, t) for alt, neu, t in zip(vorher, nachher, teile)):
+        logging.info(f"Unscharfe Korrektur verworfen (Seiteneffekt): {aenderungen}")
+        return clean
+    if not any(vorher):
+        vermieden = kk.zaehlen(llm_vermieden=True)
+        logging.info(f"Unscharf erkannt: {aenderungen} → '{korrigiert}' (LLM-Fallbacks vermieden: {vermieden})")
+    else:
+        kk.zaehlen(llm_vermieden=False)
+        logging.info(f"Unscharf korrigiert: {aenderungen} → '{korrigiert}'")
+    return korrigiert
+
+
+# ──────────────────────────────
+# Ollama-Prompt und Vorhersage des LLM-Fallbacks (für spekulatives Vorausrechnen im Sprachmodus)
+# ──────────────────────────────
+def ollama_system_prompt(befehl: str | None = None) -> str:
+    letzte = kontext_laden()["historie"][-8:]
+    historie = "\n".join(letzte)
+
+    # Passende Notizen/Termine/ältere Gespräche aus dem lokalen Vektor-Index (innerhalb eines Token-Budgets)
+    wissen = ""
+    if befehl:
+        from gedaechtnis import prompt_kontext
+        schon_drin = {f"{a}\n{b}" for a, b in zip(letzte, letzte[1:])}
+        with span("routing", "gedaechtnis"):
+            wissen = prompt_kontext(befehl, ausschliessen=schon_drin)
+    if wissen:
+        wissen = f"\nVielleicht hilfreich (Notizen, Termine, frühere Gespräche):\n{wissen}\n"
+
+    return f"""Du bist Pia – frech, direkt, hilfsbereit und ein bisschen frech.
+Du sprichst Jan immer mit Vornamen an.
+Du steuerst einen Manjaro-Linux-Rechner.
+Antworte auf Deutsch, kurz, knackig und praxisnah. Maximal 2–3 Sätze.
+
+Letzte Unterhaltung:
+{historie}
+{wissen}
+Wenn es ein Systembefehl ist, den du nicht direkt ausführen kannst, schlage den genauen Linux-Befehl vor (z. B. `sudo pacman -Syu`)."""
+
+
+def schluesselwort_befehl(text: str) -> bool:
+    """Bedient ein Schlüsselwort-Zweig den Text (auch nach Tippfehler-Korrektur)? Ohne Ollama, also billig"""
+    clean = text.strip().lower()
+    korrigiert, _ = _korrektur_holen().korrigieren(clean, _TRENNER)
+    return any(intent_erkennen(t) for variante in (clean, korrigiert) for t in _TRENNER.split(variante) if t)
+
+
+def llm_fallback_erwartet(text: str) -> bool:
+    """Würde dieser (evtl. noch unvollständige) Text beim Ollama-Fallback landen? Führt nichts aus"""
+    clean = text.strip().lower()
+    if not clean or schluesselwort_befehl(clean):
+        return False
+    try:
+        from intent_embeddings import intent_klassifizieren
+        treffer = intent_klassifizieren(clean)
+    except Exception:
+        treffer = None
+    return not (treffer and treffer[0] in TOOL_BEFEHL)
+
+
+def _spekulation_vorbereiten(teiltext: str) -> str | None:
+    """Läuft im Spekulations-Thread: Embedding-Stufe und System-Prompt (Gedächtnis) brauchen beide Ollama.
+    → System-Prompt, oder None, wenn der Text doch bei einem Tool landet"""
+    return ollama_system_prompt(teiltext) if llm_fallback_erwartet(teiltext) else None
+
+
+def llm_vorausrechnen(teiltext: str) -> bool:
+    """Startet die Ollama-Anfrage schon auf dem stabilen Teil des Transkripts, wenn sie ohnehin käme.
+    Läuft im STT-Listener – entschieden wird hier nur über Schlüsselwörter, alles Weitere im Hintergrund."""
+    if not teiltext.strip() or schluesselwort_befehl(teiltext):
+        return False
+    from ollama_tools import spekulieren
+    spekulieren(teiltext.strip(), vorbereiten=_spekulation_vorbereiten)
+    return True
+
+
 def befehl_verarbeiten(befehl: str) -> str:
     if not befehl:
         return ""
 
+    neue_befehl_id()
+    with span("befehl", "gesamt"):
+        with span("routing", "schluesselwoerter"):
+            clean = befehl.strip().lower()
+            korrigiert = schluesselwoerter_korrigieren(clean)
+            if korrigiert != clean:
+                befehl = korrigiert
+            teile = intents_zerlegen(befehl.strip().lower())
+
+        if len(teile) > 1:
+            logging.info(f"Mehrfach-Befehl: {len(teile)} Intents → {teile}")
+            return _mehrfach_ausfuehren(teile)
+        return _einzelbefehl(befehl)
+
+
+def _einzelbefehl(befehl: str, embedding_erlaubt: bool = True) -> str:
     orig = befehl.strip()
     clean = befehl.strip().lower()
 
@@ -83,15 +386,72 @@ def befehl_verarbeiten(befehl: str) -> str:
     if clean in ("hilfe", "help", "was kannst du", "befehle", "kommando", "kommandos", "?"):
         return zeige_hilfemenue()
 
+    # ──────────────────────────────
+    # HTTP-Statistik (Latenz/Fehler pro Host)
+    # ──────────────────────────────
+    if clean in ("http statistik", "http stats", "netz statistik", "netzwerk statistik"):
+        return http_statistik()
+
+    # ──────────────────────────────
+    # Zustand: geladene Modelle, Backend-Gesundheit, Mikrofon
+    # ──────────────────────────────
+    if clean in ("modelle", "modelle anzeigen", "speicher", "ressourcen"):
+        from ressourcen import RESSOURCEN
+        return RESSOURCEN.uebersicht()
+
+    if clean in ("dienste", "backends", "gesundheit", "dienste status"):
+        from gesundheit import GESUNDHEIT
+        return GESUNDHEIT.uebersicht()
+
+    if clean in ("mikrofon statistik", "mikro statistik", "stt statistik", "audio statistik"):
+        from voice_tools import mikrofon_statistik
+        return mikrofon_statistik()
+
+    # ──────────────────────────────
+    # Latenz-Statistik (Spans seit Start), Spekulation / Chrome-Trace der Sitzung
+    # ──────────────────────────────
+    if clean in ("stats", "statistik", "latenz", "latenzen"):
+        return statistik()
+
+    if clean in ("spekulation", "spekulation statistik", "vorausrechnen"):
+        from ollama_tools import spekulation_bericht
+        return spekulation_bericht()
+
+    if clean in ("trace export", "trace exportieren", "exportiere trace"):
+        return f"Chrome-Trace gespeichert: {chrome_trace_exportieren()}"
+
+    # ──────────────────────────────
+    # Stopp: laufende Tools abbrechen
+    # ──────────────────────────────
+    if clean in ("stopp", "stop", "abbrechen", "halt", "hör auf"):
+        anzahl = ENGINE.alle_abbrechen()
+        return f"Abgebrochen ({anzahl} laufende Aufgabe{'n' if anzahl != 1 else ''})." if anzahl else "Gerade läuft nichts."
+
+    # ──────────────────────────────
+    # Kalender-Import/-Export (ICS) – vor allen Schlüsselwort-Zweigen: Pfade wie ~/Backup/… oder
+    # ~/opencloud/… enthalten Befehlswörter, und "kalENDEr" selbst enthält ein Schließ-Wort
+    # ──────────────────────────────
+    m = ICS_MUSTER.match(orig)
+    if m:
+        from calendar_tools import kalender_importieren, kalender_exportieren
+        funktion = kalender_importieren if m.group(1).lower() == "import" else kalender_exportieren
+        try:
+            return _tool(funktion, m.group(2))         # Pfad aus orig – Groß-/Kleinschreibung bleibt erhalten
+        except Exception as e:
+            logging.error(f"ICS-{m.group(1)} fehlgeschlagen: {e}", exc_info=True)
+            return f"ICS-{m.group(1).capitalize()} fehlgeschlagen: {e}"
+
+    # Schlüsselwort-Zweige: genau einer, bestimmt vom vordersten Schlüsselwort (wie beim Zerlegen)
+    intent = intent_erkennen(clean)
+
     # ──────────────────────────────
     # BACKUP
     # ──────────────────────────────
-    backup_keywords = ["backup", "mach backup", "backup machen", "erstelle backup", "daten sichern", "sichere daten", "backup erstellen"]
-    if any(kw in clean for kw in backup_keywords):
+    if intent == "backup":
         try:
             from backup_tools import backup_erstellen
             sprich("Erstelle Backup – nur wichtige Dateien im Hauptordner …")
-            return backup_erstellen()
+            return _tool(backup_erstellen)
         except Exception as e:
             logging.error(f"Backup-Tool Fehler: {e}")
             return "Backup-Tool gerade nicht verfügbar."
@@ -99,9 +459,8 @@ def befehl_verarbeiten(befehl: str) -> str:
     # ──────────────────────────────
     # Programm öffnen / starten
     # ──────────────────────────────
-    open_keywords = ["öffne", "starte", "mach auf", "start", "open", "aufrufen", "lade", "rufe auf"]
-    if any(kw in clean for kw in open_keywords):
-        used_kw = next((kw for kw in open_keywords if kw in clean), None)
+    if intent == "öffnen":
+        used_kw = next((kw for kw in OPEN_KEYWORDS if kw in clean), None)
         app_part = clean.split(used_kw, 1)[-1].strip() if used_kw else clean
 
         if not app_part:
@@ -131,9 +490,14 @@ def befehl_verarbeiten(befehl: str) -> str:
                 sprich(f"Öffne {path} …")
                 return f"Geöffnet: {path}"
 
-            subprocess.Popen([app_part], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            sprich(f"Versuche {app_part} zu starten …")
-            return f"{app_part} wird gestartet (falls installiert)."
+            # Alles andere: Desktop-/PATH-Index (Name, GenericName, Keywords, unscharf)
+            from app_index import app_finden, app_starten
+            app = app_finden(app_part)
+            if app and app_starten(app):
+                sprich(f"Öffne {app['name']} …")
+                return f"{app['name']} wird gestartet."
+
+            return f"Kein Programm für „{app_part}“ gefunden."
 
         except Exception as e:
             logging.error(f"Öffnen-Fehler: {e}")
@@ -142,7 +506,7 @@ def befehl_verarbeiten(befehl: str) -> str:
     # ──────────────────────────────
     # E-Mail mit Thunderbird (korrigiert)
     # ──────────────────────────────
-    if any(kw in clean for kw in ["mail an", "email an", "schreibe email", "schreibe mail"]):
+    if intent == "mail":
         try:
             from thunderbird_tools import email_vorbereiten
             if "mail an" in clean:
@@ -153,7 +517,7 @@ def befehl_verarbeiten(befehl: str) -> str:
                 person = clean.split("an", 1)[-1].strip()
 
             sprich(f"Öffne E-Mail an {person} …")
-            return email_vorbereiten(an=person)
+            return _tool(email_vorbereiten, an=person)
         except Exception as e:
             logging.error(f"Thunderbird Tool Fehler: {e}")
             return "Thunderbird Tool nicht verfügbar."
@@ -161,9 +525,8 @@ def befehl_verarbeiten(befehl: str) -> str:
     # ──────────────────────────────
     # Programm schließen / beenden
     # ──────────────────────────────
-    close_keywords = ["schließe", "beende", "mach zu", "kill", "stopp", "ende", "beenden", "terminiere"]
-    if any(kw in clean for kw in close_keywords):
-        used_kw = next((kw for kw in close_keywords if kw in clean), None)
+    if intent == "schließen":
+        used_kw = next((kw for kw in CLOSE_KEYWORDS if kw in clean), None)
         app_part = clean.split(used_kw, 1)[-1].strip() if used_kw else ""
 
         if not app_part:
@@ -177,7 +540,7 @@ def befehl_verarbeiten(befehl: str) -> str:
             return f"Konnte {app_part} nicht finden oder beenden."
 
     # Fensterliste
-    if any(kw in clean for kw in ["welche fenster", "fenster offen", "fensterliste", "offene fenster", "aktive fenster"]):
+    if intent == "fenster":
         try:
             result = subprocess.getoutput("wmctrl -l")
             sprich("Hier sind die aktuell offenen Fenster:")
@@ -188,7 +551,7 @@ def befehl_verarbeiten(befehl: str) -> str:
             return "Fensterliste nicht verfügbar – wmctrl installiert?"
 
     # Screenshot
-    if any(kw in clean for kw in ["screenshot", "mach screenshot", "bildschirmfoto", "screen shot"]):
+    if intent == "screenshot":
         try:
             filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
             path = os.path.join(os.path.expanduser("~/Bilder"), filename)
@@ -200,86 +563,96 @@ def befehl_verarbeiten(befehl: str) -> str:
             return "Screenshot fehlgeschlagen – ist scrot installiert?"
 
     # Lautstärke & Audio
-    if any(kw in clean for kw in ["lauter", "leiser", "stumm", "lautstärke hoch", "lautstärke runter", "mute"]):
+    if intent == "audio":
         try:
-            from system_tools import system_aktion
+            from system_toolsLinux import system_aktion
             sprich("Ändere Audio …")
-            return system_aktion(clean)
+            return _tool(system_aktion, clean)
         except:
             return "Audio-Steuerung gerade nicht möglich."
 
     # ──────────────────────────────
     # Restliche bekannte Tools
     # ──────────────────────────────
-    if "wetter" in clean:
+    if intent == "wetter":
         stadt = clean.split("wetter", 1)[-1].strip() or "Eschwege"
         try:
             from weather_tools import wetter_holen
-            return wetter_holen(stadt)
+            return _tool(wetter_holen, stadt)
         except:
             return "Wetter gerade nicht verfügbar."
 
-    if any(w in clean for w in ["wie spät", "uhrzeit", "zeit", "datum", "tag ist heute"]):
+    if intent == "zeit":
         try:
             from uhr_tools import jetzt_sagen
             if "datum" in clean or "tag" in clean:
-                return jetzt_sagen("datum")
-            return jetzt_sagen("uhrzeit")
+                return _tool(jetzt_sagen, "datum")
+            return _tool(jetzt_sagen, "uhrzeit")
         except:
             return "Uhrzeit gerade nicht verfügbar."
 
-    if "notiz" in clean:
+    if intent == "notiz":
         text = clean.split("notiz", 1)[-1].strip()
         try:
             from quicknotes_tools import schnellnotiz
-            return schnellnotiz(text)
+            return _tool(schnellnotiz, text)
         except:
             return "Notiz konnte nicht gespeichert werden."
 
-    if any(w in clean for w in ["termin", "termine", "kalender", "was habe ich"]):
+    if intent == "termin":
         try:
             from calendar_tools import termin_hinzufügen, termine_heute
-            if "heute" in clean or "termine" in clean or "was habe ich" in clean:
-                return termine_heute()
-            titel = clean.split("termin", 1)[-1].strip()
-            return termin_hinzufügen(titel)
+            if termin_abfrage(clean):
+                return _tool(termine_heute)
+            # Datum/Uhrzeit regelbasiert herauslösen – "arzt morgen 14 uhr" → ("arzt", "… 14:00")
+            from zeit_parser import termin_zerlegen
+            titel, datumzeit = termin_zerlegen(clean.split("termin", 1)[-1].strip())
+            return _tool(termin_hinzufügen, titel, datumzeit)
         except:
             return "Kalender gerade nicht verfügbar."
 
-    if "suche" in clean:
+    if intent == "suche":
         suchbegriff = clean.split("suche", 1)[-1].strip()
         try:
             from web_search_tools import web_suche
-            return web_suche(suchbegriff)
+            return _tool(web_suche, suchbegriff)
         except:
             return "Suche gerade nicht möglich."
 
     # ──────────────────────────────
-    # Ollama
+    # Embedding-Mittelstufe: klar einem Tool zuordenbar → direkt, ohne Chat-Modell
     # ──────────────────────────────
+    if embedding_erlaubt:
+        try:
+            from intent_embeddings import intent_klassifizieren
+            with span("routing", "embedding"):
+                treffer = intent_klassifizieren(clean)
+        except Exception as e:
+            logging.debug(f"Intent-Embeddings nicht nutzbar: {e}")
+            treffer = None
+        if treffer and treffer[0] in TOOL_BEFEHL:
+            umgeschrieben = TOOL_BEFEHL[treffer[0]](clean)
+            logging.info(f"Embedding-Intent {treffer[0]} ({treffer[1]:.2f}): '{clean}' → '{umgeschrieben}'")
+            return _einzelbefehl(umgeschrieben, embedding_erlaubt=False)
 
-    ctx = kontext_laden()
-    historie = "\n".join(ctx["historie"][-8:])
-
-    system_prompt = f"""Du bist Pia – frech, direkt, hilfsbereit und ein bisschen frech.
-Du sprichst Jan immer mit Vornamen an.
-Du steuerst einen Manjaro-Linux-Rechner.
-Antworte auf Deutsch, kurz, knackig und praxisnah. Maximal 2–3 Sätze.
-
-Letzte Unterhaltung:
-{historie}
+    # ──────────────────────────────
+    # Ollama
+    # ──────────────────────────────
 
-Wenn es ein Systembefehl ist, den du nicht direkt ausführen kannst, schlage den genauen Linux-Befehl vor (z. B. `sudo pacman -Syu`)."""
+    system_prompt = ollama_system_prompt(befehl)
 
     try:
         from ollama_tools import ollama_antwort
-        antwort = ollama_antwort(befehl, system_prompt=system_prompt)
-
-        ctx["historie"].append(f"Jan: {befehl}")
-        ctx["historie"].append(f"Pia: {antwort[:180]}")
-        if len(ctx["historie"]) > 30:
-            ctx["historie"] = ctx["historie"][-20:]
-        kontext_speichern(ctx)
+        antwort = _tool(ollama_antwort, befehl, system_prompt=system_prompt)
+
+        # Lesen–Ändern–Schreiben unter Lock: parallele Befehle (Daemon, Mehrfach-Intents) verlieren sonst Einträge
+        with _kontext_lock:
+            ctx = kontext_laden()
+            ctx["historie"].append(f"Jan: {befehl}")
+            ctx["historie"].append(f"Pia: {antwort[:180]}")
+            if len(ctx["historie"]) > 30:
+                ctx["historie"] = ctx["historie"][-20:]
+            kontext_speichern(ctx)
 
         return antwort
 
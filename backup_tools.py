@@ -3,6 +3,7 @@ import subprocess
 import zipfile
 from datetime import datetime
 from utils import BASE_DIR, sprich, logging
+from tool_engine import tool_timeout
 
 # ====================== SERVER KONFIGURATION ======================
 SERVER_IP = "192.168.178.22"           
@@ -17,7 +18,9 @@ SSH_PASSWORD = "12041993"
 SCP_TIMEOUT = 60                       
 # ================================================================
 
+@tool_timeout(150)
 def backup_erstellen():
+    """Sichert Konfiguration und Skripte als ZIP auf den Server"""
     try:
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         zipname = os.path.join(BASE_DIR, f"pia4-config-backup-{ts}.zip")
@@ -95,6 +98,14 @@ Ziel: {SERVER_IP}:{SERVER_PATH}"""
         return f"Fehler: {str(e)}"
 
 
+TOOL_BEISPIELE = {
+    "backup_erstellen": [
+        "sichere meine konfiguration",
+        "kopier meine einstellungen auf den server",
+        "mach eine sicherung",
+    ],
+}
+
 def tools_holen():
     return [
         ("backup_erstellen", backup_erstellen, "Backup / Server"),
@@ -0,0 +1,8 @@
+# benchmarks – Messungen für Routing und Tool-Dispatch von Pia4
+# Alles läuft im Prozess gegen Stubs (keine Sprachausgabe, keine Prozesse, kein Netz, kein Ollama).
+#
+#   python -m benchmarks.routing                 → Lauf + Vergleich mit benchmarks/baseline.json
+#   python -m benchmarks.routing --speichern     → aktuellen Lauf als neue Baseline ablegen
+#   python -m benchmarks.zeit_parser             → µs pro Aufruf des deutschen Datums-/Zeit-Parsers
+#   python -m benchmarks.stt_jitter              → Aufnahme-Jitter: STT im Prozess vs. STT-Worker-Prozess
+#   python -m benchmarks.stt_modelle             → Whisper-Modellgrößen mit/ohne Vokabular-Prompt (Treffer, RTF)
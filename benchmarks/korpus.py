@@ -0,0 +1,66 @@
+# korpus.py – realistische deutsche Befehle aus Vorlagen (deterministisch über den Seed)
+
+import random
+
+STAEDTE = ["Berlin", "Eschwege", "Kassel", "Hamburg", "München", "Göttingen", "Leipzig", "Köln", "Fulda", "Erfurt"]
+APPS = ["firefox", "brave", "chrome", "terminal", "konsole", "kitty", "mousepad", "gimp", "bildbearbeitung",
+        "taschenrechner", "vlc", "thunderbird", "libreoffice", "dateimanager"]
+NOTIZEN = ["kauf milch", "reifen wechseln", "oma anrufen", "steuererklärung abgeben", "müll rausbringen",
+           "paket abholen", "zahnarzt termin machen", "blumen gießen"]
+SUCHEN = ["python tutorial", "rezept lasagne", "manjaro update fehler", "wetterradar", "bahn fahrplan",
+          "pipewire latenz", "ollama modelle", "faster whisper cpu"]
+PERSONEN = ["max", "anna", "chef", "mama", "dieter"]
+TERMINE = ["arzt morgen 14 uhr", "friseur am freitag", "meeting um 10", "zahnarzt nächsten dienstag"]
+FRAGEN = [
+    "was ist der unterschied zwischen pacman und yay",
+    "wie viele einwohner hat berlin",
+    "erzähl mir einen witz",
+    "warum ist der himmel blau",
+    "wie repariere ich grub nach einem update",
+    "was kann ich heute kochen",
+    "wer hat die relativitätstheorie erfunden",
+    "danke dir",
+]
+TIPPFEHLER = {"wetter": ["wetta", "weter", "wettr"], "termine": ["termiene", "termin e"], "notiz": ["notitz", "notis"],
+              "screenshot": ["screnshot", "skreenshot"], "backup": ["bakup", "beckup"]}
+
+VORLAGEN = [
+    (8, lambda r: f"wetter {r.choice(STAEDTE)}"),
+    (4, lambda r: f"wie ist das wetter in {r.choice(STAEDTE)}"),
+    (5, lambda r: r.choice(["wie spät ist es", "uhrzeit", "welches datum haben wir", "welcher tag ist heute"])),
+    (5, lambda r: f"notiz {r.choice(NOTIZEN)}"),
+    (4, lambda r: f"termin {r.choice(TERMINE)}"),
+    (4, lambda r: r.choice(["termine heute", "was habe ich heute", "kalender"])),
+    (5, lambda r: f"{r.choice(['öffne', 'starte', 'mach'])} {r.choice(APPS)}{' auf' if r.random() < 0.2 else ''}"),
+    (3, lambda r: f"{r.choice(['schließe', 'beende'])} {r.choice(APPS)}"),
+    (3, lambda r: f"{r.choice(['mail an', 'email an', 'schreibe email an'])} {r.choice(PERSONEN)}"),
+    (4, lambda r: r.choice(["lauter", "leiser", "stumm", "mach lauter", "lautstärke runter"])),
+    (2, lambda r: r.choice(["mach screenshot", "bildschirmfoto", "welche fenster sind offen"])),
+    (4, lambda r: f"suche {r.choice(SUCHEN)}"),
+    (1, lambda r: r.choice(["mach backup", "daten sichern"])),
+    (6, lambda r: f"wetter {r.choice(STAEDTE)} und {r.choice(STAEDTE)} und termine heute"),
+    (3, lambda r: f"notiz {r.choice(NOTIZEN)}, dann suche {r.choice(SUCHEN)}"),
+    (6, lambda r: _vertippt(r)),
+    (10, lambda r: r.choice(FRAGEN)),
+    (2, lambda r: r.choice(["hilfe", "was kannst du", "stats", "http statistik"])),
+]
+
+
+def _vertippt(r: random.Random) -> str:
+    wort = r.choice(list(TIPPFEHLER))
+    falsch = r.choice(TIPPFEHLER[wort])
+    rest = {"wetter": r.choice(STAEDTE).lower(), "termine": "heute", "notiz": r.choice(NOTIZEN),
+            "screenshot": "", "backup": "machen"}[wort]
+    return f"{falsch} {rest}".strip()
+
+
+def korpus_erzeugen(anzahl: int = 5000, seed: int = 4711) -> list[str]:
+    r = random.Random(seed)
+    gewichte = [g for g, _ in VORLAGEN]
+    vorlagen = [v for _, v in VORLAGEN]
+    return [r.choices(vorlagen, weights=gewichte)[0](r) for _ in range(anzahl)]
+
+
+if __name__ == "__main__":
+    for befehl in korpus_erzeugen(30):
+        print(befehl)
@@ -0,0 +1,145 @@
+# routing.py – Durchsatz und Latenz von assistant_core.befehl_verarbeiten gegen Stubs
+#
+#   python -m benchmarks.routing [--anzahl 5000] [--seed 4711] [--schwelle 0.15] [--speichern]
+#
+# Vergleich mit benchmarks/baseline.json: Regression, wenn der Durchsatz um mehr als die Schwelle
+# fällt, ein p95 pro Zweig um mehr als die Schwelle steigt oder mehr Befehle beim LLM landen.
+# Exit-Code 1 bei Regression (für Skripte/CI). baseline.json ist bewusst nicht eingecheckt: sie gilt nur
+# für den Rechner, auf dem sie gemessen wurde, und überlebt so auch ein "git checkout" älterer Commits.
+
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BASELINE = Path(__file__).with_name("baseline.json")
+MIN_MESSUNGEN_FUER_VERGLEICH = 20      # Zweige mit weniger Befehlen sind zu verrauscht
+
+
+def _perzentil(werte: list, p: float) -> float:
+    werte = sorted(werte)
+    return werte[min(len(werte) - 1, int(round((len(werte) - 1) * p)))] if werte else 0.0
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=Path(__file__).parent, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "?"
+
+
+def messen(anzahl: int, seed: int, aufwaermen: int = 200) -> dict:
+    from benchmarks.korpus import korpus_erzeugen
+    from benchmarks.stubs import stubs_aktivieren, ZWEIGE
+
+    commit = _commit()          # vor den Stubs – subprocess ist danach ersetzt
+    korpus = korpus_erzeugen(anzahl, seed)
+    zeiten = defaultdict(list)
+    llm = 0
+
+    with stubs_aktivieren() as core:
+        logging.getLogger().setLevel(logging.WARNING)      # utils setzt beim Import INFO
+        for befehl in korpus[:aufwaermen]:
+            core.befehl_verarbeiten(befehl)
+
+        start = time.perf_counter()
+        for befehl in korpus:
+            zweige = []
+            ZWEIGE.set(zweige)
+            t0 = time.perf_counter()
+            core.befehl_verarbeiten(befehl)
+            dauer_us = (time.perf_counter() - t0) * 1e6
+
+            tools = [z for z in zweige if z != "prozess"]
+            if "llm" in tools:
+                zweig = "llm"
+                llm += 1
+            elif len(tools) > 1:
+                zweig = "mehrfach"
+            else:
+                zweig = tools[0] if tools else ("prozess" if zweige else "direkt")
+            zeiten[zweig].append(dauer_us)
+        gesamt = time.perf_counter() - start
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "anzahl": anzahl,
+        "seed": seed,
+        "durchsatz_pro_s": round(anzahl / gesamt, 1),
+        "llm_anteil": round(llm / anzahl, 4),
+        "zweige": {
+            z: {"n": len(w), "p50_us": round(_perzentil(w, 0.5), 1), "p95_us": round(_perzentil(w, 0.95), 1)}
+            for z, w in sorted(zeiten.items())
+        },
+    }
+
+
+def bericht(ergebnis: dict) -> str:
+    zeilen = [
+        f"Commit {ergebnis['commit']}  ·  {ergebnis['anzahl']} Befehle  ·  "
+        f"{ergebnis['durchsatz_pro_s']:.0f} Befehle/s  ·  LLM-Fallback {ergebnis['llm_anteil']:.1%}",
+        f"  {'Zweig':12} {'n':>6} {'p50 µs':>10} {'p95 µs':>10}",
+    ]
+    for z, w in ergebnis["zweige"].items():
+        zeilen.append(f"  {z:12} {w['n']:6d} {w['p50_us']:10.1f} {w['p95_us']:10.1f}")
+    return "\n".join(zeilen)
+
+
+def vergleichen(ergebnis: dict, basis: dict, schwelle: float) -> list[str]:
+    probleme = []
+    if ergebnis["durchsatz_pro_s"] < basis["durchsatz_pro_s"] * (1 - schwelle):
+        probleme.append(f"Durchsatz {ergebnis['durchsatz_pro_s']:.0f}/s < Baseline {basis['durchsatz_pro_s']:.0f}/s")
+    if ergebnis["llm_anteil"] > basis["llm_anteil"] + 0.005:
+        probleme.append(f"LLM-Anteil {ergebnis['llm_anteil']:.1%} > Baseline {basis['llm_anteil']:.1%}")
+    for z, w in ergebnis["zweige"].items():
+        b = basis["zweige"].get(z)
+        if not b or min(w["n"], b["n"]) < MIN_MESSUNGEN_FUER_VERGLEICH:
+            continue
+        if w["p95_us"] > b["p95_us"] * (1 + schwelle):
+            probleme.append(f"{z}: p95 {w['p95_us']:.0f} µs > Baseline {b['p95_us']:.0f} µs")
+    return probleme
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Routing-/Dispatch-Benchmark für Pia4")
+    parser.add_argument("--anzahl", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=4711)
+    parser.add_argument("--schwelle", type=float, default=0.15, help="erlaubte Verschlechterung (0.15 = 15 %%)")
+    parser.add_argument("--speichern", action="store_true", help="Ergebnis als neue Baseline speichern")
+    args = parser.parse_args(argv)
+
+    ergebnis = messen(args.anzahl, args.seed)
+    print(bericht(ergebnis))
+
+    if args.speichern:
+        BASELINE.write_text(json.dumps(ergebnis, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"\nBaseline gespeichert: {BASELINE}")
+        return 0
+
+    if not BASELINE.exists():
+        print("\nKeine Baseline vorhanden – mit --speichern anlegen.")
+        return 0
+
+    basis = json.loads(BASELINE.read_text(encoding="utf-8"))
+    if (basis["anzahl"], basis["seed"]) != (ergebnis["anzahl"], ergebnis["seed"]):
+        print("\nBaseline mit anderem Korpus (anzahl/seed) – kein Vergleich.")
+        return 0
+
+    probleme = vergleichen(ergebnis, basis, args.schwelle)
+    print(f"\nVergleich mit Baseline {basis['commit']} (Schwelle {args.schwelle:.0%}):")
+    for p in probleme:
+        print(f"  ✗ {p}")
+    if not probleme:
+        print("  ✓ keine Regression")
+    return 1 if probleme else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# stt_jitter.py – Aufnahme-Jitter mit STT im selben Prozess vs. im Worker-Prozess
+#
+#   python -m benchmarks.stt_jitter [--sekunden 10] [--block-ms 100]
+#
+# Ein Thread spielt den Audio-Callback nach (alle block_ms einen Block in den AudioRing) und misst,
+# wie weit jeder Aufruf neben seinem Soll-Zeitpunkt liegt. Parallel läuft eine CPU-Last, die den
+# GIL hält wie die Python-Seite der Transkription – einmal als Thread im selben Prozess (alter Aufbau),
+# einmal als eigener Prozess, der aus dem Ring liest (stt_worker). Kein Whisper, kein Mikrofon nötig.
+# "spät" = mehr als einen halben Block daneben – bei echter Hardware läuft dann der Treiberpuffer voll.
+
+import argparse
+import multiprocessing as mp
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.routing import _perzentil
+from stt_worker import SAMPLERATE, AudioRing
+
+
+def _last(ring_name: str, kapazitaet: int, stopp):
+    """Liest den Ring wie der Worker und verbrennt pro Block reine Python-Rechenzeit (hält den GIL)"""
+    ring = AudioRing(kapazitaet, name=ring_name)
+    pos = ring.position()
+    while not stopp.is_set():
+        samples, pos, _ = ring.lesen_ab(pos)
+        summe = 0.0
+        for i in range(200_000):
+            summe += (i % 7) * 0.5
+        del samples
+    ring.schliessen()
+
+
+def _aufnahme(ring: AudioRing, sekunden: float, block_ms: float) -> list[float]:
+    block = np.zeros(int(SAMPLERATE * block_ms / 1000), dtype=np.float32)
+    abweichungen = []
+    start = time.perf_counter()
+    for n in range(int(sekunden * 1000 / block_ms)):
+        soll = start + (n + 1) * block_ms / 1000
+        time.sleep(max(0.0, soll - time.perf_counter()))
+        abweichungen.append((time.perf_counter() - soll) * 1000)
+        ring.schreiben(block)
+    return abweichungen
+
+
+def messen(modus: str, sekunden: float, block_ms: float) -> dict:
+    ring = AudioRing()
+    if modus == "prozess":
+        ctx = mp.get_context("spawn")
+        stopp = ctx.Event()
+        last = ctx.Process(target=_last, args=(ring.name, ring.kapazitaet, stopp), daemon=True)
+    elif modus == "thread":
+        stopp = threading.Event()
+        last = threading.Thread(target=_last, args=(ring.name, ring.kapazitaet, stopp), daemon=True)
+    else:
+        stopp, last = None, None
+    if last:
+        last.start()
+        time.sleep(1.0 if modus == "prozess" else 0.1)      # Spawn + Import abwarten
+    try:
+        abweichungen = _aufnahme(ring, sekunden, block_ms)
+    finally:
+        if last:
+            stopp.set()
+            last.join(5)
+        ring.schliessen()
+    abweichungen.sort()
+    return {
+        "p50": _perzentil(abweichungen, 0.5),
+        "p95": _perzentil(abweichungen, 0.95),
+        "max": abweichungen[-1],
+        "spaet": sum(a > block_ms / 2 for a in abweichungen),
+        "bloecke": len(abweichungen),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aufnahme-Jitter: STT im Prozess vs. Worker-Prozess")
+    parser.add_argument("--sekunden", type=float, default=10.0)
+    parser.add_argument("--block-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'Aufbau':22} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'spät':>8}")
+    for modus, titel in (("ohne", "ohne Last"), ("thread", "STT im Prozess"), ("prozess", "STT-Worker-Prozess")):
+        e = messen(modus, args.sekunden, args.block_ms)
+        print(f"{titel:22} {e['p50']:8.2f} {e['p95']:8.2f} {e['max']:8.2f} {e['spaet']:>4}/{e['bloecke']}")
+
+
+if __name__ == "__main__":
+    main()
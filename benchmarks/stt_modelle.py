@@ -0,0 +1,142 @@
+# stt_modelle.py – Whisper-Modellgrößen mit und ohne Vokabular-Prompt (stt_vokabular.py)
+#
+#   python -m benchmarks.stt_modelle [--modelle base,small,large-v3-turbo] [--aufnahmen DIR] [--rauschen 0.01]
+#
+# Pro Modell wird jede Aufnahme zweimal transkribiert – ohne und mit initial_prompt – genau wie im
+# STT-Worker (stt_worker.transkribieren). Gemessen werden:
+#   Befehl ok   Anteil der Sätze, die nach Normalisierung exakt der Referenz entsprechen
+#   WER         Wortfehlerrate über alle Sätze
+#   Vokabular   Anteil der Vokabular-Wörter aus der Referenz, die im Transkript wieder auftauchen
+#   RTF         Rechenzeit / Audiodauer (< 1 = schneller als Echtzeit)
+#
+# Aufnahmen: DIR/*.wav (PCM, beliebige Rate, wird auf 16 kHz gebracht) + gleichnamige .txt mit dem
+# gesprochenen Text. Ohne --aufnahmen werden die Sätze aus SAETZE mit Piper synthetisiert.
+
+import argparse
+import io
+import re
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from stt_worker import SAMPLERATE, modell_laden, transkribieren
+from stt_vokabular import prompt_bauen
+
+SAETZE = [
+    "hey pia öffne thunderbird",
+    "hey pia wetter in eschwege",
+    "hey pia termin zahnarzt morgen 14 uhr",
+    "hey pia mach screenshot",
+    "hey pia lautstärke runter",
+    "hey pia notiz reifen wechseln",
+    "hey pia schließe firefox",
+    "hey pia welche fenster sind offen",
+    "hey pia backup machen",
+    "hey pia termine heute",
+    "hey pia starte konsole",
+    "hey pia suche rezepte für lasagne",
+]
+
+
+def normalisieren(text: str) -> str:
+    return " ".join(re.sub(r"[^\wäöüß ]+", " ", text.lower()).split())
+
+
+def wer(referenz: str, hypothese: str) -> tuple[int, int]:
+    """→ (Fehler, Wörter der Referenz) per Levenshtein auf Wortebene"""
+    r, h = referenz.split(), hypothese.split()
+    zeile = list(range(len(h) + 1))
+    for i, wr in enumerate(r, 1):
+        vorher, zeile[0] = zeile[0], i
+        for j, wh in enumerate(h, 1):
+            vorher, zeile[j] = zeile[j], min(zeile[j] + 1, zeile[j - 1] + 1, vorher + (wr != wh))
+    return zeile[-1], len(r)
+
+
+def _wav_lesen(daten) -> np.ndarray:
+    with wave.open(daten, "rb") as w:
+        rate, kanaele, breite = w.getframerate(), w.getnchannels(), w.getsampwidth()
+        roh = w.readframes(w.getnframes())
+    if breite != 2:
+        raise ValueError("nur 16-Bit-PCM")
+    audio = np.frombuffer(roh, dtype=np.int16).astype(np.float32) / 32768.0
+    audio = audio.reshape(-1, kanaele).mean(axis=1)
+    if rate != SAMPLERATE:
+        ziel = np.arange(0, len(audio) * SAMPLERATE / rate) * rate / SAMPLERATE
+        audio = np.interp(ziel, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def aufnahmen_laden(verzeichnis: str | None) -> list[tuple[str, np.ndarray]]:
+    if verzeichnis:
+        paare = []
+        for wav in sorted(Path(verzeichnis).glob("*.wav")):
+            txt = wav.with_suffix(".txt")
+            if txt.exists():
+                paare.append((txt.read_text(encoding="utf-8").strip(), _wav_lesen(str(wav))))
+        return paare
+    from utils import piper_laden
+    stimme = piper_laden()
+    if stimme is None:
+        raise SystemExit("Piper nicht verfügbar – Aufnahmen per --aufnahmen DIR angeben (*.wav + *.txt)")
+    return [(s, _wav_lesen(io.BytesIO(stimme.synthesize(s)))) for s in SAETZE]
+
+
+def messen(model, aufnahmen, prompt: str, vokabular: set, rauschen: float) -> dict:
+    rng = np.random.default_rng(4711)
+    ok = fehler = woerter = vok_soll = vok_ist = 0
+    rechenzeit = audiodauer = 0.0
+    for referenz, audio in aufnahmen:
+        if rauschen:
+            audio = (audio + rng.normal(0, rauschen, len(audio))).astype(np.float32)
+        start = time.perf_counter()
+        text = transkribieren(model, audio, prompt)
+        rechenzeit += time.perf_counter() - start
+        audiodauer += len(audio) / SAMPLERATE
+        ref, hyp = normalisieren(referenz), normalisieren(text)
+        ok += ref == hyp
+        f, n = wer(ref, hyp)
+        fehler, woerter = fehler + f, woerter + n
+        treffer = [w for w in ref.split() if w in vokabular]
+        vok_soll += len(treffer)
+        vok_ist += sum(w in hyp.split() for w in treffer)
+    return {
+        "ok": ok / len(aufnahmen),
+        "wer": fehler / max(1, woerter),
+        "vokabular": vok_ist / vok_soll if vok_soll else 1.0,
+        "rtf": rechenzeit / max(1e-9, audiodauer),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Whisper-Modelle mit/ohne Vokabular-Prompt vergleichen")
+    parser.add_argument("--modelle", default="base,small,large-v3-turbo")
+    parser.add_argument("--aufnahmen", help="Verzeichnis mit *.wav + *.txt (sonst Piper-Synthese)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="default", help="wie voice_tools auf der CPU; int8 für GPU-Werte")
+    parser.add_argument("--rauschen", type=float, default=0.0, help="Gauß-Rauschen (Std.-Abw.) auf die Aufnahmen")
+    args = parser.parse_args(argv)
+
+    aufnahmen = aufnahmen_laden(args.aufnahmen)
+    if not aufnahmen:
+        raise SystemExit("Keine Aufnahmen gefunden")
+    prompt = prompt_bauen(erzwingen=True)
+    vokabular = set(normalisieren(prompt).split())
+    print(f"{len(aufnahmen)} Aufnahmen, Vokabular-Prompt {len(prompt)} Zeichen\n")
+
+    print(f"{'Modell':18} {'Prompt':7} {'Befehl ok':>9} {'WER':>7} {'Vokabular':>9} {'RTF':>7} {'Laden s':>8}")
+    for name in args.modelle.split(","):
+        start = time.perf_counter()
+        model = modell_laden(name.strip(), args.device, args.compute_type)
+        laden = time.perf_counter() - start
+        transkribieren(model, aufnahmen[0][1])                  # Aufwärmen (erste Inferenz ist langsamer)
+        for titel, p in (("ohne", ""), ("mit", prompt)):
+            e = messen(model, aufnahmen, p, vokabular, args.rauschen)
+            print(f"{name:18} {titel:7} {e['ok']:9.0%} {e['wer']:7.1%} {e['vokabular']:9.0%} {e['rtf']:7.3f} {laden:8.1f}")
+        del model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# stubs.py – In-Prozess-Ersatz für alles, was im Benchmark nicht wirklich passieren darf:
+# Sprachausgabe, Prozesse, Netz-Tools, Ollama, Dateischreiben (Kalender/Notizen/Kontext).
+# Jeder Stub trägt in ZWEIGE ein, welcher Tool-Zweig bedient wurde.
+
+import contextvars
+import subprocess
+import sys
+import tempfile
+import types
+from contextlib import contextmanager
+from pathlib import Path
+
+ZWEIGE = contextvars.ContextVar("zweige", default=None)
+
+
+def _merken(zweig: str):
+    liste = ZWEIGE.get()
+    if liste is not None:
+        liste.append(zweig)
+
+
+def _stub(zweig: str, name: str, antwort: str = "ok"):
+    def func(*args, **kwargs):
+        _merken(zweig)
+        return antwort
+    func.__name__ = name
+    return func
+
+
+def _modul(name: str, **funktionen) -> types.ModuleType:
+    m = types.ModuleType(name)
+    m.__dict__.update(funktionen)
+    return m
+
+
+STUB_MODULE = {
+    "backup_tools":      {"backup_erstellen": ("backup", "backup_erstellen")},
+    "thunderbird_tools": {"email_vorbereiten": ("mail", "email_vorbereiten")},
+    "system_toolsLinux": {"system_aktion": ("audio", "system_aktion")},
+    "weather_tools":     {"wetter_holen": ("wetter", "wetter_holen")},
+    "uhr_tools":         {"jetzt_sagen": ("zeit", "jetzt_sagen")},
+    "quicknotes_tools":  {"schnellnotiz": ("notiz", "schnellnotiz")},
+    "calendar_tools":    {"termin_hinzufügen": ("termin", "termin_hinzufügen"),
+                          "termine_heute": ("termin", "termine_heute"),
+                          "kalender_importieren": ("kalender", "kalender_importieren"),
+                          "kalender_exportieren": ("kalender", "kalender_exportieren")},
+    "web_search_tools":  {"web_suche": ("suche", "web_suche")},
+    "ollama_tools":      {"ollama_antwort": ("llm", "ollama_antwort")},
+}
+
+
+class _Popen:
+    def __init__(self, *args, **kwargs):
+        _merken("prozess")
+        self.returncode = 0
+
+    def wait(self, timeout=None):
+        return 0
+
+    def poll(self):
+        return 0
+
+
+def _run(*args, **kwargs):
+    _merken("prozess")
+    return subprocess.CompletedProcess(args[0] if args else kwargs.get("args"), 0, "", "")
+
+
+def _getoutput(*args, **kwargs):
+    _merken("prozess")
+    return ""
+
+
+@contextmanager
+def stubs_aktivieren():
+    """Installiert alle Stubs, liefert das (frisch importierte) assistant_core-Modul"""
+    gesichert_module = {name: sys.modules.get(name) for name in
+                        list(STUB_MODULE) + ["app_index", "intent_embeddings", "gedaechtnis"]}
+    gesichert_sub = (subprocess.Popen, subprocess.run, subprocess.getoutput)
+    tmp = tempfile.TemporaryDirectory(prefix="pia-bench-")
+
+    for modul, funktionen in STUB_MODULE.items():
+        sys.modules[modul] = _modul(modul, **{f: _stub(z, n) for f, (z, n) in funktionen.items()})
+
+    sys.modules["app_index"] = _modul(
+        "app_index",
+        app_finden=lambda anfrage: {"name": anfrage, "exec": anfrage},
+        app_starten=lambda app: (_merken("öffnen"), True)[1],
+    )
+    # Embedding-Stufe bräuchte Ollama → im Benchmark "keine klare Zuordnung", kein Gedächtnis-Kontext
+    def _keine_embeddings(*args, **kwargs):
+        raise ConnectionError("Embeddings im Benchmark abgeschaltet")
+    sys.modules["intent_embeddings"] = _modul(
+        "intent_embeddings",
+        EMBED_MODELL="benchmark",
+        einbetten=_keine_embeddings,
+        anfrage_einbetten=_keine_embeddings,
+        intent_klassifizieren=lambda text: None,
+    )
+    sys.modules["gedaechtnis"] = _modul("gedaechtnis", prompt_kontext=lambda *a, **k: "")
+    subprocess.Popen, subprocess.run, subprocess.getoutput = _Popen, _run, _getoutput
+
+    import tracing
+    tracing.TRACE_DATEI = Path(tmp.name) / "traces.jsonl"
+
+    import utils
+    import assistant_core
+    stumm = lambda *a, **k: None
+    gesichert_sprich = (utils.sprich, assistant_core.sprich)
+    gesichert_kontext = (assistant_core.kontext_laden, assistant_core.kontext_speichern)
+    gesichert_hilfe = assistant_core.zeige_hilfemenue
+    utils.sprich = assistant_core.sprich = stumm
+    assistant_core.zeige_hilfemenue = _stub("hilfe", "zeige_hilfemenue")     # druckt sonst das Menü
+    kontext = {"historie": []}
+    assistant_core.kontext_laden = lambda: kontext
+    assistant_core.kontext_speichern = lambda d: None
+
+    try:
+        yield assistant_core
+    finally:
+        utils.sprich, assistant_core.sprich = gesichert_sprich
+        assistant_core.kontext_laden, assistant_core.kontext_speichern = gesichert_kontext
+        assistant_core.zeige_hilfemenue = gesichert_hilfe
+        subprocess.Popen, subprocess.run, subprocess.getoutput = gesichert_sub
+        for name, modul in gesichert_module.items():
+            if modul is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = modul
+        tmp.cleanup()
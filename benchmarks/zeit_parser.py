@@ -0,0 +1,72 @@
+# zeit_parser.py – Kosten von zeit_parser.termin_zerlegen pro Aufruf
+#
+#   python -m benchmarks.zeit_parser [--anzahl 20000] [--seed 4711]
+#
+# Läuft ohne Stubs: der Parser ist reine Standardbibliothek. Zum Vergleich wird die Hälfte der
+# Eingaben ohne Zeitangabe gemessen (Titel bleibt stehen, alle Regeln laufen leer durch).
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.korpus import NOTIZEN, PERSONEN
+from benchmarks.routing import _perzentil
+
+ZEITEN = ["morgen 14 uhr", "am freitag", "um 10", "nächsten dienstag", "übermorgen um halb drei",
+          "in 20 minuten", "am 3. märz", "am 12.11. um 8:15", "heute abend um 8", "morgen früh",
+          "in 3 tagen", "viertel vor drei", "2026-12-24 18:00", "in einer halben stunde",
+          "am montag um 7"]
+TITEL = NOTIZEN + [f"treffen mit {p}" for p in PERSONEN] + ["arzt", "friseur", "meeting", "zahnarzt"]
+
+
+def korpus_erzeugen(anzahl: int, seed: int) -> list[str]:
+    r = random.Random(seed)
+    befehle = []
+    for i in range(anzahl):
+        titel = r.choice(TITEL)
+        if i % 2:
+            befehle.append(titel)
+        else:
+            zeit = r.choice(ZEITEN)
+            befehle.append(f"{titel} {zeit}" if r.random() < 0.7 else f"{zeit} {titel}")
+    return befehle
+
+
+def messen(anzahl: int, seed: int) -> dict:
+    from zeit_parser import termin_zerlegen
+
+    jetzt = datetime(2026, 10, 19, 9, 30)
+    korpus = korpus_erzeugen(anzahl, seed)
+    for befehl in korpus[:500]:
+        termin_zerlegen(befehl, jetzt)
+
+    mit, ohne = [], []
+    erkannt = 0
+    for i, befehl in enumerate(korpus):
+        t0 = time.perf_counter()
+        _, datumzeit = termin_zerlegen(befehl, jetzt)
+        dauer_us = (time.perf_counter() - t0) * 1e6
+        (ohne if i % 2 else mit).append(dauer_us)
+        erkannt += datumzeit is not None and not i % 2
+    return {"mit_zeit": mit, "ohne_zeit": ohne, "erkannt": erkannt / max(1, len(mit))}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark für den deutschen Zeit-Parser")
+    parser.add_argument("--anzahl", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=4711)
+    args = parser.parse_args(argv)
+
+    ergebnis = messen(args.anzahl, args.seed)
+    print(f"{args.anzahl} Eingaben  ·  Zeitangabe erkannt: {ergebnis['erkannt']:.1%}")
+    print(f"  {'Eingabe':12} {'n':>6} {'p50 µs':>10} {'p95 µs':>10} {'max µs':>10}")
+    for name in ("mit_zeit", "ohne_zeit"):
+        w = ergebnis[name]
+        print(f"  {name:12} {len(w):6d} {_perzentil(w, 0.5):10.1f} {_perzentil(w, 0.95):10.1f} {max(w):10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
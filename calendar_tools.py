@@ -1,8 +1,14 @@
 # calendar_tools.py – Kalender, Erinnerungen, To-dos (einfache JSON-Version)
+# ICS-Import/-Export streamt zeilenweise; Wiederholungen bleiben als kompakte RRULE im Eintrag stehen
+# und werden erst in termine_heute() für den jeweiligen Tag ausgewertet.
 
+import hashlib
 import os
-from datetime import datetime, timedelta
-from utils import BASE_DIR, sprich, telegram_senden, lade_json, speichere_json, logging
+import re
+from functools import lru_cache
+from datetime import date, datetime, timedelta, timezone
+from utils import BASE_DIR, sprich, telegram_senden, lade_json, speichere_json, logging, json_lock
+from tool_engine import tool_timeout
 
 DATEI = os.path.join(BASE_DIR, "kalender.json")
 
@@ -41,28 +47,333 @@ def termin_hinzufügen(titel: str, datumzeit: str = None, typ: str = "termin"):
     return msg
 
 def termine_heute():
+    """Listet die heutigen Termine und Erinnerungen"""
     init()
     daten = lade_json("kalender.json")
-    heute = datetime.now().date().isoformat()
+    heute = datetime.now().date()
     
     treffer = [
         e for e in daten["einträge"]
-        if "wann" in e and e["wann"].startswith(heute)
+        if "wann" in e and (e["wann"].startswith(heute.isoformat()) or ("rrule" in e and tritt_ein(e, heute)))
     ]
     
     if not treffer:
         return "Heute keine Termine / Erinnerungen."
     
     zeilen = []
-    for e in sorted(treffer, key=lambda x: x.get("wann", "9999")):
-        uhrzeit = e["wann"][11:16] if "wann" in e else "∞"
+    for e in sorted(treffer, key=lambda x: "" if x.get("ganztags") else x["wann"][11:16]):
+        uhrzeit = "ganztags" if e.get("ganztags") else e["wann"][11:16]
         status = f" [{e['status']}]" if e.get("status") else ""
         zeilen.append(f"{uhrzeit}  {e['titel']}{status}")
     
     return "\n".join(zeilen)
 
+# ──────────────────────────────
+# Wiederholungen (RRULE) – erst bei Bedarf für einen Tag ausgewertet
+# ──────────────────────────────
+_WOCHENTAGE = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+MAX_COUNT_TAGE = 366 * 50          # COUNT-Regeln werden tageweise abgezählt – Obergrenze gegen Endlosschleifen
+
+def _regel(rrule: str) -> dict:
+    return dict(teil.split("=", 1) for teil in rrule.upper().split(";") if "=" in teil)
+
+def _nter_wochentag(tag: date, angabe: str) -> bool:
+    """BYDAY-Wert wie "MO", "2TU" oder "-1FR" im Monatskontext"""
+    m = re.fullmatch(r"([+-]?\d*)(MO|TU|WE|TH|FR|SA|SU)", angabe)
+    if not m or _WOCHENTAGE.index(m.group(2)) != tag.weekday():
+        return False
+    if not m.group(1):
+        return True
+    n = int(m.group(1))
+    if n > 0:
+        return (tag.day - 1) // 7 + 1 == n
+    naechster_monat = (tag.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return ((naechster_monat - tag).days - 1) // 7 + 1 == -n
+
+def _passt(start: date, r: dict, tag: date) -> bool:
+    """Liegt tag auf dem Raster der Regel (ohne UNTIL/COUNT/EXDATE)?"""
+    freq = r.get("FREQ")
+    intervall = int(r.get("INTERVAL", 1))
+    byday = r["BYDAY"].split(",") if "BYDAY" in r else []
+    bymonthday = [int(x) for x in r["BYMONTHDAY"].split(",")] if "BYMONTHDAY" in r else []
+    bymonth = [int(x) for x in r["BYMONTH"].split(",")] if "BYMONTH" in r else []
+    if bymonth and tag.month not in bymonth:
+        return False
+    if freq == "DAILY":
+        return (tag - start).days % intervall == 0 and (not byday or _WOCHENTAGE[tag.weekday()] in byday)
+    if freq == "WEEKLY":
+        wochen = ((tag - timedelta(days=tag.weekday())) - (start - timedelta(days=start.weekday()))).days // 7
+        tage = byday or [_WOCHENTAGE[start.weekday()]]
+        return wochen % intervall == 0 and _WOCHENTAGE[tag.weekday()] in tage
+    monate = (tag.year - start.year) * 12 + tag.month - start.month
+    if freq == "MONTHLY":
+        if monate % intervall:
+            return False
+    elif freq == "YEARLY":
+        if (tag.year - start.year) % intervall or (not bymonth and tag.month != start.month):
+            return False
+    else:
+        return False
+    if byday:
+        return any(_nter_wochentag(tag, b) for b in byday)
+    tage_im_monat = ((tag.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).day
+    return tag.day in [d if d > 0 else tage_im_monat + d + 1 for d in (bymonthday or [start.day])]
+
+def tritt_ein(eintrag: dict, tag: date) -> bool:
+    """Fällt ein (wiederkehrender) Eintrag auf diesen Tag?"""
+    start = datetime.fromisoformat(eintrag["wann"]).date()
+    if tag < start or tag.isoformat() in eintrag.get("exdate", ()):
+        return False
+    if "rrule" not in eintrag:
+        return tag == start
+    r = _regel(eintrag["rrule"])
+    if "UNTIL" in r and tag.isoformat().replace("-", "") > r["UNTIL"][:8]:
+        return False
+    if not _passt(start, r, tag):
+        return False
+    if "COUNT" in r:
+        # Vorkommen bis einschließlich tag abzählen (EXDATE zählt laut RFC 5545 mit)
+        anzahl, d = 0, start
+        while d <= tag and (d - start).days < MAX_COUNT_TAGE:
+            anzahl += _passt(start, r, d)
+            d += timedelta(days=1)
+        return anzahl <= int(r["COUNT"])
+    return True
+
+# ──────────────────────────────
+# ICS-Import / -Export (RFC 5545, nur VEVENT/VTODO-Grundfelder)
+# ──────────────────────────────
+def _ics_zeilen(pfad: str):
+    """Entfaltete Inhaltszeilen als (NAME, {PARAM: wert}, wert) – liest die Datei zeilenweise"""
+    def zerlegen(zeile):
+        kopf, _, wert = zeile.partition(":")
+        name, *params = kopf.split(";")
+        return name.upper(), dict(p.split("=", 1) for p in params if "=" in p), wert
+
+    puffer = None
+    with open(pfad, encoding="utf-8", errors="replace", newline="") as f:
+        for zeile in f:
+            zeile = zeile.rstrip("\r\n")
+            if zeile[:1] in (" ", "\t") and puffer is not None:
+                puffer += zeile[1:]
+                continue
+            if puffer:
+                yield zerlegen(puffer)
+            puffer = zeile
+    if puffer:
+        yield zerlegen(puffer)
+
+def _ics_text(wert: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), wert)
+
+@lru_cache(maxsize=64)
+def _zeitzone(tzid: str):
+    """IANA-Zone zur TZID – unbekannte (z. B. Windows-Namen wie "W. Europe Standard Time") einmal loggen → None"""
+    from zoneinfo import ZoneInfo
+    tzid = tzid.strip('"')
+    try:
+        return ZoneInfo(tzid)
+    except (KeyError, ValueError, OSError):     # ZoneInfoNotFoundError ist ein KeyError
+        logging.warning(f"ICS: Zeitzone {tzid!r} unbekannt – Zeiten gelten als Ortszeit")
+        return None
+
+def _ics_zeit(wert: str, params: dict) -> tuple[datetime, bool]:
+    """→ (lokale Zeit ohne tzinfo, ganztags). UTC ("Z") und bekannte TZIDs werden in Ortszeit umgerechnet"""
+    wert = wert.strip()
+    if params.get("VALUE") == "DATE" or len(wert) == 8:
+        return datetime.strptime(wert[:8], "%Y%m%d"), True
+    dt = datetime.strptime(wert[:15], "%Y%m%dT%H%M%S")
+    zone = timezone.utc if wert.endswith("Z") else _zeitzone(params["TZID"]) if params.get("TZID") else None
+    if zone is not None:
+        dt = dt.replace(tzinfo=zone).astimezone().replace(tzinfo=None)
+    return dt, False
+
+def _ics_eintraege(pfad: str):
+    """Streamt VEVENT/VTODO als Kalender-Einträge – nie mehr als ein Ereignis im Speicher"""
+    ereignis, verschachtelt = None, 0
+    for name, params, wert in _ics_zeilen(pfad):
+        if name == "BEGIN":
+            if ereignis is not None:
+                verschachtelt += 1              # VALARM & Co. im Ereignis überspringen
+            elif wert.upper() in ("VEVENT", "VTODO"):
+                ereignis = {"typ": "todo" if wert.upper() == "VTODO" else "termin"}
+            continue
+        if name == "END":
+            if verschachtelt:
+                verschachtelt -= 1
+            elif ereignis is not None:
+                if ereignis.get("uid") and ereignis.get("titel"):
+                    yield ereignis
+                ereignis = None
+            continue
+        if ereignis is None or verschachtelt:
+            continue
+        try:
+            if name == "UID":
+                ereignis["uid"] = wert.strip()
+            elif name == "SUMMARY":
+                ereignis["titel"] = _ics_text(wert).strip()
+            elif name == "LOCATION" and wert:
+                ereignis["ort"] = _ics_text(wert)
+            elif name == "DESCRIPTION" and wert:
+                ereignis["notiz"] = _ics_text(wert)[:500]
+            elif name == "DTSTART" or (name == "DUE" and "wann" not in ereignis):
+                dt, ganztags = _ics_zeit(wert, params)
+                ereignis["wann"] = dt.isoformat()
+                if ganztags:
+                    ereignis["ganztags"] = True
+            elif name == "DTEND":
+                ereignis["ende"] = _ics_zeit(wert, params)[0].isoformat()
+            elif name == "RRULE":
+                ereignis["rrule"] = wert.strip()
+            elif name == "EXDATE":
+                ereignis.setdefault("exdate", []).extend(
+                    _ics_zeit(w, params)[0].date().isoformat() for w in wert.split(",") if w.strip())
+            elif name == "RECURRENCE-ID":
+                ereignis["ersetzt"] = _ics_zeit(wert, params)[0].date().isoformat()
+            elif name == "STATUS" and ereignis["typ"] == "todo":
+                ereignis["status"] = "erledigt" if wert.upper() == "COMPLETED" else "offen"
+        except ValueError as e:
+            logging.debug(f"ICS: {name} nicht lesbar ({wert!r}): {e}")
+
+@tool_timeout(300)                 # große Exporte (zehntausende Termine) brauchen einige Sekunden
+def kalender_importieren(pfad: str):
+    """Importiert eine .ics-Datei (streamend). Erneuter Import aktualisiert per UID statt zu verdoppeln"""
+    pfad = os.path.expanduser(pfad.strip().strip("\"'"))
+    if not os.path.isfile(pfad):
+        return f"ICS-Datei nicht gefunden: {pfad}"
+    init()
+    start = datetime.now()
+    neu = aktualisiert = 0
+
+    # Erst ohne Lock lesen – Termine anlegen/abfragen geht währenddessen weiter
+    # Schlüssel: UID, bei geänderten Einzelterminen einer Serie UID + Datum (RECURRENCE-ID)
+    importiert = {}
+    ausnahmen = {}                                      # Serien-UID → Tage, die Einzeltermine ersetzen
+    for e in _ics_eintraege(pfad):
+        if "ersetzt" in e:
+            ausnahmen.setdefault(e["uid"], set()).add(e["ersetzt"])
+            e["uid"] = f"{e['uid']}/{e.pop('ersetzt')}"
+        e.setdefault("status", None)
+        importiert[e["uid"]] = e
+
+    # Dann unter dem Lock in den aktuellen Stand einarbeiten
+    with json_lock:
+        daten = lade_json("kalender.json")
+        eintraege = daten["einträge"]
+        index = {e["uid"]: i for i, e in enumerate(eintraege) if e.get("uid")}
+        erstellt = start.isoformat()
+        for uid, e in importiert.items():
+            i = index.get(uid)
+            if i is None:
+                index[uid] = len(eintraege)
+                eintraege.append({"erstellt": erstellt, **e})
+                neu += 1
+            else:
+                eintraege[i] = {"erstellt": eintraege[i].get("erstellt", erstellt), **e}
+                aktualisiert += 1
+
+        for uid, tage in ausnahmen.items():
+            i = index.get(uid)
+            if i is not None:
+                eintraege[i]["exdate"] = sorted(set(eintraege[i].get("exdate", [])) | tage)
+
+        speichere_json("kalender.json", daten, indent=None)
+
+    dauer = (datetime.now() - start).total_seconds()
+    msg = f"ICS-Import: {neu} neu, {aktualisiert} aktualisiert ({dauer:.1f}s)"
+    logging.info(f"{msg} aus {pfad}")
+    sprich(f"Kalender importiert: {neu} neu, {aktualisiert} aktualisiert.")
+    return msg
+
+def _ics_escape(text: str) -> str:
+    return str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ics_falten(zeile: str) -> str:
+    """Zeilen > 75 Oktette umbrechen (Fortsetzung mit Leerzeichen), ohne UTF-8-Zeichen zu zerteilen"""
+    teile, aktuell, laenge = [], "", 0
+    for zeichen in zeile:
+        n = len(zeichen.encode("utf-8"))
+        if laenge + n > (75 if not teile else 74):
+            teile.append(aktuell)
+            aktuell, laenge = "", 0
+        aktuell += zeichen
+        laenge += n
+    teile.append(aktuell)
+    return "\r\n ".join(teile) + "\r\n"
+
+@tool_timeout(300)
+def kalender_exportieren(pfad: str):
+    """Schreibt alle Einträge als .ics (Wiederholungen als RRULE, nicht ausgerollt)"""
+    pfad = os.path.expanduser(pfad.strip().strip("\"'"))
+    init()
+    daten = lade_json("kalender.json")
+    stempel = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    anzahl = 0
+
+    serien = {e["uid"]: e for e in daten["einträge"] if e.get("uid") and e.get("rrule")}
+    # Tage mit geändertem Einzeltermin stehen intern im exdate (tritt_ein) – im ICS trägt sie die RECURRENCE-ID
+    ersetzt = {}
+    for e in daten["einträge"]:
+        if "/" in (e.get("uid") or ""):
+            serien_uid, tag = e["uid"].split("/", 1)
+            ersetzt.setdefault(serien_uid, set()).add(tag)
+
+    def zeit(iso: str, ganztags: bool) -> str:
+        dt = datetime.fromisoformat(iso)
+        return f";VALUE=DATE:{dt:%Y%m%d}" if ganztags else f":{dt:%Y%m%dT%H%M%S}"
+
+    def tage(liste: list, serie: dict | None) -> str:
+        """EXDATE/RECURRENCE-ID im Werttyp des DTSTART der Serie (RFC 5545) – DATE-TIME mit deren Uhrzeit"""
+        if serie is None or serie.get("ganztags") or "wann" not in serie:
+            return ";VALUE=DATE:" + ",".join(t.replace("-", "") for t in liste)
+        uhrzeit = datetime.fromisoformat(serie["wann"]).strftime("%H%M%S")
+        return ":" + ",".join(f"{t.replace('-', '')}T{uhrzeit}" for t in liste)
+
+    with open(pfad, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Pia4//Kalender//DE\r\n")
+        for e in daten["einträge"]:
+            art = "VEVENT" if "wann" in e and e.get("typ") != "todo" else "VTODO"
+            uid = e.get("uid") or "pia-" + hashlib.sha1(f"{e['titel']}|{e.get('wann')}|{e.get('erstellt')}".encode()).hexdigest()[:16] + "@pia4"
+            zeilen = [f"BEGIN:{art}", f"UID:{uid.split('/')[0]}", f"DTSTAMP:{stempel}", f"SUMMARY:{_ics_escape(e['titel'])}"]
+            if "/" in uid:                             # geänderter Einzeltermin einer Serie
+                serien_uid, tag = uid.split("/", 1)
+                zeilen.append(f"RECURRENCE-ID{tage([tag], serien.get(serien_uid))}")
+            if "wann" in e:
+                zeilen.append(f"{'DTSTART' if art == 'VEVENT' else 'DUE'}{zeit(e['wann'], e.get('ganztags'))}")
+            if e.get("ende"):
+                zeilen.append(f"DTEND{zeit(e['ende'], e.get('ganztags'))}")
+            if e.get("rrule"):
+                zeilen.append(f"RRULE:{e['rrule']}")
+            exdate = [t for t in e.get("exdate", []) if t not in ersetzt.get(e.get("uid"), ())]
+            if exdate:
+                zeilen.append(f"EXDATE{tage(exdate, e)}")
+            if e.get("ort"):
+                zeilen.append(f"LOCATION:{_ics_escape(e['ort'])}")
+            if e.get("notiz"):
+                zeilen.append(f"DESCRIPTION:{_ics_escape(e['notiz'])}")
+            if art == "VTODO" and e.get("status"):
+                zeilen.append(f"STATUS:{'COMPLETED' if e['status'] == 'erledigt' else 'NEEDS-ACTION'}")
+            zeilen.append(f"END:{art}")
+            f.write("".join(_ics_falten(z) for z in zeilen))
+            anzahl += 1
+        f.write("END:VCALENDAR\r\n")
+
+    return f"ICS-Export: {anzahl} Einträge → {pfad}"
+
+TOOL_BEISPIELE = {
+    "termine_heute": [
+        "was steht heute an",
+        "habe ich heute verabredungen",
+        "was ist heute geplant",
+        "zeig mir meinen tagesplan",
+    ],
+}
+
 def tools_holen():
     return [
         ("termin_hinzufügen", termin_hinzufügen,   "Kalender"),
         ("termine_heute",     termine_heute,       "Kalender"),
+        ("kalender_importieren", kalender_importieren, "Kalender"),
+        ("kalender_exportieren", kalender_exportieren, "Kalender"),
     ]
\ No newline at end of file
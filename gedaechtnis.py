@@ -0,0 +1,253 @@
+# gedaechtnis.py – lokaler Vektor-Index über Notizen, Kalender und Gesprächsverlauf
+# Statt mehr Verlauf in den Ollama-Prompt zu kippen (= längerer Prefill), werden nur die k ähnlichsten
+# Schnipsel innerhalb eines Token-Budgets eingefügt. Der Index wächst inkrementell: neue Texte werden
+# eingebettet und als Zeilen an eine float32-Datei angehängt, die per np.memmap gelesen wird – auch
+# tausende Einträge kosten so kaum RAM. Verlaufseinträge bleiben im Index, auch wenn kontext.json sie
+# längst gekürzt hat; gelöschte Notizen/Termine werden nur ausgeblendet. Jede Quelle hat ihre eigene
+# mtime – nach einer LLM-Antwort wird also nur der Verlauf gelesen und ergänzt. Über MAX_EINTRAEGE
+# fallen ausgeblendete und die ältesten Verlaufseinträge wieder heraus. Eingebettet wird nur im
+# Hintergrund-Thread (angestoßen von suchen(), sonst alle AKTUALISIEREN_S) – eine Frage wartet nie darauf.
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+from utils import BASE_DIR, KONFIG, lade_json, speichere_json, logging
+from intent_embeddings import EMBED_MODELL, anfrage_einbetten, einbetten
+
+VEKTOR_DATEI = BASE_DIR / "gedaechtnis_vektoren.f32"
+META_NAME = "gedaechtnis_index.json"
+QUELLEN = {"notiz": "schnellnotizen.json", "termin": "kalender.json", "verlauf": "kontext.json"}
+
+TOP_K = int(KONFIG.get("gedaechtnis_top_k", 5))
+TOKEN_BUDGET = int(KONFIG.get("gedaechtnis_token_budget", 250))
+MIN_AEHNLICHKEIT = 0.5
+ZEICHEN_PRO_TOKEN = 3.5
+BATCH = 64                     # Texte pro /api/embed-Aufruf beim (Neu-)Aufbau
+TERMIN_RUECKBLICK_TAGE = 90    # ältere einmalige Termine (z. B. aus ICS-Importen) nicht einbetten
+MAX_EINTRAEGE = int(KONFIG.get("gedaechtnis_max_eintraege", 5000))
+
+AKTUALISIEREN_S = 60           # spätestens so oft nach geänderten Quellen sehen (Hintergrund-Thread)
+
+_lock = threading.Lock()               # schützt _meta/_matrix – nur kurz gehalten
+_aktualisieren_lock = threading.Lock()  # höchstens ein Lauf, der einbettet
+_anstoss = threading.Event()
+_thread = None
+_matrix = None                 # np.memmap [n×d], nur lesend
+_meta = None
+
+
+# ──────────────────────────────
+# Quellen → Schnipsel
+# ──────────────────────────────
+def schnipsel_sammeln(quellen=tuple(QUELLEN)) -> list[tuple[str, str]]:
+    """(Quelle, Text) aus Notizen, Kalender und Verlauf – nur aus den angegebenen Quellen"""
+    schnipsel = []
+    for n in lade_json(QUELLEN["notiz"], {"notizen": []}).get("notizen", []) if "notiz" in quellen else []:
+        if n.get("text"):
+            schnipsel.append(("notiz", f"Notiz vom {n.get('zeit', '')[:10]}: {n['text']}"))
+    grenze = (datetime.now() - timedelta(days=TERMIN_RUECKBLICK_TAGE)).isoformat()
+    for e in lade_json(QUELLEN["termin"], {"einträge": []}).get("einträge", []) if "termin" in quellen else []:
+        if e.get("titel") and (e.get("rrule") or e.get("wann", grenze) >= grenze):
+            wann = f" am {e['wann'][:16].replace('T', ' ')}" if e.get("wann") else ""
+            if e.get("rrule"):
+                wann = f" ab {e['wann'][:10]} ({e['rrule']})"
+            status = f" [{e['status']}]" if e.get("status") else ""
+            schnipsel.append(("termin", f"{(e.get('typ') or 'termin').capitalize()}{wann}: {e['titel']}{status}"))
+    # Frage + Antwort als ein Schnipsel – einzeln verlieren beide ihren Sinn
+    historie = lade_json(QUELLEN["verlauf"], {"historie": []}).get("historie", []) if "verlauf" in quellen else []
+    for i, zeile in enumerate(historie):
+        if zeile.startswith("Jan:"):
+            antwort = historie[i + 1] if i + 1 < len(historie) and historie[i + 1].startswith("Pia:") else ""
+            schnipsel.append(("verlauf", f"{zeile}\n{antwort}".strip()))
+    return schnipsel
+
+
+def _schluessel(quelle: str, text: str) -> str:
+    return hashlib.sha1(f"{quelle}\t{text}".encode()).hexdigest()[:16]
+
+
+def _mtimes() -> dict:
+    stand = {}
+    for quelle, name in QUELLEN.items():
+        try:
+            stand[quelle] = os.path.getmtime(BASE_DIR / name)
+        except OSError:
+            stand[quelle] = 0.0
+    return stand
+
+
+# ──────────────────────────────
+# Index pflegen
+# ──────────────────────────────
+def _leerer_index() -> dict:
+    return {"modell": EMBED_MODELL, "dim": 0, "mtimes": {}, "eintraege": []}
+
+
+def _matrix_oeffnen(meta: dict):
+    import numpy as np
+    n, d = len(meta["eintraege"]), meta["dim"]
+    if not n or not VEKTOR_DATEI.exists() or VEKTOR_DATEI.stat().st_size < n * d * 4:
+        return None
+    return np.memmap(VEKTOR_DATEI, dtype=np.float32, mode="r", shape=(n, d))
+
+
+def _verdichten():
+    """Ausgeblendete, dann die ältesten Verlaufseinträge entfernen, bis wieder Luft bis MAX_EINTRAEGE ist.
+    Nur hier wird die Vektordatei umgeschrieben."""
+    global _matrix
+    import numpy as np
+    eintraege = _meta["eintraege"]
+    zuviel = len(eintraege) - int(MAX_EINTRAEGE * 0.9)
+    raus = set()
+    for bedingung in (lambda e: not e["aktiv"], lambda e: e["quelle"] == "verlauf"):
+        for i, e in enumerate(eintraege):
+            if len(raus) >= zuviel:
+                break
+            if i not in raus and bedingung(e):
+                raus.add(i)
+    behalten = [i for i in range(len(eintraege)) if i not in raus]
+    matrix = _matrix_oeffnen(_meta)
+    if matrix is None:
+        return
+    vektoren = np.asarray(matrix[behalten])
+    _matrix = None
+    tmp = VEKTOR_DATEI.with_suffix(".tmp")
+    vektoren.astype("float32").tofile(tmp)
+    os.replace(tmp, VEKTOR_DATEI)
+    _meta["eintraege"] = [eintraege[i] for i in behalten]
+    logging.info(f"Gedächtnis: {len(raus)} alte Einträge entfernt ({len(behalten)} übrig)")
+
+
+def _laden():
+    """Index von Platte holen (einmalig, ohne Embedding) – Aufrufer hält _lock"""
+    global _matrix, _meta
+    if _meta is not None:
+        return
+    _meta = lade_json(META_NAME, _leerer_index(), use_cache=False)
+    if _meta.get("modell") != EMBED_MODELL:
+        logging.info("Gedächtnis: Embedding-Modell gewechselt → Index wird neu aufgebaut")
+        _meta = _leerer_index()
+    _matrix = _matrix_oeffnen(_meta)
+    if _matrix is None and _meta["eintraege"]:
+        _meta = _leerer_index()                 # Vektordatei fehlt/abgeschnitten → neu
+
+
+def aktualisieren(erzwingen: bool = False) -> int:
+    """Bettet neue Schnipsel ein und blendet verschwundene Notizen/Termine aus → Anzahl neuer Einträge.
+    Ändert sich keine Quelldatei, kostet das nur drei stat()-Aufrufe; gelesen werden nur geänderte Quellen.
+    Eingebettet wird ohne _lock – suchen() arbeitet solange mit den vorhandenen Vektoren weiter."""
+    global _matrix
+    with _aktualisieren_lock:
+        with _lock:
+            _laden()
+            mtimes = _mtimes()
+            geaendert = [q for q in QUELLEN if erzwingen or mtimes[q] != _meta["mtimes"].get(q)]
+            if not geaendert:
+                return 0
+            bekannt = {e["id"]: e for e in _meta["eintraege"]}
+            n, dim = len(_meta["eintraege"]), _meta["dim"]
+
+        aktuell = {_schluessel(q, t): (q, t) for q, t in schnipsel_sammeln(geaendert)}
+        neu = [(k, q, t) for k, (q, t) in aktuell.items() if k not in bekannt]
+        for i in range(0, len(neu), BATCH):
+            teil = neu[i:i + BATCH]
+            vektoren = einbetten([t for _, _, t in teil])
+            dim = dim or int(vektoren.shape[1])
+            # Hinter den bekannten Einträgen anhängen – Reste eines abgebrochenen Laufs werden überschrieben,
+            # die offene memmap der Leser (n Zeilen) bleibt unberührt
+            with open(VEKTOR_DATEI, "r+b" if VEKTOR_DATEI.exists() else "wb") as f:
+                f.seek((n + i) * dim * 4)
+                f.write(vektoren.astype("float32").tobytes())
+                f.truncate()
+
+        with _lock:
+            # Verlauf wird nur ergänzt – kontext.json kürzt ihn, der Index behält ihn
+            for e in _meta["eintraege"]:
+                if e["quelle"] in geaendert and e["quelle"] != "verlauf":
+                    e["aktiv"] = e["id"] in aktuell
+            _meta["dim"] = dim
+            _meta["eintraege"].extend({"id": k, "quelle": q, "text": t, "aktiv": True} for k, q, t in neu)
+            if len(_meta["eintraege"]) > MAX_EINTRAEGE:
+                _verdichten()
+            _meta["mtimes"] = mtimes
+            speichere_json(META_NAME, _meta, indent=None)
+            _matrix = _matrix_oeffnen(_meta)
+            if neu:
+                logging.info(f"Gedächtnis: {len(neu)} neue Einträge eingebettet ({len(_meta['eintraege'])} gesamt)")
+            return len(neu)
+
+
+def _hintergrund():
+    while True:
+        _anstoss.wait(timeout=AKTUALISIEREN_S)
+        _anstoss.clear()
+        try:
+            aktualisieren()
+        except Exception as e:
+            logging.debug(f"Gedächtnis-Aktualisierung fehlgeschlagen: {e}")
+
+
+def anstossen():
+    """Aktualisierung im Hintergrund anfordern (kehrt sofort zurück)"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_hintergrund, name="pia-gedaechtnis", daemon=True)
+            _thread.start()
+    _anstoss.set()
+
+
+# ──────────────────────────────
+# Abfragen
+# ──────────────────────────────
+def suchen(frage: str, k: int = TOP_K, ausschliessen: set | None = None) -> list[tuple[float, str, str]]:
+    """Die k ähnlichsten aktiven Schnipsel → [(Ähnlichkeit, Quelle, Text)], beste zuerst.
+    Durchsucht nur, was schon eingebettet ist – Neues bettet der Hintergrund-Thread ein."""
+    import numpy as np
+    anstossen()
+    with _lock:
+        _laden()
+        matrix, eintraege = _matrix, list(_meta["eintraege"]) if _meta else []
+    if matrix is None:
+        return []
+    scores = np.asarray(matrix @ anfrage_einbetten(frage))
+    aktiv = np.fromiter((e["aktiv"] for e in eintraege[:len(scores)]), dtype=bool, count=len(scores))
+    scores[~aktiv] = -1.0
+    kandidaten = np.argpartition(-scores, min(len(scores) - 1, 2 * k))[:2 * k]
+    treffer = []
+    for i in sorted(kandidaten, key=lambda i: -scores[i]):
+        e = eintraege[i]
+        if scores[i] < MIN_AEHNLICHKEIT or (ausschliessen and e["text"] in ausschliessen):
+            continue
+        treffer.append((float(scores[i]), e["quelle"], e["text"]))
+        if len(treffer) >= k:
+            break
+    return treffer
+
+
+def prompt_kontext(frage: str, ausschliessen: set | None = None, budget_tokens: int = TOKEN_BUDGET) -> str:
+    """Relevante Schnipsel als Prompt-Abschnitt, höchstens budget_tokens (geschätzt) – sonst leer"""
+    try:
+        treffer = suchen(frage, ausschliessen=ausschliessen)
+    except Exception as e:
+        logging.debug(f"Gedächtnis nicht verfügbar: {e}")
+        return ""
+    zeilen, verbraucht = [], 0
+    for _, _, text in treffer:
+        kosten = int(len(text) / ZEICHEN_PRO_TOKEN) + 1
+        if verbraucht + kosten > budget_tokens:
+            continue                                    # kürzere, weniger ähnliche passen evtl. noch
+        zeilen.append("- " + text.replace("\n", " / "))
+        verbraucht += kosten
+    return "\n".join(zeilen)
+
+
+if __name__ == "__main__":
+    import sys
+    print(f"Neu eingebettet: {aktualisieren(erzwingen=True)}")
+    if len(sys.argv) > 1:
+        frage = " ".join(sys.argv[1:])
+        for score, quelle, text in suchen(frage):
+            print(f"{score:.3f}  {quelle:8} {text}")
+        print("\nPrompt-Abschnitt:\n" + prompt_kontext(frage))
@@ -0,0 +1,195 @@
+# gesundheit.py – Zustand der Backends (gTTS, Piper, Ollama, OpenWeatherMap, DuckDuckGo) + Circuit Breaker
+# Jeder Aufruf meldet Erfolg/Fehler und Dauer. Nach wiederholten Fehlern – bei Verbindungsfehlern
+# (offline, Ollama läuft nicht) sofort – geht der Kreis auf: Aufrufer nehmen direkt den Fallback, statt
+# jedes Mal erneut auf einen Timeout zu warten. Ein Hintergrund-Thread prüft offene Backends mit einer
+# leichten Sonde und schließt den Kreis wieder. Ohne Sonde darf nach der Pause ein echter Aufruf testen.
+#
+#   geschlossen → (Fehler) → offen → (Pause + Sonde ok) → geschlossen
+#                                  → (Pause, ohne Sonde) → halboffen → 1 Probeaufruf → geschlossen/offen
+
+import threading
+import time
+from contextlib import contextmanager
+from utils import logging, http_anfrage
+
+FEHLER_SCHWELLE = 3            # Fehler in Folge (Timeouts, Serverfehler), bis der Kreis aufgeht
+PAUSE_START, PAUSE_MAX = 15.0, 300.0
+SONDEN_TIMEOUT = (2.0, 3.0)
+LATENZ_GEWICHT = 0.2
+
+
+# Lokale Dateifehler (Piper-Modell fehlt, keine Rechte) sind keine Netzprobleme – sie zählen wie "sonstig"
+_DATEI_FEHLER = (FileNotFoundError, PermissionError, IsADirectoryError, NotADirectoryError)
+
+
+def _status(x: BaseException):
+    # requests/httpx: e.response.status_code, gTTSError: e.rsp, manche Clients: e.status_code
+    antwort = getattr(x, "response", None) or getattr(x, "rsp", None)
+    return getattr(antwort, "status_code", None) or getattr(x, "status_code", None)
+
+
+def fehlerart(e: BaseException) -> str:
+    """client (4xx – Backend erreichbar), server (5xx), timeout, verbindung (offline/abgelehnt) oder sonstig"""
+    kette, x = [], e
+    while x is not None and len(kette) < 5:       # gTTSError & Co. verpacken den eigentlichen Netzfehler
+        kette.append(x)
+        x = x.__cause__ or x.__context__
+    # Eine HTTP-Antwort irgendwo in der Kette sticht alles andere: das Backend war erreichbar
+    for x in kette:
+        status = _status(x)
+        if isinstance(status, int) and status >= 400:
+            return "client" if status < 500 else "server"
+    namen = {k.__name__ for x in kette for k in type(x).__mro__}
+    if any("Timeout" in n for n in namen):
+        return "timeout"
+    if any(isinstance(x, OSError) and not isinstance(x, _DATEI_FEHLER) for x in kette) \
+            or namen & {"ConnectionError", "ConnectError", "NameResolutionError", "MaxRetryError"}:
+        return "verbindung"
+    return "sonstig"
+
+
+class Backend:
+    def __init__(self, name, sonde=None, schwelle=FEHLER_SCHWELLE):
+        self.name = name
+        self.sonde = sonde
+        self.schwelle = schwelle
+        self.zustand = "geschlossen"
+        self.erfolge = 0
+        self.fehler = 0
+        self.in_folge = 0
+        self.uebersprungen = 0                  # Aufrufe, die dank offenem Kreis sofort zum Fallback gingen
+        self.latenz_ms = None
+        self.letzter_fehler = ""
+        self.offen_seit = 0.0
+        self.pause = PAUSE_START
+        self.probe_laeuft = False
+
+
+class Gesundheit:
+    def __init__(self):
+        self._backends = {}
+        self._lock = threading.Lock()
+        self._waechter = None
+
+    def registrieren(self, name, sonde=None, schwelle=FEHLER_SCHWELLE):
+        """sonde() → True, wenn das Backend wieder erreichbar ist (läuft im Hintergrund-Thread)"""
+        with self._lock:
+            self._backends.setdefault(name, Backend(name, sonde, schwelle))
+            if self._waechter is None:
+                self._waechter = threading.Thread(target=self._waechter_schleife, name="pia-gesundheit", daemon=True)
+                self._waechter.start()
+
+    # ──────────────────────────────
+    # Abfragen / Melden
+    # ──────────────────────────────
+    def verfuegbar(self, name) -> bool:
+        """False = Kreis offen → sofort den Fallback nehmen"""
+        b = self._backends.get(name)
+        if b is None:
+            return True
+        with self._lock:
+            if b.zustand == "geschlossen":
+                return True
+            if b.zustand == "halboffen" and not b.probe_laeuft:
+                b.probe_laeuft = True               # genau ein Probeaufruf
+                return True
+            b.uebersprungen += 1
+            return False
+
+    def erfolg(self, name, dauer_ms: float | None = None):
+        b = self._backends.get(name)
+        if b is None:
+            return
+        with self._lock:
+            b.erfolge += 1
+            b.in_folge = 0
+            if dauer_ms is not None:
+                b.latenz_ms = dauer_ms if b.latenz_ms is None else b.latenz_ms + LATENZ_GEWICHT * (dauer_ms - b.latenz_ms)
+            if b.zustand != "geschlossen":
+                logging.info(f"Backend {name} wieder erreichbar → Kreis geschlossen")
+            b.zustand, b.pause, b.probe_laeuft = "geschlossen", PAUSE_START, False
+
+    def fehler(self, name, e: BaseException | str, dauer_ms: float | None = None):
+        b = self._backends.get(name)
+        if b is None:
+            return
+        art = fehlerart(e) if isinstance(e, BaseException) else "sonstig"
+        if art == "client":                         # Backend hat geantwortet – unser Problem, nicht seins
+            self.erfolg(name, dauer_ms)
+            return
+        with self._lock:
+            b.fehler += 1
+            b.in_folge += 1
+            b.letzter_fehler = f"{art}: {e}"[:160]
+            if b.zustand == "halboffen" or (b.zustand == "geschlossen" and (art == "verbindung" or b.in_folge >= b.schwelle)):
+                if b.zustand == "halboffen":
+                    b.pause = min(PAUSE_MAX, b.pause * 2)
+                b.zustand, b.offen_seit, b.probe_laeuft = "offen", time.monotonic(), False
+                logging.warning(f"Backend {name} nicht erreichbar ({art}) → Kreis offen, Fallback für {b.pause:.0f}s")
+
+    @contextmanager
+    def messen(self, name):
+        """with GESUNDHEIT.messen("gtts"): … – Exception = Fehler (wird weitergereicht), sonst Erfolg"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.fehler(name, e, (time.perf_counter() - start) * 1000)
+            raise
+        self.erfolg(name, (time.perf_counter() - start) * 1000)
+
+    # ──────────────────────────────
+    # Sonden im Hintergrund
+    # ──────────────────────────────
+    def _waechter_schleife(self):
+        while True:
+            time.sleep(1.0)
+            jetzt = time.monotonic()
+            for b in list(self._backends.values()):
+                if b.zustand != "offen" or jetzt - b.offen_seit < b.pause:
+                    continue
+                if b.sonde is None:
+                    with self._lock:
+                        b.zustand = "halboffen"
+                    continue
+                try:
+                    ok = bool(b.sonde())
+                except Exception:
+                    ok = False
+                if ok:
+                    self.erfolg(b.name)
+                else:
+                    with self._lock:
+                        b.offen_seit = time.monotonic()
+                        b.pause = min(PAUSE_MAX, b.pause * 2)
+
+    # ──────────────────────────────
+    # Übersicht ("dienste")
+    # ──────────────────────────────
+    def uebersicht(self) -> str:
+        zeilen = []
+        with self._lock:
+            for b in self._backends.values():
+                latenz = f"Ø {b.latenz_ms:.0f} ms" if b.latenz_ms is not None else "–"
+                zeile = (f"{b.name:15} {b.zustand:11} {b.erfolge} ok / {b.fehler} Fehler, {latenz}"
+                         f"{f', {b.uebersprungen}× direkt zum Fallback' if b.uebersprungen else ''}")
+                if b.zustand != "geschlossen" and b.letzter_fehler:
+                    zeile += f"\n  zuletzt: {b.letzter_fehler}"
+                zeilen.append(zeile)
+        return "\n".join(zeilen) or "Keine Backends registriert."
+
+
+def _http_sonde(url: str):
+    """Erreichbar = irgendeine HTTP-Antwort (auch 4xx) innerhalb von SONDEN_TIMEOUT"""
+    def sonde():
+        return http_anfrage("HEAD", url, timeout=SONDEN_TIMEOUT, allow_redirects=False).status_code < 500
+    return sonde
+
+
+GESUNDHEIT = Gesundheit()
+
+GESUNDHEIT.registrieren("gtts", _http_sonde("https://translate.google.com"))
+GESUNDHEIT.registrieren("piper")
+GESUNDHEIT.registrieren("ollama", _http_sonde("http://localhost:11434/api/version"))
+GESUNDHEIT.registrieren("openweathermap", _http_sonde("https://api.openweathermap.org"))
+GESUNDHEIT.registrieren("duckduckgo", _http_sonde("https://html.duckduckgo.com/html/"))
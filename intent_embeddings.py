@@ -0,0 +1,147 @@
+# intent_embeddings.py – Mittelstufe zwischen Schlüsselwörtern und Ollama-Chat
+# Beschreibungen + Beispielsätze (TOOL_BEISPIELE) aller *_tools.py werden einmal eingebettet und als
+# NumPy-Matrix gecacht (Schlüssel: Hash über Modell + Texte). Ein Befehl wird per Kosinus-Ähnlichkeit
+# einem Tool zugeordnet – nur echte offene Fragen landen noch beim Chat-Modell.
+
+import ast
+import functools
+import hashlib
+import threading
+from utils import BASE_DIR, KONFIG, logging, http_anfrage
+
+EMBED_MODELL = KONFIG.get("embedding_modell", "nomic-embed-text")
+OLLAMA_URL = "http://localhost:11434"
+CACHE_DATEI = BASE_DIR / "intent_vektoren.npz"
+
+MIN_AEHNLICHKEIT = 0.72        # darunter: offene Frage → Chat-Modell
+MIN_ABSTAND = 0.04             # Vorsprung vor dem zweitbesten Tool, sonst zu unsicher
+
+_lock = threading.Lock()
+_index = None                  # (matrix [n×d] normiert, labels [n])
+_deaktiviert = False
+
+
+def einbetten(texte: list[str], modell: str = EMBED_MODELL):
+    """Embeddings über Ollamas /api/embed (gemeinsame HTTP-Session), als normierte float32-Matrix"""
+    import numpy as np
+    from gesundheit import GESUNDHEIT
+    if not GESUNDHEIT.verfuegbar("ollama"):
+        raise ConnectionError("Ollama nicht erreichbar (Kreis offen)")
+    with GESUNDHEIT.messen("ollama"):
+        r = http_anfrage("POST", f"{OLLAMA_URL}/api/embed", json={"model": modell, "input": texte}, timeout=(3.05, 60))
+        r.raise_for_status()
+    m = np.asarray(r.json()["embeddings"], dtype=np.float32)
+    m /= np.linalg.norm(m, axis=1, keepdims=True) + 1e-9
+    return m
+
+
+@functools.lru_cache(maxsize=64)
+def anfrage_einbetten(text: str):
+    """Einzelner Anfragetext – gecacht, weil Routing, Vorhersage und Gedächtnis denselben Satz einbetten"""
+    vektor = einbetten([text])[0]
+    vektor.setflags(write=False)
+    return vektor
+
+
+def korpus_sammeln() -> list[tuple[str, str]]:
+    """(Toolname, Text) aus allen *_tools.py – per AST gelesen, ohne die Module zu importieren"""
+    korpus = []
+    for pfad in sorted(BASE_DIR.glob("*_tools.py")):
+        try:
+            baum = ast.parse(pfad.read_text(encoding="utf-8"))
+        except (OSError, SyntaxError):
+            continue
+        beispiele, docs = {}, {}
+        for knoten in baum.body:
+            if isinstance(knoten, ast.Assign) and any(getattr(t, "id", None) == "TOOL_BEISPIELE" for t in knoten.targets):
+                try:
+                    beispiele = ast.literal_eval(knoten.value)
+                except ValueError:
+                    logging.warning(f"TOOL_BEISPIELE in {pfad.name} ist kein Literal")
+            elif isinstance(knoten, ast.FunctionDef):
+                docs[knoten.name] = ast.get_docstring(knoten)
+        for tool, saetze in beispiele.items():
+            if docs.get(tool):
+                korpus.append((tool, docs[tool].splitlines()[0]))
+            korpus.extend((tool, s) for s in saetze)
+    return korpus
+
+
+def index_laden():
+    """Lädt die Matrix aus dem Cache oder bettet den Korpus neu ein (nur wenn sich Texte/Modell geändert haben)"""
+    global _index, _deaktiviert
+    with _lock:
+        if _index is not None or _deaktiviert:
+            return _index
+        try:
+            import numpy as np
+        except ImportError:
+            logging.info("NumPy fehlt → Intent-Embeddings deaktiviert")
+            _deaktiviert = True
+            return None
+
+        korpus = korpus_sammeln()
+        if not korpus:
+            _deaktiviert = True
+            return None
+        labels = [tool for tool, _ in korpus]
+        texte = [text for _, text in korpus]
+        schluessel = hashlib.sha256("\n".join([EMBED_MODELL] + [f"{l}\t{t}" for l, t in korpus]).encode()).hexdigest()
+
+        if CACHE_DATEI.exists():
+            try:
+                with np.load(CACHE_DATEI) as daten:
+                    if str(daten["hash"]) == schluessel:
+                        _index = (daten["matrix"], labels)
+                        logging.info(f"Intent-Embeddings aus Cache: {len(labels)} Sätze")
+                        return _index
+            except Exception as e:
+                logging.warning(f"Intent-Cache unlesbar: {e}")
+
+        try:
+            matrix = einbetten(texte)
+        except Exception as e:
+            # Ollama/Modell nicht da → später erneut versuchen, bis dahin ohne Mittelstufe
+            logging.warning(f"Intent-Embeddings nicht verfügbar: {e}")
+            return None
+
+        np.savez(CACHE_DATEI, matrix=matrix, hash=np.array(schluessel))
+        _index = (matrix, labels)
+        logging.info(f"Intent-Embeddings neu berechnet: {len(labels)} Sätze, dim={matrix.shape[1]}")
+        return _index
+
+
+def intent_klassifizieren(text: str) -> tuple[str, float] | None:
+    """Bestes Tool + Ähnlichkeit, oder None, wenn es eher eine offene Frage ist"""
+    index = index_laden()
+    if index is None:
+        return None
+    matrix, labels = index
+
+    try:
+        q = anfrage_einbetten(text)
+    except Exception as e:
+        logging.debug(f"Embedding für Anfrage fehlgeschlagen: {e}")
+        return None
+
+    scores = matrix @ q
+    bestes = {}
+    for label, score in zip(labels, scores.tolist()):
+        if score > bestes.get(label, -1.0):
+            bestes[label] = score
+    rangliste = sorted(bestes.items(), key=lambda x: x[1], reverse=True)
+
+    tool, score = rangliste[0]
+    zweit = rangliste[1][1] if len(rangliste) > 1 else -1.0
+    logging.debug(f"Intent-Embedding: {tool} {score:.3f} (2. {zweit:.3f})")
+    if score < MIN_AEHNLICHKEIT or score - zweit < MIN_ABSTAND:
+        return None
+    return tool, score
+
+
+if __name__ == "__main__":
+    import sys
+    for tool, text in korpus_sammeln():
+        print(f"{tool:20} {text}")
+    if len(sys.argv) > 1:
+        print(intent_klassifizieren(" ".join(sys.argv[1:])))
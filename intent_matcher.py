@@ -0,0 +1,168 @@
+# intent_matcher.py – tippfehler- und hörfehlertolerante Erkennung von Befehlswörtern
+# "wetta berlin" → "wetter berlin", "termiene heute" → "termine heute"
+# Vorberechneter BK-Baum über phonetisch normalisierte Schlüsselwörter + begrenzte Editierdistanz.
+
+import re
+import threading
+
+MIN_WORTLAENGE = 4          # kürzere Wörter werden nie korrigiert (zu viele Zufallstreffer)
+LANGES_WORT = 6             # ab hier reicht MIN_KONFIDENZ ...
+MIN_KONFIDENZ = 0.75        # 1 - distanz / wortlänge
+KURZ_KONFIDENZ = 0.85       # ... darunter nur gleiche Lautform oder Distanz 1 mit hoher Konfidenz
+
+# Häufige Wörter, die zufällig nah an einem Befehlswort liegen ("weiter" ~ "wetter")
+NICHT_KORRIGIEREN = {
+    "weiter", "leiter", "heiter", "heute", "seite", "bitte", "mitte", "wieder", "immer",
+    "zeige", "zeig", "später", "sicher", "sucht", "suchen", "leise", "lasst", "lieber",
+    "ende", "eine", "einen", "keine", "meine", "deine", "neue", "neues", "notiere",
+}
+
+# Alltagssätze, die durch die Korrektur nicht verändert werden dürfen (python intent_matcher.py prüft sie)
+ALLTAGSSAETZE = [
+    "gute nacht pia", "meine mutter hat geburtstag", "wie groß ist die stadt kassel",
+    "die ente schwimmt im teich", "seit wann gibt es das", "wie weit ist es bis kassel",
+    "darum geht es nicht", "wie ist die lage", "das ist eine gute sache", "guten morgen",
+    "danke dir", "mach weiter", "erzähl mir einen witz", "wer ist der bundeskanzler",
+    "wie geht es dir", "was ist ein leiter", "die butter ist alle", "ich habe hunger",
+    "meine seite lädt nicht", "sie hat recht", "zeit für eine pause", "warte kurz",
+]
+
+_SPRECH_REGELN = [
+    (re.compile(r"ä"), "e"), (re.compile(r"ö"), "o"), (re.compile(r"ü"), "u"), (re.compile(r"ß"), "s"),
+    (re.compile(r"ie"), "i"), (re.compile(r"th"), "t"), (re.compile(r"ph"), "f"), (re.compile(r"dt"), "t"),
+    (re.compile(r"er\b"), "a"), (re.compile(r"(.)\1+"), r"\1"),
+]
+
+
+def sprech_schluessel(wort: str) -> str:
+    """Grobe Lautform: Umlaute, ie/i, th/t, -er/-a ("wetta"), Doppelkonsonanten"""
+    for muster, ersatz in _SPRECH_REGELN:
+        wort = muster.sub(ersatz, wort)
+    return wort
+
+
+def levenshtein(a: str, b: str, grenze: int | None = None) -> int:
+    """Editierdistanz, bricht ab, sobald 'grenze' sicher überschritten ist"""
+    if abs(len(a) - len(b)) > (grenze if grenze is not None else len(a) + len(b)):
+        return (grenze or 0) + 1
+    vorher = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        aktuell = [i]
+        for j, cb in enumerate(b, 1):
+            aktuell.append(min(vorher[j] + 1, aktuell[j - 1] + 1, vorher[j - 1] + (ca != cb)))
+        if grenze is not None and min(aktuell) > grenze:
+            return grenze + 1
+        vorher = aktuell
+    return vorher[-1]
+
+
+class BKBaum:
+    """Burkhard-Keller-Baum: Suche aller Wörter mit Distanz ≤ d ohne Vollvergleich"""
+
+    def __init__(self, woerter=()):
+        self._wurzel = None
+        for w in woerter:
+            self.einfuegen(w)
+
+    def einfuegen(self, wort: str):
+        if self._wurzel is None:
+            self._wurzel = (wort, {})
+            return
+        knoten = self._wurzel
+        while True:
+            d = levenshtein(wort, knoten[0])
+            if d == 0:
+                return
+            if d not in knoten[1]:
+                knoten[1][d] = (wort, {})
+                return
+            knoten = knoten[1][d]
+
+    def suchen(self, wort: str, max_distanz: int) -> list[tuple[int, str]]:
+        if self._wurzel is None:
+            return []
+        treffer, stapel = [], [self._wurzel]
+        while stapel:
+            kandidat, kinder = stapel.pop()
+            d = levenshtein(wort, kandidat)
+            if d <= max_distanz:
+                treffer.append((d, kandidat))
+            for k_d, kind in kinder.items():
+                if d - max_distanz <= k_d <= d + max_distanz:
+                    stapel.append(kind)
+        return sorted(treffer)
+
+
+class KeywordKorrektur:
+    """Korrigiert einzelne Wörter eines Befehls auf das nächstliegende Befehlswort"""
+
+    def __init__(self, keywords):
+        self.woerter = set()
+        for kw in keywords:
+            self.woerter.update(w for w in kw.split() if len(w) >= MIN_WORTLAENGE)
+        # Lautform → Original (bei Kollision gewinnt das kürzere, damit es deterministisch bleibt)
+        self._original = {}
+        for w in sorted(self.woerter, key=lambda x: (len(x), x)):
+            self._original.setdefault(sprech_schluessel(w), w)
+        self._baum = BKBaum(self._original)
+        self._lock = threading.Lock()
+        self.korrigiert = 0
+        self.llm_vermieden = 0
+
+    @staticmethod
+    def max_distanz(wort: str) -> int:
+        return 1 if len(wort) <= 6 else 2
+
+    def wort_korrigieren(self, wort: str) -> tuple[str, float] | None:
+        """Nächstes Befehlswort oder None. Kurze Wörter nur bei gleicher Lautform ("wetta") oder
+        Distanz 1 mit hoher Konfidenz – sonst wird aus "gute" schnell "mute"."""
+        if len(wort) < MIN_WORTLAENGE or wort in self.woerter or wort in NICHT_KORRIGIEREN or not wort.isalpha():
+            return None
+        schluessel = sprech_schluessel(wort)
+        treffer = self._baum.suchen(schluessel, self.max_distanz(wort))
+        if not treffer:
+            return None
+        d, bester = treffer[0]
+        # Mehrdeutig (zwei Befehlswörter gleich nah) → lieber nichts raten
+        if len(treffer) > 1 and treffer[1][0] == d:
+            return None
+        konfidenz = 1 - d / max(len(schluessel), len(bester))
+        lang_genug = len(wort) >= LANGES_WORT and konfidenz >= MIN_KONFIDENZ
+        if not (lang_genug or (d <= 1 and konfidenz >= KURZ_KONFIDENZ)):
+            return None
+        return self._original[bester], konfidenz
+
+    def korrigieren(self, text: str, trenner: re.Pattern | None = None) -> tuple[str, list]:
+        """Korrigiert nur das führende Wort – bei Angabe von trenner das jedes Teilbefehls.
+        Liefert (korrigierter Text, [(alt, neu, konfidenz), ...])"""
+        stuecke = re.split(f"({trenner.pattern})", text) if trenner else [text]
+        aenderungen = []
+        for i in range(0, len(stuecke), 2):          # ungerade Indizes sind die Trenner selbst
+            woerter = stuecke[i].split()
+            ergebnis = self.wort_korrigieren(woerter[0]) if woerter else None
+            if ergebnis:
+                aenderungen.append((woerter[0], ergebnis[0], round(ergebnis[1], 2)))
+                stuecke[i] = " ".join([ergebnis[0]] + woerter[1:])
+        return "".join(stuecke), aenderungen
+
+    def zaehlen(self, llm_vermieden: bool):
+        with self._lock:
+            self.korrigiert += 1
+            if llm_vermieden:
+                self.llm_vermieden += 1
+            return self.llm_vermieden
+
+
+if __name__ == "__main__":
+    import sys
+    kk = KeywordKorrektur(["wetter", "termin", "termine", "notiz", "suche", "backup", "screenshot", "lauter", "leiser"])
+    for satz in ["wetta berlin", "termiene heute", "mach weiter", "notitz milch", "screnshot", "bakup machen"]:
+        print(f"{satz:20} → {kk.korrigieren(satz)}")
+
+    # Regression mit den echten Befehlswörtern: Alltagssätze bleiben unverändert
+    from assistant_core import schluesselwoerter_korrigieren
+    fehler = [(s, k) for s in ALLTAGSSAETZE if (k := schluesselwoerter_korrigieren(s)) != s]
+    for satz, korrigiert in fehler:
+        print(f"FEHLER: '{satz}' → '{korrigiert}'")
+    print(f"Alltagssätze: {len(ALLTAGSSAETZE) - len(fehler)}/{len(ALLTAGSSAETZE)} unverändert")
+    sys.exit(1 if fehler else 0)
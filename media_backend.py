@@ -0,0 +1,289 @@
+# media_backend.py – Medien- und Lautstärkesteuerung ohne Shell
+# MPRIS über eine dauerhafte D-Bus-Verbindung (jeepney), Lautstärke über PulseAudio/PipeWire (pulsectl).
+# Ohne Bus bzw. Pulse-Verbindung: argv-Aufrufe von playerctl / pactl (kein shell=True).
+
+import subprocess
+import threading
+from utils import logging
+
+MPRIS_PREFIX = "org.mpris.MediaPlayer2."
+MPRIS_PFAD = "/org/mpris/MediaPlayer2"
+MPRIS_PLAYER = "org.mpris.MediaPlayer2.Player"
+
+# playerctl-Aktionsname → MPRIS-Methode
+MPRIS_METHODEN = {
+    "play":       "Play",
+    "pause":      "Pause",
+    "play-pause": "PlayPause",
+    "next":       "Next",
+    "previous":   "Previous",
+    "stop":       "Stop",
+}
+
+
+def _argv(befehl: list, timeout: float = 5) -> bool:
+    """Fallback: Prozess direkt starten, ohne Shell"""
+    try:
+        r = subprocess.run(befehl, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout, check=False)
+        return r.returncode == 0
+    except Exception as e:
+        logging.error(f"Befehl fehlgeschlagen: {befehl} → {e}")
+        return False
+
+
+# ────────────────────────────────────────────────
+# MPRIS (D-Bus)
+# ────────────────────────────────────────────────
+class MprisSteuerung:
+    """Hält eine Session-Bus-Verbindung offen und steuert den aktiven MPRIS-Player.
+    bus_adresse erlaubt z. B. einen eigenen Test-Bus (dbus-daemon --session --print-address)."""
+
+    def __init__(self, bus_adresse: str = "SESSION"):
+        self.bus_adresse = bus_adresse
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _verbindung(self):
+        if self._conn is None:
+            from jeepney.io.blocking import open_dbus_connection
+            self._conn = open_dbus_connection(bus=self.bus_adresse)
+        return self._conn
+
+    def _schliessen(self):
+        try:
+            if self._conn is not None:
+                self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def _rufen(self, msg, timeout: float = 2):
+        from jeepney.wrappers import unwrap_msg
+        try:
+            return unwrap_msg(self._verbindung().send_and_get_reply(msg, timeout=timeout))
+        except (OSError, ConnectionError, TimeoutError):
+            # Bus weg (z. B. Neustart der Sitzung) → einmal neu verbinden
+            self._schliessen()
+            return unwrap_msg(self._verbindung().send_and_get_reply(msg, timeout=timeout))
+
+    def player(self) -> list[str]:
+        from jeepney import message_bus
+        (namen,) = self._rufen(message_bus.ListNames())
+        return sorted(n for n in namen if n.startswith(MPRIS_PREFIX))
+
+    def _eigenschaft(self, player: str, name: str):
+        from jeepney import DBusAddress, Properties
+        adr = DBusAddress(MPRIS_PFAD, bus_name=player, interface=MPRIS_PLAYER)
+        ((_, wert),) = self._rufen(Properties(adr).get(name))
+        return wert
+
+    def aktiver_player(self) -> str | None:
+        """Spielender Player bevorzugt, sonst der erste gefundene"""
+        player = self.player()
+        for p in player:
+            try:
+                if self._eigenschaft(p, "PlaybackStatus") == "Playing":
+                    return p
+            except Exception:
+                continue
+        return player[0] if player else None
+
+    def aktion(self, aktion: str) -> bool:
+        from jeepney import DBusAddress, new_method_call
+        methode = MPRIS_METHODEN[aktion]
+        with self._lock:
+            player = self.aktiver_player()
+            if not player:
+                return False
+            adr = DBusAddress(MPRIS_PFAD, bus_name=player, interface=MPRIS_PLAYER)
+            self._rufen(new_method_call(adr, methode))
+            return True
+
+    def lautstaerke(self, delta: float | None = None, absolut: float | None = None) -> float | None:
+        """Player-Lautstärke (0.0–1.0) relativ oder absolut setzen, liefert den neuen Wert"""
+        from jeepney import DBusAddress, Properties
+        with self._lock:
+            player = self.aktiver_player()
+            if not player:
+                return None
+            wert = absolut if absolut is not None else self._eigenschaft(player, "Volume") + (delta or 0)
+            wert = max(0.0, min(1.5, wert))
+            adr = DBusAddress(MPRIS_PFAD, bus_name=player, interface=MPRIS_PLAYER)
+            self._rufen(Properties(adr).set("Volume", "d", wert))
+            return wert
+
+
+# ────────────────────────────────────────────────
+# PulseAudio / PipeWire (pulse-Protokoll)
+# ────────────────────────────────────────────────
+class PulseSteuerung:
+    """Dauerhafte Verbindung zum Sound-Server – ein Lautstärkeschritt ist ein einzelner Socket-Roundtrip"""
+
+    def __init__(self):
+        self._pulse = None
+        self._lock = threading.Lock()
+
+    def _verbindung(self):
+        if self._pulse is None:
+            import pulsectl
+            self._pulse = pulsectl.Pulse("pia4")
+        return self._pulse
+
+    def _standard_sink(self):
+        pulse = self._verbindung()
+        return pulse.get_sink_by_name(pulse.server_info().default_sink_name)
+
+    def _mit_neuverbindung(self, func):
+        with self._lock:
+            try:
+                return func()
+            except Exception:
+                # Sound-Server neu gestartet → Verbindung einmal erneuern
+                try:
+                    if self._pulse is not None:
+                        self._pulse.close()
+                except Exception:
+                    pass
+                self._pulse = None
+                return func()
+
+    def lautstaerke_aendern(self, delta: float) -> float:
+        def aendern():
+            sink = self._standard_sink()
+            self._pulse.volume_change_all_chans(sink, delta)
+            return self._standard_sink().volume.value_flat
+        return self._mit_neuverbindung(aendern)
+
+    def stumm_umschalten(self) -> bool:
+        def umschalten():
+            sink = self._standard_sink()
+            self._pulse.mute(sink, not sink.mute)
+            return not sink.mute
+        return self._mit_neuverbindung(umschalten)
+
+
+# ────────────────────────────────────────────────
+# Fassade mit argv-Fallback
+# ────────────────────────────────────────────────
+class MedienBackend:
+    def __init__(self, bus_adresse: str = "SESSION"):
+        self.mpris = MprisSteuerung(bus_adresse)
+        self.pulse = PulseSteuerung()
+
+    def player_aktion(self, aktion: str) -> bool:
+        try:
+            if self.mpris.aktion(aktion):
+                return True
+        except Exception as e:
+            logging.debug(f"MPRIS nicht erreichbar ({e}) → playerctl")
+        return _argv(["playerctl", aktion])
+
+    def player_lautstaerke(self, delta: float | None = None, absolut: float | None = None) -> bool:
+        try:
+            if self.mpris.lautstaerke(delta=delta, absolut=absolut) is not None:
+                return True
+        except Exception as e:
+            logging.debug(f"MPRIS-Lautstärke nicht erreichbar ({e}) → playerctl")
+        if absolut is not None:
+            return _argv(["playerctl", "volume", f"{absolut:.2f}"])
+        return _argv(["playerctl", "volume", f"{abs(delta):.2f}{'+' if delta >= 0 else '-'}"])
+
+    def system_lautstaerke(self, delta_prozent: int) -> bool:
+        try:
+            self.pulse.lautstaerke_aendern(delta_prozent / 100)
+            return True
+        except Exception as e:
+            logging.debug(f"Pulse nicht erreichbar ({e}) → pactl")
+        return _argv(["pactl", "set-sink-volume", "@DEFAULT_SINK@", f"{delta_prozent:+d}%"])
+
+    def system_stumm(self) -> bool:
+        try:
+            self.pulse.stumm_umschalten()
+            return True
+        except Exception as e:
+            logging.debug(f"Pulse nicht erreichbar ({e}) → pactl")
+        return _argv(["pactl", "set-sink-mute", "@DEFAULT_SINK@", "toggle"])
+
+
+MEDIEN = MedienBackend()
+
+
+# ────────────────────────────────────────────────
+# Fake-MPRIS-Player zum Testen auf einem lokalen Session-Bus
+#   dbus-daemon --session --print-address --fork   → Adresse merken
+#   python media_backend.py --fake-player <adresse>
+# ────────────────────────────────────────────────
+def fake_player(bus_adresse: str = "SESSION", name: str = "pia_fake", bereit: threading.Event | None = None,
+                stopp: threading.Event | None = None, aufrufe: list | None = None):
+    """Minimaler MPRIS-Player: protokolliert Methodenaufrufe in 'aufrufe', kennt PlaybackStatus und Volume"""
+    from jeepney import HeaderFields, MessageType, new_method_return, new_error, message_bus
+    from jeepney.io.blocking import open_dbus_connection
+
+    zustand = {"PlaybackStatus": ("s", "Paused"), "Volume": ("d", 0.5)}
+    aufrufe = aufrufe if aufrufe is not None else []
+
+    conn = open_dbus_connection(bus=bus_adresse)
+    conn.send_and_get_reply(message_bus.RequestName(MPRIS_PREFIX + name))
+    if bereit:
+        bereit.set()
+
+    while not (stopp and stopp.is_set()):
+        try:
+            msg = conn.receive(timeout=0.2)
+        except TimeoutError:
+            continue
+        h = msg.header
+        if h.message_type != MessageType.method_call:
+            continue
+        iface = h.fields.get(HeaderFields.interface)
+        methode = h.fields.get(HeaderFields.member)
+
+        if iface == MPRIS_PLAYER and methode in MPRIS_METHODEN.values():
+            aufrufe.append(methode)
+            if methode in ("Play", "PlayPause"):
+                zustand["PlaybackStatus"] = ("s", "Playing")
+            elif methode in ("Pause", "Stop"):
+                zustand["PlaybackStatus"] = ("s", "Paused" if methode == "Pause" else "Stopped")
+            conn.send(new_method_return(msg))
+        elif iface == "org.freedesktop.DBus.Properties" and methode == "Get":
+            _, prop = msg.body
+            if prop in zustand:
+                conn.send(new_method_return(msg, "v", (zustand[prop],)))
+            else:
+                conn.send(new_error(msg, "org.freedesktop.DBus.Error.UnknownProperty"))
+        elif iface == "org.freedesktop.DBus.Properties" and methode == "Set":
+            _, prop, wert = msg.body
+            zustand[prop] = wert
+            aufrufe.append(f"Set {prop}={wert[1]}")
+            conn.send(new_method_return(msg))
+        else:
+            conn.send(new_error(msg, "org.freedesktop.DBus.Error.UnknownMethod"))
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "--fake-player":
+        adresse = sys.argv[2] if len(sys.argv) > 2 else "SESSION"
+        print(f"Fake-MPRIS-Player läuft auf {adresse} – Ctrl+C zum Beenden")
+        fake_player(adresse, aufrufe=None)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "--selbsttest":
+        # Fake-Player im Thread + Steuerung über denselben (Test-)Bus
+        adresse = sys.argv[2] if len(sys.argv) > 2 else "SESSION"
+        bereit, stopp, aufrufe = threading.Event(), threading.Event(), []
+        t = threading.Thread(target=fake_player, args=(adresse,), daemon=True,
+                             kwargs=dict(bereit=bereit, stopp=stopp, aufrufe=aufrufe))
+        t.start()
+        bereit.wait(5)
+        backend = MedienBackend(adresse)
+        print("Player:", backend.mpris.player())
+        for aktion in ("play", "next", "pause"):
+            print(aktion, "→", backend.player_aktion(aktion))
+        print("lauter →", backend.player_lautstaerke(delta=0.07))
+        stopp.set()
+        t.join(2)
+        print("Aufrufe am Fake-Player:", aufrufe)
+    else:
+        print("Player:", MEDIEN.mpris.player())
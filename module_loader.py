@@ -1,18 +1,16 @@
 import os
+import importlib
 import importlib.util
 import logging
+import select
+import struct
 import sys
+import threading
+import time
 import traceback
 
-# Logging einrichten (sowohl Datei als auch Konsole)
-logging.basicConfig(
-    level=logging.DEBUG,  # ← mehr Details als INFO
-    format='%(asctime)s | %(levelname)-7s | %(message)s',
-    handlers=[
-        logging.FileHandler("module_loader_debug.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Logging kommt zentral aus utils (Queue + rotierende pia4.log) – Debug-Details mit PIA4_LOG_LEVEL=DEBUG
+import utils  # noqa: F401
 
 # ANSI-Farben für bessere Lesbarkeit (optional)
 class bcolors:
@@ -53,15 +51,11 @@ def alle_tools_laden(debug=True):
         logging.debug(f"Gefunden: {datei} → {modul_pfad}")
 
         try:
-            spec = importlib.util.spec_from_file_location(modul_name, modul_pfad)
-            if spec is None:
-                cprint(bcolors.FAIL, f"  → Spec konnte nicht erstellt werden: {modul_name}")
-                logging.error(f"Spec konnte nicht erstellt werden: {modul_name}")
-                fehlerhafte_module += 1
-                continue
-
-            modul = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(modul)
+            # Regulärer Import (sys.modules): assistant_core ("from weather_tools import …"), parallele
+            # Start-Threads und Loader teilen sich so dieselbe Modulinstanz – Importsperre inklusive
+            if aktuelles_verzeichnis not in sys.path:
+                sys.path.insert(0, aktuelles_verzeichnis)
+            modul = importlib.import_module(modul_name)
 
             if hasattr(modul, "tools_holen"):
                 try:
@@ -72,6 +66,7 @@ def alle_tools_laden(debug=True):
                         continue
 
                     tools.extend(modul_tools)
+                    _registrieren(modul_name, modul_tools)
                     geladene_module += 1
                     anzahl = len(modul_tools)
                     cprint(bcolors.OKGREEN, f"  → Erfolgreich geladen: {modul_name}  ({anzahl} Tools)")
@@ -103,6 +98,136 @@ def alle_tools_laden(debug=True):
     return tools
 
 
+# ──────────────────────────────
+# Tool-Registry: Modulname → Tools. Wird bei Hot-Reload als Ganzes ersetzt (atomarer Tausch),
+# Leser bekommen immer einen konsistenten Stand.
+# ──────────────────────────────
+_registry = {}
+_registry_lock = threading.Lock()
+
+def _registrieren(modul_name, modul_tools):
+    global _registry
+    with _registry_lock:
+        _registry = {**_registry, modul_name: list(modul_tools)}
+
+def tools_liste():
+    """Aktuelle Tools aller Module als (name, func, kategorie)-Liste"""
+    registry = _registry
+    return [tool for modul_tools in registry.values() for tool in modul_tools]
+
+
+# ──────────────────────────────
+# Hot-Reload von *_tools.py
+# ──────────────────────────────
+def modul_neu_laden(modul_name: str) -> bool:
+    """Lädt ein *_tools-Modul neu. Erst wenn das neue Modul fehlerfrei importiert und tools_holen()
+    eine Liste liefert, werden sys.modules und Registry getauscht – sonst bleibt die alte Version aktiv.
+    Geteilter Zustand (Modelle, HTTP-Sessions, Caches) liegt in utils/ressourcen und wird nicht angefasst."""
+    pfad = os.path.join(os.path.dirname(os.path.abspath(__file__)), modul_name + ".py")
+    try:
+        spec = importlib.util.spec_from_file_location(modul_name, pfad)
+        neu = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(neu)
+        neue_tools = neu.tools_holen() if hasattr(neu, "tools_holen") else []
+        if not isinstance(neue_tools, list):
+            raise TypeError("tools_holen() liefert keine Liste")
+    except Exception:
+        cprint(bcolors.FAIL, f"[Hot-Reload] {modul_name} fehlerhaft – alte Version bleibt aktiv")
+        logging.exception(f"Hot-Reload von {modul_name} fehlgeschlagen, alte Version bleibt aktiv")
+        return False
+
+    # Spätere "from x_tools import …" (assistant_core importiert lazy) sehen ab jetzt das neue Modul
+    sys.modules[modul_name] = neu
+    _registrieren(modul_name, neue_tools)
+    cprint(bcolors.OKGREEN, f"[Hot-Reload] {modul_name} neu geladen ({len(neue_tools)} Tools)")
+    logging.info(f"Hot-Reload: {modul_name} neu geladen – {len(neue_tools)} Tools")
+    return True
+
+
+# inotify über ctypes (Linux/Termux), sonst mtime-Polling
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+ENTPRELLEN = 0.3               # Editoren schreiben oft mehrfach hintereinander
+POLL_INTERVALL = 1.0
+
+def _inotify_oeffnen(verzeichnis):
+    import ctypes
+    import ctypes.util
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1")
+    if libc.inotify_add_watch(fd, os.fsencode(verzeichnis), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+        os.close(fd)
+        raise OSError(ctypes.get_errno(), "inotify_add_watch")
+    return fd
+
+def _inotify_dateien(fd):
+    """Blockiert bis zu Ereignissen und liefert die geänderten Dateinamen"""
+    daten = os.read(fd, 64 * 1024)
+    namen, pos = set(), 0
+    while pos + 16 <= len(daten):
+        _wd, _maske, _cookie, laenge = struct.unpack_from("iIII", daten, pos)
+        name = daten[pos + 16:pos + 16 + laenge].split(b"\0", 1)[0]
+        namen.add(os.fsdecode(name))
+        pos += 16 + laenge
+    return namen
+
+def _stand(verzeichnis):
+    stand = {}
+    for datei in os.listdir(verzeichnis):
+        if datei.endswith("_tools.py"):
+            try:
+                stand[datei] = os.stat(os.path.join(verzeichnis, datei)).st_mtime_ns
+            except FileNotFoundError:
+                pass
+    return stand
+
+_beobachter = None
+
+def hot_reload_starten():
+    """Startet (einmalig) den Hintergrund-Thread, der das Verzeichnis auf geänderte *_tools.py beobachtet"""
+    global _beobachter
+    if _beobachter is not None:
+        return _beobachter
+    verzeichnis = os.path.dirname(os.path.abspath(__file__))
+
+    def neu_laden(dateien):
+        for datei in sorted(dateien):
+            if datei.endswith("_tools.py"):
+                modul_neu_laden(datei[:-3])
+
+    def inotify_schleife(fd):
+        while True:
+            geaendert = _inotify_dateien(fd)
+            ende = time.monotonic() + ENTPRELLEN
+            while time.monotonic() < ende:
+                if select.select([fd], [], [], max(0, ende - time.monotonic()))[0]:
+                    geaendert |= _inotify_dateien(fd)
+            neu_laden(geaendert)
+
+    def poll_schleife():
+        alt = _stand(verzeichnis)
+        while True:
+            time.sleep(POLL_INTERVALL)
+            neu = _stand(verzeichnis)
+            neu_laden(d for d, mtime in neu.items() if alt.get(d) != mtime)
+            alt = neu
+
+    try:
+        fd = _inotify_oeffnen(verzeichnis)
+        ziel, args, art = inotify_schleife, (fd,), "inotify"
+    except (OSError, AttributeError) as e:
+        logging.info(f"inotify nicht verfügbar ({e}) – Hot-Reload per Polling")
+        ziel, args, art = poll_schleife, (), "Polling"
+
+    _beobachter = threading.Thread(target=ziel, args=args, name="pia-hotreload", daemon=True)
+    _beobachter.start()
+    logging.info(f"Hot-Reload aktiv ({art}) für {verzeichnis}/*_tools.py")
+    return _beobachter
+
+
 if __name__ == "__main__":
     print("Test-Lauf des Module Loaders (Debug-Modus)")
     alle_tools_laden(debug=True)
\ No newline at end of file
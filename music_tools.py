@@ -1,6 +1,7 @@
-# music_tools.py – Steuerung über playerctl (MPRIS)
+# music_tools.py – Steuerung über MPRIS (D-Bus, Fallback playerctl)
 
-from utils import system_befehl, sprich, logging   # ← nur system_befehl
+from utils import sprich, logging
+from media_backend import MEDIEN
 
 def musik_befehl(befehl: str):
     befehl = befehl.lower().strip()
@@ -19,24 +20,23 @@ def musik_befehl(befehl: str):
     }
 
     if befehl in actions:
-        cmd = f"playerctl {actions[befehl]}"
-        system_befehl(cmd)   # ← geändert
+        MEDIEN.player_aktion(actions[befehl])
         sprich(f"Musik: {befehl}")
-        return f"playerctl → {befehl}"
+        return f"Player → {befehl}"
 
     elif befehl.startswith("lauter"):
-        system_befehl("playerctl volume 0.07+")
+        MEDIEN.player_lautstaerke(delta=0.07)
         return "Lauter gemacht"
 
     elif befehl.startswith("leiser"):
-        system_befehl("playerctl volume 0.07-")
+        MEDIEN.player_lautstaerke(delta=-0.07)
         return "Leiser gemacht"
 
     elif befehl.startswith("lautstärke"):
         try:
             wert = float(befehl.split()[-1]) / 100
             if 0 <= wert <= 1.5:
-                system_befehl(f"playerctl volume {wert:.2f}")
+                MEDIEN.player_lautstaerke(absolut=wert)
                 sprich(f"Lautstärke auf {int(wert*100)}%")
                 return f"Lautstärke → {int(wert*100)}%"
         except:
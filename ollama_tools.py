@@ -1,18 +1,375 @@
+import re
+import threading
+import time
 import ollama
-from utils import sprich, logging
+from urllib.parse import urlsplit
+from utils import sprich, logging, http_erfassen, KONFIG, MODUS
+from tool_engine import tool_timeout
+from tracing import span_erfassen
+from ressourcen import RESSOURCEN, PRUEF_INTERVALL
+from gesundheit import GESUNDHEIT
 
 # ============== KONFIGURATION ==============
 # Gute Modelle 2026 (schnell + gut auf Deutsch):
 # "llama3.2:3b"     → sehr schnell, empfohlen für den Anfang
 # "gemma2:9b"       → besser in Qualität
 # "qwen2.5:7b"      → stark multilingual
-OLLAMA_MODEL = "llama3.2:3b"
+#
+# Der Router wählt pro Frage zwischen den Modellen (klein → groß sortiert), überschreibbar per
+# pia4_konfig.json: "ollama_modelle": [{"name": "llama3.2:3b", "tokens_pro_s": 45}, ...]
+# tokens_pro_s ist nur der Startwert – danach zählt, was Ollama tatsächlich misst.
+OLLAMA_MODELLE = KONFIG.get("ollama_modelle", [
+    {"name": "llama3.2:3b", "tokens_pro_s": 45},
+    {"name": "qwen2.5:7b", "tokens_pro_s": 18},
+])
+OLLAMA_MODEL = OLLAMA_MODELLE[0]["name"]        # kleinstes Modell = Standard und letzter Ausweg
+
+# Latenzbudget pro Modus in Sekunden (Sprache muss sich wie ein Gespräch anfühlen)
+LATENZ_BUDGET = {"sprache": 8.0, "terminal": 30.0, **KONFIG.get("ollama_latenz_budget", {})}
 
 OLLAMA_HOST = "http://localhost:11434"
 # ===========================================
 
+NUM_CTX_MIN, NUM_CTX_MAX = 1024, 8192
+ZEICHEN_PRO_TOKEN = 3.5                         # grobe Schätzung für deutschen Text
+
+_KOMPLEX = re.compile(
+    r"\b(warum|wieso|weshalb|erkläre?|erklär mir|unterschied|vergleich\w*|schritt\w*|anleitung|"
+    r"repariere?|behebe?|fehler\w*|konfigur\w*|skript|programmier\w*|code|analysier\w*|zusammenfass\w*)\b"
+)
+_TRIVIAL = re.compile(r"^(danke\w*|ok(ay)?|super|cool|gut|ja|nein|hallo|hi|tschüss|bis später)\b")
+
+# ──────────────────────────────
+# Messwerte pro Modell (gleitender Mittelwert aus Ollamas eigenen Zählern)
+# ──────────────────────────────
+_mess_lock = threading.Lock()
+_messung = {m["name"]: {"eval_tps": float(m.get("tokens_pro_s", 30)), "prefill_tps": 400.0, "laden_s": 0.0}
+            for m in OLLAMA_MODELLE}
+_nicht_vorhanden = set()                        # Modelle, die Ollama nicht kennt (nicht gepullt)
+
+
+def _messung_aktualisieren(modell: str, response, gewicht: float = 0.3):
+    try:
+        eval_tps = response["eval_count"] / (response["eval_duration"] / 1e9)
+        prefill_tps = response["prompt_eval_count"] / (response["prompt_eval_duration"] / 1e9)
+        laden_s = (response["load_duration"] or 0) / 1e9
+    except (KeyError, TypeError, ZeroDivisionError):
+        return
+    with _mess_lock:
+        m = _messung.setdefault(modell, {"eval_tps": eval_tps, "prefill_tps": prefill_tps, "laden_s": laden_s})
+        m["eval_tps"] += gewicht * (eval_tps - m["eval_tps"])
+        m["prefill_tps"] += gewicht * (prefill_tps - m["prefill_tps"])
+        m["laden_s"] += gewicht * (laden_s - m["laden_s"])
+
+
+# ──────────────────────────────
+# Router
+# ──────────────────────────────
+def komplexitaet(frage: str) -> int:
+    """0 = Smalltalk, 1 = normale Frage, 2 = Erklärung / Fehlersuche / mehrere Schritte"""
+    text = frage.lower().strip()
+    if _TRIVIAL.match(text) and len(text.split()) <= 4:
+        return 0
+    punkte = len(_KOMPLEX.findall(text))
+    punkte += len(text.split()) > 25
+    punkte += text.count("?") > 1
+    punkte += bool(re.search(r"[`/\\$]|(?:^|\s)--?\w|\w+\.\w{2,4}\b", text))    # Befehle, Pfade, Dateien
+    return 2 if punkte >= 2 else 1
+
+
+def _tokens(text: str) -> int:
+    return int(len(text) / ZEICHEN_PRO_TOKEN) + 1
+
+
+def num_ctx_berechnen(prompt_tokens: int, num_predict: int) -> int:
+    """Kleinster Zweierpotenz-Kontext, in den Prompt + Antwort passen – spart KV-Cache und Prefill"""
+    bedarf = prompt_tokens + num_predict + 64
+    ctx = NUM_CTX_MIN
+    while ctx < bedarf and ctx < NUM_CTX_MAX:
+        ctx *= 2
+    return ctx
+
+
+def _geschaetzte_dauer(modell: str, prompt_tokens: int, num_predict: int) -> float:
+    with _mess_lock:
+        m = dict(_messung.get(modell, {"eval_tps": 20.0, "prefill_tps": 300.0, "laden_s": 0.0}))
+    # Antworten sind selten so lang wie num_predict – mit der Hälfte rechnen
+    return m["laden_s"] + prompt_tokens / m["prefill_tps"] + (num_predict / 2) / m["eval_tps"]
+
+
+def modell_waehlen(frage: str, system_prompt: str | None = None, modus: str | None = None) -> dict:
+    """Plan für einen Aufruf: Modellreihenfolge (Wunsch → kleinere Ausweichmodelle), Optionen, Budget"""
+    modus = modus or MODUS.get()
+    budget = LATENZ_BUDGET.get(modus, LATENZ_BUDGET["terminal"])
+    stufe = komplexitaet(frage)
+    num_predict = {0: 96, 1: 256, 2: 512}[stufe]
+    if modus == "sprache":
+        num_predict = min(num_predict, 160)     # Sprachausgabe wird ohnehin bei 280 Zeichen gekürzt
+    prompt_tokens = _tokens(frage) + _tokens(system_prompt or "")
+
+    verfuegbar = [m["name"] for m in OLLAMA_MODELLE if m["name"] not in _nicht_vorhanden] or [OLLAMA_MODEL]
+    # Smalltalk immer klein, normale Fragen höchstens das mittlere, komplexe bis zum größten Modell –
+    # jeweils das größte, dessen geschätzte Dauer ins Budget des Modus passt
+    obergrenze = {0: 0, 1: (len(verfuegbar) - 1) // 2, 2: len(verfuegbar) - 1}[stufe]
+    wahl = 0
+    if obergrenze > 0:
+        for i, name in enumerate(verfuegbar[:obergrenze + 1]):
+            if _geschaetzte_dauer(name, prompt_tokens, num_predict) <= budget:
+                wahl = i
+    reihenfolge = [verfuegbar[wahl]] + list(reversed(verfuegbar[:wahl]))
+
+    return {
+        "modelle": reihenfolge,
+        "stufe": stufe,
+        "budget": budget,
+        "optionen": {
+            "temperature": 0.75,
+            "num_ctx": num_ctx_berechnen(prompt_tokens, num_predict),
+            "num_predict": num_predict,
+        },
+    }
+
+
+_clients = {}
+
+def _client(timeout: float) -> "ollama.Client":
+    timeout = max(1, int(timeout))           # ganze Sekunden – hält den Client-Cache klein
+    if timeout not in _clients:
+        _clients[timeout] = ollama.Client(host=OLLAMA_HOST, timeout=timeout)
+    return _clients[timeout]
+
+
+# Ollama hält das Modell im eigenen Prozess – Pia entscheidet über den Leerlauf (ressourcen.py).
+# keep_alive etwas länger als unser Leerlauf, damit Ollama auch ohne Pia irgendwann freigibt.
+# Vorgeladen wird das zuletzt vom Router gewählte Modell – beim Wake-Word ist die Frage noch unbekannt.
+# Wechselt der Router das Modell, gibt Ollama das vorige frei: es bleibt immer nur eins von uns im Speicher.
+_vorlade_modell = OLLAMA_MODEL
+_aktives_modell = None
+
+def _ollama_vorladen():
+    global _aktives_modell
+    modell = _vorlade_modell
+    ollama.generate(model=modell, prompt="", keep_alive=_keep_alive())
+    _aktives_modell = modell
+    return modell
+
+def _modell_bereitstellen(modell: str):
+    """Das gewählte Modell laden (nach dem Leerlauf-Entladen) – nicht erst ein anderes, dann dieses"""
+    global _vorlade_modell, _aktives_modell
+    _vorlade_modell = modell
+    try:
+        RESSOURCEN.holen("ollama")
+    except ollama.ResponseError as e:
+        if e.status_code != 404:
+            raise
+        return                                  # nicht gepullt – die Ausweichliste im Aufrufer übernimmt
+    vorher, _aktives_modell = _aktives_modell, modell
+    if vorher and vorher != modell:
+        threading.Thread(target=_modell_freigeben, args=(vorher,), name="pia-ollama-freigeben", daemon=True).start()
+
+def _modell_freigeben(modell: str):
+    try:
+        ollama.generate(model=modell, prompt="", keep_alive=0)
+    except Exception as e:
+        logging.debug(f"Ollama-Modell {modell} nicht freigegeben: {e}")
+
+def _unsere_modelle():
+    namen = {m["name"] for m in OLLAMA_MODELLE}
+    return [m for m in ollama.ps()["models"] if m["model"] in namen or m["model"].split(":")[0] in namen]
+
+def _ollama_entladen(_):
+    global _aktives_modell
+    _aktives_modell = None
+    for m in _unsere_modelle():
+        ollama.generate(model=m["model"], prompt="", keep_alive=0)
+
+def _ollama_groesse_mb() -> float:
+    return sum(m["size"] for m in _unsere_modelle()) / 1e6
+
+RESSOURCEN.registrieren("ollama", _ollama_vorladen, _ollama_entladen, leerlauf_s=300,
+                        groesse_mb=_ollama_groesse_mb, schaetzung_mb=2500)
+
+def _keep_alive() -> int:
+    return int(RESSOURCEN.leerlauf_s("ollama") + 2 * PRUEF_INTERVALL)
+
+def _ollama_spans(response, start_us: float, modell: str = OLLAMA_MODEL):
+    """Ollama meldet Laden / Prompt-Verarbeitung / Generierung in ns → als aufeinanderfolgende Spans"""
+    for stufe, schluessel in (("load", "load_duration"), ("prefill", "prompt_eval_duration"), ("eval", "eval_duration")):
+        try:
+            dauer_ms = (response[schluessel] or 0) / 1e6
+        except (KeyError, TypeError):
+            continue
+        span_erfassen("ollama", stufe, dauer_ms, start_us, modell=modell)
+        start_us += dauer_ms * 1000
+
+def _chat(modell: str, messages: list, optionen: dict, timeout: float):
+    start = time.perf_counter()
+    start_us = time.time() * 1e6
+    try:
+        with GESUNDHEIT.messen("ollama"):
+            response = _client(timeout).chat(
+                model=modell,
+                messages=messages,
+                keep_alive=_keep_alive(),
+                options=optionen,
+            )
+    except Exception as e:
+        http_erfassen(urlsplit(OLLAMA_HOST).netloc, (time.perf_counter() - start) * 1000, type(e).__name__)
+        raise
+    http_erfassen(urlsplit(OLLAMA_HOST).netloc, (time.perf_counter() - start) * 1000)
+    _ollama_spans(response, start_us, modell)
+    _messung_aktualisieren(modell, response)
+    return response
+
+# ──────────────────────────────
+# Spekulatives Vorausrechnen (Sprachmodus)
+# ──────────────────────────────
+# Während Jan noch spricht, schickt der Listener den stabilen Anfang des Transkripts hierher, sofern
+# kein Schlüsselwort-Zweig ihn bedient. Ob er wirklich beim LLM landet (Embedding-Stufe) und welcher
+# System-Prompt dazugehört, klärt vorbereiten() erst im Spekulations-Thread – der Listener wartet nie
+# auf Ollama. Passt der endgültige Befehl, holt ollama_antwort das
+# (evtl. noch laufende) Ergebnis ab, statt neu anzufragen. Sonst wird abgebrochen – die Verbindung
+# zu schließen beendet auch die Generierung in Ollama; der vorgewärmte Prompt-Cache bleibt.
+SPEKULATION_MAX_ALTER = 30      # Sekunden – älter passt nicht mehr zur Unterhaltung
+
+spekulation_statistik = {"gestartet": 0, "ersetzt": 0, "treffer": 0, "verfehlt": 0, "gespart_ms": 0.0}
+_spekulation = None
+_spek_lock = threading.Lock()
+
+
+def _normalisieren(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class _Spekulation:
+    def __init__(self, befehl: str, vorbereiten):
+        self.befehl = befehl
+        self.vorbereiten = vorbereiten          # befehl → System-Prompt, None = landet doch nicht beim LLM
+        self.system_prompt = None
+        self.schluessel = _normalisieren(befehl)
+        self.start = time.monotonic()
+        self.ende = None
+        self.response = None
+        self.abbrechen = threading.Event()
+        self.fertig = threading.Event()
+
+
+def spekulieren(befehl: str, vorbereiten=None):
+    """Startet eine Anfrage auf einem vorläufigen Transkript (ersetzt eine ältere, falls anders).
+    Kehrt sofort zurück – vorbereiten(befehl) und die Anfrage laufen im Thread pia-spekulation."""
+    global _spekulation
+    if not GESUNDHEIT.verfuegbar("ollama"):
+        return
+    neu = _Spekulation(befehl, vorbereiten)
+    with _spek_lock:
+        alt = _spekulation
+        if alt is not None and alt.schluessel == neu.schluessel:
+            return
+        if alt is not None:
+            alt.abbrechen.set()
+            spekulation_statistik["ersetzt"] += 1
+        _spekulation = neu
+        spekulation_statistik["gestartet"] += 1
+    threading.Thread(target=_spekulation_ausfuehren, args=(neu,), name="pia-spekulation", daemon=True).start()
+
+
+def _spekulation_ausfuehren(s: _Spekulation):
+    try:
+        if s.vorbereiten is not None:
+            s.system_prompt = s.vorbereiten(s.befehl)
+            if s.system_prompt is None or s.abbrechen.is_set():
+                return
+        messages = ([{"role": "system", "content": s.system_prompt}] if s.system_prompt else []) + \
+                   [{"role": "user", "content": s.befehl}]
+        plan = modell_waehlen(s.befehl, s.system_prompt, modus="sprache")
+        modell = plan["modelle"][0]
+        _modell_bereitstellen(modell)
+        start_us = time.time() * 1e6
+        teile, letzter = [], None
+        with GESUNDHEIT.messen("ollama"):
+            strom = _client(plan["budget"]).chat(model=modell, messages=messages, keep_alive=_keep_alive(),
+                                                 options=plan["optionen"], stream=True)
+            try:
+                for teil in strom:
+                    if s.abbrechen.is_set():
+                        return
+                    teile.append(teil["message"]["content"])
+                    letzter = teil
+            finally:
+                strom.close()
+        response = {"message": {"role": "assistant", "content": "".join(teile)}}
+        for schluessel in ("load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration"):
+            try:
+                response[schluessel] = letzter[schluessel]
+            except (KeyError, TypeError):
+                pass
+        _ollama_spans(response, start_us, modell)
+        _messung_aktualisieren(modell, response)
+        s.response = response
+    except Exception as e:
+        logging.debug(f"Spekulative Ollama-Anfrage fehlgeschlagen: {e}")
+    finally:
+        s.ende = time.monotonic()
+        s.fertig.set()
+
+
+def spekulation_abgleichen(befehl: str):
+    """Endgültiger Befehl steht fest – eine Spekulation auf anderen Text wird verworfen"""
+    global _spekulation
+    with _spek_lock:
+        s = _spekulation
+        if s is None or s.schluessel == _normalisieren(befehl):
+            return
+        _spekulation = None
+        spekulation_statistik["verfehlt"] += 1
+    s.abbrechen.set()
+
+
+def _spekulation_einloesen(befehl: str, system_prompt: str | None, warten_bis: float):
+    global _spekulation
+    with _spek_lock:
+        s, _spekulation = _spekulation, None
+    if s is None:
+        return None
+    jetzt = time.monotonic()
+    if s.schluessel != _normalisieren(befehl) or jetzt - s.start > SPEKULATION_MAX_ALTER:
+        s.abbrechen.set()
+        spekulation_statistik["verfehlt"] += 1
+        return None
+    if not s.fertig.wait(timeout=max(1.0, warten_bis - jetzt)) or s.response is None \
+            or s.system_prompt != system_prompt:
+        s.abbrechen.set()
+        spekulation_statistik["verfehlt"] += 1
+        return None
+    gespart_ms = (min(s.ende, jetzt) - s.start) * 1000        # so viel früher lief die Anfrage an
+    spekulation_statistik["treffer"] += 1
+    spekulation_statistik["gespart_ms"] += gespart_ms
+    logging.info(f"Spekulative Ollama-Antwort übernommen ({gespart_ms:.0f} ms gespart)")
+    return s.response
+
+
+def spekulation_bericht() -> str:
+    st = spekulation_statistik
+    entschieden = st["treffer"] + st["verfehlt"]
+    if not st["gestartet"]:
+        return "Spekulatives Vorausrechnen: noch keine Anfrage (nur im Sprachmodus)."
+    quote = 100 * st["treffer"] / entschieden if entschieden else 0.0
+    schnitt = st["gespart_ms"] / st["treffer"] if st["treffer"] else 0.0
+    return (f"Spekulatives Vorausrechnen: {st['gestartet']} gestartet ({st['ersetzt']} ersetzt), "
+            f"{st['treffer']} Treffer / {st['verfehlt']} verfehlt = {quote:.0f} % Trefferquote, "
+            f"gespart Ø {schnitt:.0f} ms, gesamt {st['gespart_ms'] / 1000:.1f} s")
+
+
+GESAMT_TIMEOUT = 120
+
+@tool_timeout(GESAMT_TIMEOUT)
 def ollama_antwort(befehl: str, system_prompt: str = None) -> str:
-    """Ruft Ollama auf und gibt die Antwort zurück"""
+    """Ruft Ollama auf (Modell nach Frage und Modus gewählt) und gibt die Antwort zurück"""
+    if not GESUNDHEIT.verfuegbar("ollama"):
+        # Kreis offen (Ollama läuft nicht) → sofort die Ausweichantwort statt auf den Verbindungsfehler zu warten
+        sprich("Ollama antwortet gerade nicht.")
+        return "Entschuldige Jan, Ollama ist momentan nicht erreichbar."
+
     try:
         messages = []
         if system_prompt:
@@ -20,15 +377,32 @@ def ollama_antwort(befehl: str, system_prompt: str = None) -> str:
 
         messages.append({"role": "user", "content": befehl})
 
-        response = ollama.chat(
-            model=OLLAMA_MODEL,
-            messages=messages,
-            options={
-                "temperature": 0.75,
-                "num_ctx": 8192,
-                "num_predict": 512,
-            }
-        )
+        plan = modell_waehlen(befehl, system_prompt)
+        logging.info(f"Ollama-Router: Stufe {plan['stufe']} → {plan['modelle'][0]} "
+                     f"(num_ctx {plan['optionen']['num_ctx']}, Budget {plan['budget']:.0f}s)")
+
+        ende = time.monotonic() + GESAMT_TIMEOUT - 5
+        response = _spekulation_einloesen(befehl, system_prompt, ende)
+        if response is None:
+            _modell_bereitstellen(plan["modelle"][0])
+        else:
+            RESSOURCEN.benutzt("ollama")
+        for i, modell in enumerate(plan["modelle"] if response is None else []):
+            letzter = i == len(plan["modelle"]) - 1
+            # Wunschmodell bekommt das Budget, das letzte Ausweichmodell die restliche Zeit
+            timeout = max(1.0, ende - time.monotonic()) if letzter else plan["budget"]
+            try:
+                response = _chat(modell, messages, plan["optionen"], timeout)
+                break
+            except ollama.ResponseError as e:
+                if e.status_code != 404 or letzter:
+                    raise
+                logging.warning(f"Ollama-Modell {modell} nicht vorhanden – nehme kleineres")
+                _nicht_vorhanden.add(modell)
+            except Exception as e:
+                if letzter or "timeout" not in type(e).__name__.lower():
+                    raise
+                logging.warning(f"Ollama-Modell {modell} über Budget ({timeout:.0f}s) – nehme kleineres")
 
         antwort = response['message']['content'].strip()
 
@@ -49,4 +423,4 @@ def ollama_antwort(befehl: str, system_prompt: str = None) -> str:
 def tools_holen():
     return [
         ("ollama_antwort", ollama_antwort, "LLM / Ollama"),
-    ]
\ No newline at end of file
+    ]
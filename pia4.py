@@ -1,30 +1,42 @@
 #!/usr/bin/env python3
 # pia4.py – Haupteinstieg (CLI + Sprachmodus)
-# Angepasst: Automatischer venv311-Start + Deactivate am Ende
+# Startet sich selbst direkt mit dem venv311-Python neu (os.execv, ohne bash) – vor allen schweren Imports
+#
+#   pia4                   → Menü (nutzt einen laufenden Daemon, falls vorhanden)
+#   pia4 --daemon          → residenter Prozess hinter $XDG_RUNTIME_DIR/pia4.sock
+#   pia4 "wetter berlin"   → Einzelbefehl (über den Daemon in Millisekunden, sonst lokal)
 
 import os
 import sys
-import subprocess
-from utils import sprich
-
-VENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pia4-venv311", "bin", "activate")
+from venv_start import venv_sicherstellen
 
-# Wenn wir nicht schon im venv sind → venv aktivieren und neu starten
-if "pia4-venv311" not in sys.executable:
-    print("→ Pia4 startet im venv311 ...")
-    activate_cmd = f"source {VENV_PATH} && python3 {__file__} \"$@\""
-    os.execvp("bash", ["bash", "-c", activate_cmd] + sys.argv[1:])
-    sys.exit(0)
+if __name__ == "__main__":
+    # Einzelbefehl an einen laufenden Daemon – nur Standardbibliothek, kein venv-Wechsel nötig
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("--"):
+        from pia4_daemon import befehl_senden
+        antwort = befehl_senden(" ".join(sys.argv[1:]))
+        if antwort is not None:
+            print(antwort["antwort"] if antwort.get("ok") else f"Fehler: {antwort.get('fehler')}")
+            sys.exit(0 if antwort.get("ok") else 1)
+    venv_sicherstellen(__file__)
 
 # Ab hier läuft alles im venv311
-print("Pia4 läuft im venv311")
+from utils import sprich
 
 IS_TERMUX = "TERMUX_VERSION" in os.environ
 
 def main():
-    from module_loader import alle_tools_laden
-
-    tools = alle_tools_laden()
+    from pia4_daemon import daemon_laeuft, befehl_senden, senden
+
+    # Läuft ein Daemon, teilen sich Terminal- und Sprachmodus dessen warmen Prozess
+    daemon = daemon_laeuft()
+    if daemon:
+        print("→ Verbunden mit dem Pia4-Daemon")
+        tools = []
+    else:
+        from module_loader import alle_tools_laden, hot_reload_starten
+        tools = alle_tools_laden()
+        hot_reload_starten()
 
     # Debug: Welche Tools wurden geladen?
     print("\n=== Geladene Tools (Debug) ===")
@@ -42,15 +54,23 @@ def main():
 
     while True:
         choice = input("Auswahl → ").strip().lower()
+        if not daemon:
+            from module_loader import tools_liste
+            tools = tools_liste() or tools         # nach Hot-Reload die neuen Funktionen
 
         if choice in ("1", "sprache", "voice", "hey pia"):
             print("Versuche Sprachmodus zu starten ...")
+            if daemon:
+                antwort = senden({"aktion": "sprachmodus"})
+                print(antwort.get("antwort") or antwort.get("fehler") if antwort else "Daemon nicht erreichbar.")
+                continue
             found = False
             for name, func, cat in tools:
                 if name in ("sprachmodus", "immer_hoerend", "voice_mode", "hey_pia"):
                     try:
                         print(f"→ Starte Funktion: {name}")
-                        func()
+                        from tool_engine import tool_ausfuehren
+                        tool_ausfuehren(func)
                         found = True
                     except Exception as e:
                         print(f"Fehler beim Starten des Sprachmodus ({name}): {e}")
@@ -65,9 +85,28 @@ def main():
                 cmd = input("Pia4> ").strip()
                 if cmd.lower() in (":q", "exit", "quit"):
                     break
-                if cmd:
+                if cmd and daemon:
+                    try:
+                        antwort = befehl_senden(cmd)
+                    except KeyboardInterrupt:
+                        senden({"aktion": "stopp"}, timeout=5)
+                        print("\n→ Abgebrochen.")
+                        continue
+                    if antwort is None:
+                        print("Daemon nicht mehr erreichbar – neu starten mit: pia4 --daemon")
+                    else:
+                        print(antwort["antwort"] if antwort.get("ok") else f"Fehler: {antwort.get('fehler')}")
+                elif cmd:
                     from assistant_core import befehl_verarbeiten
-                    print(befehl_verarbeiten(cmd))
+                    from tool_engine import ENGINE
+                    laufend = ENGINE.starten(befehl_verarbeiten, cmd, timeout=300)
+                    try:
+                        print(laufend.result())
+                    except KeyboardInterrupt:
+                        ENGINE.alle_abbrechen()
+                        print("\n→ Abgebrochen.")
+                    except Exception as e:
+                        print(f"Fehler: {e}")
 
         elif choice == "m1" and IS_TERMUX:
             print("Versuche Immer-hörend-Modus ...")
@@ -91,12 +130,12 @@ def main():
             print("Ungültige Auswahl. Probiere 1, 2, q ...")
 
 if __name__ == "__main__":
-    try:
+    if sys.argv[1:2] == ["--daemon"]:
+        from pia4_daemon import daemon_starten
+        daemon_starten()
+    elif len(sys.argv) > 1:
+        # Kein Daemon erreichbar → Einzelbefehl lokal ausführen
+        from assistant_core import befehl_verarbeiten
+        print(befehl_verarbeiten(" ".join(sys.argv[1:])))
+    else:
         main()
-    finally:
-        # venv deaktivieren (wenn wir im venv sind)
-        if "VIRTUAL_ENV" in os.environ:
-            print("→ venv311 wird deaktiviert")
-            deactivate = os.path.join(os.environ["VIRTUAL_ENV"], "bin", "deactivate")
-            if os.path.exists(deactivate):
-                subprocess.run(["bash", "-c", f"source {deactivate}"], check=False)
\ No newline at end of file
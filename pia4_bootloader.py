@@ -1,34 +1,35 @@
 import os
-import sys
+from venv_start import venv_sicherstellen
+
+# Direkt ins venv311-Python wechseln (os.execv), bevor utils/Piper/Logging geladen werden
+if __name__ == "__main__":
+    venv_sicherstellen(__file__)
+
 import subprocess
+import threading
 import time
-import requests
-from utils import sprich
+import logging
+from utils import sprich, http_get
 
-VENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pia4-venv311", "bin", "activate")
-
-if "pia4-venv311" not in sys.executable:
-    print("→ Pia4 startet im venv311 ...")
-    activate_cmd = f"source {VENV_PATH} && python3 {__file__} \"$@\""
-    os.execvp("bash", ["bash", "-c", activate_cmd] + sys.argv[1:])
-    sys.exit(0)
+IS_TERMUX = "TERMUX_VERSION" in os.environ
 
-print("Pia4 läuft im venv311")
+OLLAMA_URL = "http://localhost:11434/api/version"
+OLLAMA_START_TIMEOUT = 20       # Sekunden, bis "ollama serve" antworten muss
 
-IS_TERMUX = "TERMUX_VERSION" in os.environ
+def _ollama_antwortet(timeout=1) -> bool:
+    try:
+        return http_get(OLLAMA_URL, timeout=timeout).status_code == 200
+    except Exception:
+        return False
 
 def ollama_starten():
-    """Startet ollama serve automatisch, falls es nicht läuft"""
+    """Startet ollama serve automatisch, falls es nicht läuft, und wartet mit Backoff auf Bereitschaft"""
     print("→ Prüfe Ollama Server...")
 
     # Prüfen, ob Ollama bereits läuft
-    try:
-        r = requests.get("http://localhost:11434/api/version", timeout=3)
-        if r.status_code == 200:
-            print("→ Ollama läuft bereits.")
-            return True
-    except:
-        pass
+    if _ollama_antwortet():
+        print("→ Ollama läuft bereits.")
+        return True
 
     # Falls nicht → starten
     print("→ Starte Ollama Server im Hintergrund...")
@@ -37,34 +38,123 @@ def ollama_starten():
                          stdout=subprocess.DEVNULL, 
                          stderr=subprocess.DEVNULL,
                          start_new_session=True)
-        time.sleep(1)  # kurze Wartezeit bis Server bereit ist
-        
-        # Nochmal prüfen
-        r = requests.get("http://localhost:11434/api/version", timeout=3)
-        if r.status_code == 200:
-            print("→ Ollama erfolgreich gestartet.")
-            return True
-        else:
-            print("⚠️ Ollama konnte nicht gestartet werden.")
-            return False
     except Exception as e:
         print(f"⚠️ Fehler beim Starten von Ollama: {e}")
         return False
 
+    # Exponentielles Backoff statt fester Wartezeit: 50 ms, 100 ms, … max. 2 s
+    ende = time.monotonic() + OLLAMA_START_TIMEOUT
+    pause = 0.05
+    while time.monotonic() < ende:
+        if _ollama_antwortet():
+            print("→ Ollama erfolgreich gestartet.")
+            return True
+        time.sleep(pause)
+        pause = min(pause * 2, 2.0)
+
+    print("⚠️ Ollama konnte nicht gestartet werden.")
+    return False
+
+
+# ──────────────────────────────
+# Parallele Start-Orchestrierung
+# ──────────────────────────────
+def tts_vorbereiten():
+    import gtts  # noqa: F401 – Import dauert spürbar, daher vorziehen
+    from ressourcen import RESSOURCEN
+    RESSOURCEN.holen("piper")
+    return True
+
+def whisper_laden():
+    import voice_tools
+    voice_tools.modell_laden()
+    return True
+
+class StartOrchestrator:
+    """Startet unabhängige Subsysteme gleichzeitig in Threads. Jedes meldet sich bereit oder
+    fehlgeschlagen; der Aufrufer wartet gezielt nur auf das, was er gerade braucht."""
+
+    def __init__(self):
+        self._status = {}           # name → "läuft" | "bereit" | "fehler"
+        self._ergebnis = {}
+        self._dauer = {}
+        self._fertig = {}           # name → threading.Event
+        self._lock = threading.Lock()
+
+    def starten(self, name, func):
+        fertig = threading.Event()
+        with self._lock:
+            self._status[name] = "läuft"
+            self._fertig[name] = fertig
+
+        def laufen():
+            t0 = time.perf_counter()
+            try:
+                ergebnis = func()
+                status = "bereit" if ergebnis is not False else "fehler"
+            except Exception as e:
+                ergebnis, status = e, "fehler"
+                logging.warning(f"Start: {name} fehlgeschlagen: {e}")
+            with self._lock:
+                self._ergebnis[name] = ergebnis
+                self._status[name] = status
+                self._dauer[name] = time.perf_counter() - t0
+            logging.info(f"Start: {name} {status} nach {self._dauer[name]:.2f}s")
+            fertig.set()
+
+        threading.Thread(target=laufen, name=f"pia-start-{name}", daemon=True).start()
+
+    def warten(self, namen, timeout=None) -> bool:
+        """Wartet, bis alle genannten Subsysteme fertig sind; True, wenn alle bereit sind"""
+        ende = None if timeout is None else time.monotonic() + timeout
+        for name in namen:
+            fertig = self._fertig.get(name)
+            if fertig is None:
+                continue
+            if not fertig.is_set():
+                print(f"→ Warte auf {name} ...")
+            rest = None if ende is None else max(0, ende - time.monotonic())
+            if not fertig.wait(rest):
+                return False
+        return all(self._status.get(n, "bereit") == "bereit" for n in namen)
+
+    def ergebnis(self, name):
+        return self._ergebnis.get(name)
+
+    def uebersicht(self) -> str:
+        with self._lock:
+            return "  ".join(
+                f"{n}: {s}" + (f" ({self._dauer[n]:.1f}s)" if n in self._dauer else "")
+                for n, s in self._status.items()
+            )
 
-def main():
-    # === Ollama automatisch starten ===
-    ollama_starten()
-
-    from module_loader import alle_tools_laden
 
-    tools = alle_tools_laden()
+def main():
+    from module_loader import alle_tools_laden, hot_reload_starten, tools_liste
+
+    # === Ollama, Tools, Whisper und TTS gleichzeitig hochfahren ===
+    start = StartOrchestrator()
+    start.starten("ollama", ollama_starten)
+    start.starten("tools", alle_tools_laden)
+    start.starten("whisper", whisper_laden)
+    start.starten("tts", tts_vorbereiten)
+
+    # Menü erst, wenn die Tools da sind – Whisper/Ollama laden im Hintergrund weiter
+    start.warten(["tools"])
+    tools = start.ergebnis("tools")
+    if not isinstance(tools, list):
+        print(f"⚠️ Tools konnten nicht geladen werden: {tools}")
+        tools = []
+    hot_reload_starten()
+    from telegram_outbox import outbox_starten
+    outbox_starten()                        # Reste aus dem letzten Lauf zustellen
 
     # Debug: Welche Tools wurden geladen?
     print("\n=== Geladene Tools (Debug) ===")
     for name, func, cat in tools:
         print(f"  • {name:25}  ({cat})")
     print("===============================\n")
+    print(f"Start: {start.uebersicht()}\n")
 
     print("=== Pia4 – bereit ===")
     print("  1   Sprachmodus (Hey Pia)")
@@ -76,15 +166,19 @@ def main():
 
     while True:
         choice = input("Auswahl → ").strip().lower()
+        tools = tools_liste() or tools             # nach Hot-Reload die neuen Funktionen
 
         if choice in ("1", "sprache", "voice", "hey pia"):
             print("Versuche Sprachmodus zu starten ...")
+            if not start.warten(["whisper"]):
+                print("⚠️ Whisper-Modell nicht verfügbar – Sprachmodus eingeschränkt.")
             found = False
             for name, func, cat in tools:
                 if name in ("sprachmodus", "immer_hoerend", "voice_mode", "hey_pia"):
                     try:
                         print(f"→ Starte Funktion: {name}")
-                        func()
+                        from tool_engine import tool_ausfuehren
+                        tool_ausfuehren(func)
                         found = True
                     except Exception as e:
                         print(f"Fehler beim Starten des Sprachmodus ({name}): {e}")
@@ -100,7 +194,15 @@ def main():
                     break
                 if cmd:
                     from assistant_core import befehl_verarbeiten
-                    print(befehl_verarbeiten(cmd))
+                    from tool_engine import ENGINE
+                    laufend = ENGINE.starten(befehl_verarbeiten, cmd, timeout=300)
+                    try:
+                        print(laufend.result())
+                    except KeyboardInterrupt:
+                        ENGINE.alle_abbrechen()
+                        print("\n→ Abgebrochen.")
+                    except Exception as e:
+                        print(f"Fehler: {e}")
 
         elif choice == "m1" and IS_TERMUX:
             print("Versuche Immer-hörend-Modus ...")
@@ -124,11 +226,4 @@ def main():
             print("Ungültige Auswahl. Probiere 1, 2, q ...")
 
 if __name__ == "__main__":
-    try:
-        main()
-    finally:
-        if "VIRTUAL_ENV" in os.environ:
-            print("→ venv311 wird deaktiviert")
-            deactivate = os.path.join(os.environ["VIRTUAL_ENV"], "bin", "deactivate")
-            if os.path.exists(deactivate):
-                subprocess.run(["bash", "-c", f"source {deactivate}"], check=False)
\ No newline at end of file
+    main()
@@ -0,0 +1,188 @@
+# pia4_daemon.py – residenter Pia4-Prozess hinter einem Unix-Socket
+# Server (pia4 --daemon): hält befehl_verarbeiten, Tool-Registry und Modelle warm.
+# Client (pia4 "wetter berlin"): nur Standardbibliothek, damit die Antwort ohne schwere Imports kommt.
+#
+# Protokoll – eine JSON-Zeile pro Anfrage und Antwort, mehrere Anfragen pro Verbindung möglich:
+#   → {"befehl": "wetter berlin"}                       ← {"ok": true, "antwort": "..."}
+#   → {"aktion": "ping" | "status" | "stopp" | "sprachmodus"}
+#   ← {"ok": false, "fehler": "..."} bei Problemen
+
+import json
+import logging
+import os
+import socket
+import threading
+
+STOPPWOERTER = ("stopp", "stop", "abbrechen", "halt", "hör auf")
+BEFEHL_TIMEOUT = 300            # Sekunden, wie im Terminal-Modus
+VERBINDEN_TIMEOUT = 0.5
+
+
+def daemon_moeglich() -> bool:
+    """Unix-Sockets und eine uid gibt es nicht überall (Windows) – dann läuft Pia immer lokal"""
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def socket_pfad() -> str:
+    """$XDG_RUNTIME_DIR/pia4.sock (nur für den eigenen User lesbar), sonst /tmp/pia4-<uid>.sock"""
+    laufzeit = os.environ.get("XDG_RUNTIME_DIR")
+    if laufzeit and os.path.isdir(laufzeit):
+        return os.path.join(laufzeit, "pia4.sock")
+    return f"/tmp/pia4-{os.getuid()}.sock"
+
+
+# ──────────────────────────────
+# Client
+# ──────────────────────────────
+def senden(anfrage: dict, timeout: float = BEFEHL_TIMEOUT + 10) -> dict | None:
+    """Schickt eine Anfrage an den Daemon – None, wenn keiner läuft"""
+    if not daemon_moeglich():
+        return None
+    pfad = socket_pfad()
+    if not os.path.exists(pfad):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(VERBINDEN_TIMEOUT)
+            s.connect(pfad)
+            s.settimeout(timeout)
+            s.sendall(json.dumps(anfrage, ensure_ascii=False).encode("utf-8") + b"\n")
+            with s.makefile("rb") as f:
+                zeile = f.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+    except OSError as e:
+        return {"ok": False, "fehler": f"Daemon nicht erreichbar: {e}"}
+    if not zeile:
+        return {"ok": False, "fehler": "Daemon hat die Verbindung geschlossen"}
+    return json.loads(zeile)
+
+
+def befehl_senden(befehl: str) -> dict | None:
+    return senden({"befehl": befehl})
+
+
+def daemon_laeuft() -> bool:
+    antwort = senden({"aktion": "ping"}, timeout=2)
+    return bool(antwort and antwort.get("ok"))
+
+
+# ──────────────────────────────
+# Server
+# ──────────────────────────────
+def _bearbeiten(anfrage: dict) -> dict:
+    from assistant_core import befehl_verarbeiten
+    from tool_engine import ENGINE
+
+    aktion = anfrage.get("aktion")
+    if aktion == "ping":
+        return {"ok": True, "antwort": "pong", "pid": os.getpid()}
+    if aktion == "status":
+        return {"ok": True, "antwort": f"{ENGINE.laufende()} Aufgabe(n) laufen", "pid": os.getpid()}
+    if aktion == "stopp":
+        return {"ok": True, "antwort": f"{ENGINE.alle_abbrechen()} Aufgabe(n) abgebrochen"}
+    if aktion == "sprachmodus":
+        return {"ok": True, "antwort": _sprachmodus_starten()}
+
+    befehl = str(anfrage.get("befehl", "")).strip()
+    if not befehl:
+        return {"ok": False, "fehler": "Leere Anfrage"}
+    if befehl.lower().strip(" .!") in STOPPWOERTER:
+        # Nicht über die Engine – der Stopp-Befehl würde sich sonst selbst abbrechen
+        return {"ok": True, "antwort": befehl_verarbeiten(befehl)}
+    # Jede Verbindung hat ihren eigenen Thread; die Engine verteilt die Arbeit auf ihren Pool
+    return {"ok": True, "antwort": ENGINE.ausfuehren(befehl_verarbeiten, befehl, timeout=BEFEHL_TIMEOUT)}
+
+
+_sprachmodus_aktiv = False
+_sprachmodus_lock = threading.Lock()
+
+def _sprachmodus_starten() -> str:
+    """Startet den Hey-Pia-Listener einmalig im Daemon – alle Clients teilen sich Mikrofon und Modell"""
+    global _sprachmodus_aktiv
+    with _sprachmodus_lock:
+        if _sprachmodus_aktiv:
+            return "Sprachmodus läuft bereits im Daemon."
+        import voice_tools
+        voice_tools.sprachmodus()
+        _sprachmodus_aktiv = True
+    return "Sprachmodus im Daemon gestartet."
+
+
+def _server_bauen(pfad: str):
+    import socketserver
+    from concurrent.futures import CancelledError
+
+    class Verbindung(socketserver.StreamRequestHandler):
+        def handle(self):
+            for zeile in self.rfile:
+                if not zeile.strip():
+                    continue
+                try:
+                    antwort = _bearbeiten(json.loads(zeile))
+                except TimeoutError as e:
+                    antwort = {"ok": False, "fehler": str(e)}
+                except CancelledError:
+                    antwort = {"ok": False, "fehler": "Abgebrochen"}
+                except Exception as e:
+                    logging.error(f"Daemon-Anfrage fehlgeschlagen: {e}", exc_info=True)
+                    antwort = {"ok": False, "fehler": str(e) or type(e).__name__}
+                try:
+                    self.wfile.write(json.dumps(antwort, ensure_ascii=False).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+        request_queue_size = 64             # Hotkeys/Skripte dürfen gleichzeitig anklopfen
+
+    alte_maske = os.umask(0o177)            # Socket nur für den eigenen User (0600)
+    try:
+        return Server(pfad, Verbindung)
+    finally:
+        os.umask(alte_maske)
+
+
+def daemon_starten():
+    """Blockiert: wärmt alles vor und beantwortet Anfragen, bis SIGTERM/Ctrl+C"""
+    import signal
+    from pia4_bootloader import StartOrchestrator, ollama_starten, tts_vorbereiten, whisper_laden
+    from module_loader import alle_tools_laden, hot_reload_starten
+
+    if not daemon_moeglich():
+        print("Pia4-Daemon braucht Unix-Sockets – auf diesem System bitte ohne --daemon starten.")
+        return
+    pfad = socket_pfad()
+    if os.path.exists(pfad):
+        if daemon_laeuft():
+            print(f"Pia4-Daemon läuft bereits ({pfad}).")
+            return
+        os.unlink(pfad)                     # verwaister Socket eines abgestürzten Daemons
+
+    start = StartOrchestrator()
+    start.starten("ollama", ollama_starten)
+    start.starten("tools", alle_tools_laden)
+    start.starten("whisper", whisper_laden)
+    start.starten("tts", tts_vorbereiten)
+    start.warten(["tools"])
+    hot_reload_starten()
+    from telegram_outbox import outbox_starten
+    outbox_starten()                        # Reste aus dem letzten Lauf zustellen
+    import assistant_core  # noqa: F401 – Routing-Tabellen und Korrektur-Index vor der ersten Anfrage
+
+    server = _server_bauen(pfad)
+    signal.signal(signal.SIGTERM, lambda *a: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"Pia4-Daemon bereit auf {pfad} (PID {os.getpid()})")
+    logging.info(f"Daemon lauscht auf {pfad}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(pfad)
+        except FileNotFoundError:
+            pass
+        logging.info("Daemon beendet")
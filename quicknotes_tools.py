@@ -7,6 +7,7 @@ from utils import BASE_DIR, sprich, telegram_senden, lade_json, speichere_json
 DATEI = os.path.join(BASE_DIR, "schnellnotizen.json")
 
 def schnellnotiz(text: str):
+    """Speichert eine kurze Notiz"""
     text = text.strip()
     if not text:
         return "Keine Notiz angegeben."
@@ -28,6 +29,15 @@ def schnellnotiz(text: str):
 
     return msg
 
+TOOL_BEISPIELE = {
+    "schnellnotiz": [
+        "merk dir dass ich milch kaufen muss",
+        "schreib auf reifen wechseln",
+        "notier dir die telefonnummer vom handwerker",
+        "vergiss nicht die blumen zu gießen",
+    ],
+}
+
 def tools_holen():
     return [
         ("schnellnotiz", schnellnotiz, "Schnellnotizen"),
@@ -0,0 +1,218 @@
+# ressourcen.py – Speicherverwaltung für schwere Modelle (Whisper, Piper, Ollama)
+# Jedes Modell meldet sich mit Laden/Entladen an. Nach einer Leerlaufzeit wird es entladen,
+# bei Bedarf (oder schon bei Sprachaktivität) im Hintergrund neu geladen. Übersteigt die Summe
+# das Speicherbudget, fliegt das am längsten ungenutzte Modell zuerst.
+
+import gc
+import os
+import threading
+import time
+from utils import KONFIG, logging
+from gesundheit import GESUNDHEIT
+
+SPEICHER_BUDGET_MB = float(KONFIG.get("speicher_budget_mb", 6000))
+PRUEF_INTERVALL = 30             # Sekunden zwischen zwei Aufräumrunden
+SCHUTZZEIT = 10                  # gerade benutzte Modelle werden nie wegen des Budgets entladen
+
+
+def rss_mb(pid: int | str = "self") -> float:
+    """Resident Set Size eines Prozesses in MB (Linux /proc, sonst 0)"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for zeile in f:
+                if zeile.startswith("VmRSS:"):
+                    return int(zeile.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class Ressource:
+    def __init__(self, name, laden, entladen, leerlauf_s, groesse_mb=None, schaetzung_mb=0):
+        self.name = name
+        self._laden = laden
+        self._entladen = entladen
+        self._groesse_mb = groesse_mb          # optional: fragt die echte Größe ab (z. B. Ollama /api/ps)
+        self.leerlauf_s = float(KONFIG.get(f"leerlauf_{name}_s", leerlauf_s))
+        self.schaetzung_mb = schaetzung_mb
+        self.objekt = None
+        self.geladen = False
+        self.zuletzt = 0.0
+        self.gemessen_mb = 0.0
+        self.lock = threading.Lock()
+        self.laedt = threading.Event()
+
+    def groesse(self) -> float:
+        if not self.geladen:
+            return 0.0
+        if self._groesse_mb:
+            try:
+                return float(self._groesse_mb() or 0)
+            except Exception:
+                pass
+        return self.gemessen_mb or self.schaetzung_mb
+
+
+class RessourcenManager:
+    def __init__(self, budget_mb: float = SPEICHER_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self._ressourcen = {}
+        self._lock = threading.Lock()
+        self._waechter = None
+
+    def registrieren(self, name, laden, entladen, leerlauf_s=600, groesse_mb=None, schaetzung_mb=0):
+        """laden() liefert das Modellobjekt (None = nicht verfügbar), entladen(objekt) räumt extern auf"""
+        with self._lock:
+            if name not in self._ressourcen:
+                self._ressourcen[name] = Ressource(name, laden, entladen, leerlauf_s, groesse_mb, schaetzung_mb)
+            if self._waechter is None:
+                self._waechter = threading.Thread(target=self._waechter_schleife, name="pia-ressourcen", daemon=True)
+                self._waechter.start()
+
+    # ──────────────────────────────
+    # Benutzen / Laden
+    # ──────────────────────────────
+    def holen(self, name):
+        """Liefert das Modell und zählt das als Benutzung – lädt es bei Bedarf (blockierend)"""
+        r = self._ressourcen[name]
+        # Prüfen und als benutzt markieren unter r.lock: der Aufräumer entlädt nur unter demselben Lock und
+        # prüft dort den Leerlauf erneut – ein gerade geholtes Modell verschwindet so nicht unter dem Aufrufer
+        with r.lock:
+            if r.geladen:
+                r.zuletzt = time.monotonic()
+                return r.objekt
+        return self._laden(r)
+
+    def leerlauf_s(self, name) -> float:
+        r = self._ressourcen.get(name)
+        return r.leerlauf_s if r is not None else 0.0
+
+    def objekt(self, name):
+        """Das Modell, falls gerade geladen – sonst None. Zählt nicht als Benutzung"""
+        r = self._ressourcen.get(name)
+        return r.objekt if r is not None and r.geladen else None
+
+    def benutzt(self, name):
+        r = self._ressourcen.get(name)
+        if r is not None:
+            r.zuletzt = time.monotonic()
+
+    def vorwaermen(self, name):
+        """Lädt im Hintergrund – z. B. sobald das Mikrofon Sprache hört, noch vor dem Wake-Word.
+        Ist der Kreis des Backends offen (gesundheit.py, z. B. Ollama gestoppt), wird gar nicht erst versucht."""
+        r = self._ressourcen.get(name)
+        if r is None or r.geladen or r.laedt.is_set() or not GESUNDHEIT.verfuegbar(name):
+            return
+        threading.Thread(target=self._vorwaermen, args=(r,), name=f"pia-laden-{name}", daemon=True).start()
+
+    def _vorwaermen(self, r: Ressource):
+        # Niemand wartet auf das Ergebnis – Fehler landen im Log und beim Circuit Breaker statt als Traceback
+        try:
+            self._laden(r)
+        except Exception as e:
+            logging.warning(f"Ressource {r.name} ließ sich nicht vorladen: {e}")
+            GESUNDHEIT.fehler(r.name, e)
+        else:
+            GESUNDHEIT.erfolg(r.name)           # gibt auch einen halboffenen Probeaufruf wieder frei
+
+    def _laden(self, r: Ressource):
+        with r.lock:
+            if r.geladen:
+                r.zuletzt = time.monotonic()
+                return r.objekt
+            r.laedt.set()
+            try:
+                vorher = rss_mb()
+                start = time.perf_counter()
+                r.objekt = r._laden()
+                if r.objekt is None:            # nicht verfügbar (z. B. Piper ohne Modelldateien)
+                    return None
+                r.gemessen_mb = max(0.0, rss_mb() - vorher)
+                r.geladen = True
+                r.zuletzt = time.monotonic()
+                logging.info(f"Ressource {r.name} geladen in {time.perf_counter() - start:.1f}s "
+                             f"(~{r.groesse():.0f} MB)")
+            finally:
+                r.laedt.clear()
+        self._budget_pruefen(ausser=r.name)
+        return r.objekt
+
+    # ──────────────────────────────
+    # Entladen
+    # ──────────────────────────────
+    def entladen(self, name, leerlauf_min: float | None = None) -> bool:
+        """leerlauf_min: nur entladen, wenn das Modell (unter dem Lock geprüft) so lange ungenutzt ist"""
+        r = self._ressourcen.get(name)
+        if r is None:
+            return False
+        with r.lock:
+            if not r.geladen:
+                return False
+            if leerlauf_min is not None and time.monotonic() - r.zuletzt < leerlauf_min:
+                return False
+            objekt, r.objekt, r.geladen = r.objekt, None, False
+            try:
+                r._entladen(objekt)
+            except Exception as e:
+                logging.warning(f"Ressource {name} ließ sich nicht sauber entladen: {e}")
+            del objekt                          # letzte Referenz weg, dann Speicher wirklich freigeben
+            gc.collect()
+        logging.info(f"Ressource {name} entladen")
+        return True
+
+    def _budget_pruefen(self, ausser=None):
+        jetzt = time.monotonic()
+        geladen = [r for r in self._ressourcen.values() if r.geladen]
+        summe = sum(r.groesse() for r in geladen)
+        for r in sorted(geladen, key=lambda r: r.zuletzt):       # am längsten ungenutzt zuerst
+            if summe <= self.budget_mb:
+                break
+            if r.name == ausser or jetzt - r.zuletzt < SCHUTZZEIT:
+                continue
+            groesse = r.groesse()
+            if self.entladen(r.name, leerlauf_min=SCHUTZZEIT):
+                logging.info(f"Speicherbudget {self.budget_mb:.0f} MB überschritten → {r.name} entladen")
+                summe -= groesse
+
+    def aufraeumen(self):
+        jetzt = time.monotonic()
+        for r in list(self._ressourcen.values()):
+            if r.geladen and r.leerlauf_s > 0 and jetzt - r.zuletzt > r.leerlauf_s:
+                logging.info(f"Ressource {r.name} seit {jetzt - r.zuletzt:.0f}s ungenutzt")
+                self.entladen(r.name, leerlauf_min=r.leerlauf_s)
+        self._budget_pruefen()
+
+    def _waechter_schleife(self):
+        while True:
+            time.sleep(PRUEF_INTERVALL)
+            try:
+                self.aufraeumen()
+            except Exception as e:
+                logging.error(f"Ressourcen-Aufräumen fehlgeschlagen: {e}")
+
+    # ──────────────────────────────
+    # Übersicht ("modelle")
+    # ──────────────────────────────
+    def uebersicht(self) -> str:
+        jetzt = time.monotonic()
+        zeilen = [f"Pia4-Prozess: {rss_mb():.0f} MB RSS (PID {os.getpid()}) · Budget {self.budget_mb:.0f} MB"]
+        for r in self._ressourcen.values():
+            if r.geladen:
+                rest = max(0, r.leerlauf_s - (jetzt - r.zuletzt))
+                zustand = f"geladen  ~{r.groesse():.0f} MB, entladen in {rest:.0f}s"
+            else:
+                zustand = "lädt …" if r.laedt.is_set() else "nicht geladen"
+            zeilen.append(f"  {r.name:10} {zustand}")
+        return "\n".join(zeilen)
+
+
+RESSOURCEN = RessourcenManager()
+
+
+# Piper gehört zu utils – utils kann ressourcen aber nicht importieren (Zyklus), daher hier
+def _piper_registrieren():
+    import utils
+    RESSOURCEN.registrieren("piper", utils.piper_laden, lambda _: utils.piper_entladen(),
+                            leerlauf_s=300, schaetzung_mb=150)
+
+_piper_registrieren()
@@ -0,0 +1,160 @@
+# stt_vokabular.py – Vokabular für Whispers initial_prompt
+# Kleine Whisper-Modelle verhören sich vor allem bei Pias eigenen Wörtern: Befehls-Schlüsselwörter,
+# Programmnamen (thunderbird, playerctl), Orte (Eschwege), Termin- und Notizbegriffe. Whisper bekommt
+# diese Wörter als initial_prompt mit und bevorzugt sie beim Dekodieren. Das Vokabular wird automatisch
+# gesammelt und nur neu gebaut, wenn sich eine Quelle ändert (mtimes wie in gedaechtnis.py).
+#
+# Whisper behält vom Prompt nur die letzten ~220 Tokens – darum steht das Wichtigste am Ende:
+#   Notizen → Termine → Programme → Orte/eigene Wörter → Befehle
+# Das Wake-Word steht bewusst nicht darin: Whisper würde es sonst auch in Rauschen und fremde Sätze
+# hineinhören und Pia ungewollt wecken.
+
+import ast
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from utils import BASE_DIR, KONFIG, lade_json, logging
+
+MAX_ZEICHEN = int(KONFIG.get("stt_prompt_zeichen", 600))   # ≈ 200 Tokens bei deutschem Text
+MAX_NOTIZ_WOERTER = 15
+MAX_TERMINE = 15
+MAX_APPS = 40
+TERMIN_VORSCHAU_TAGE = 30
+CODE_DATEIEN = ("assistant_core.py", "media_backend.py")     # + alle *_tools.py
+
+_WORT = re.compile(r"[A-Za-zÄÖÜäöüß][\wÄÖÜäöüß-]{3,}")
+
+_lock = threading.Lock()
+_stand = None
+_prompt = ""
+
+
+# ──────────────────────────────
+# Quellen
+# ──────────────────────────────
+def _code_dateien() -> list:
+    return [BASE_DIR / n for n in CODE_DATEIEN] + sorted(BASE_DIR.glob("*_tools.py"))
+
+
+def _code_lesen() -> tuple[list[str], list[str], set[str]]:
+    """→ (Wörter aus *_KEYWORDS, Orte aus Tool-Standardwerten, Befehlsnamen aus String-Literalen)"""
+    schluessel, orte, woerter = [], [], set()
+    for pfad in _code_dateien():
+        try:
+            baum = ast.parse(pfad.read_text(encoding="utf-8"))
+        except (OSError, SyntaxError):
+            continue
+        for knoten in ast.walk(baum):
+            if isinstance(knoten, ast.Assign) and any(getattr(t, "id", "").endswith("_KEYWORDS") for t in knoten.targets):
+                try:
+                    schluessel.extend(ast.literal_eval(knoten.value))
+                except ValueError:
+                    pass
+            elif isinstance(knoten, ast.FunctionDef) and pfad.name.endswith("_tools.py"):
+                # z. B. wetter_holen(stadt="Eschwege") – eigennamenartige Standardwerte
+                for wert in knoten.args.defaults + knoten.args.kw_defaults:
+                    if isinstance(wert, ast.Constant) and isinstance(wert.value, str) and re.fullmatch(r"[A-ZÄÖÜ][a-zäöüß]{2,}", wert.value):
+                        orte.append(wert.value)
+            elif isinstance(knoten, ast.Constant) and isinstance(knoten.value, str) and knoten.value.strip():
+                # "thunderbird -compose …", ["playerctl", "play"] – das erste Wort ist der Programmname
+                woerter.add(knoten.value.split()[0])
+    # Phrasen wie "mach backup" / "backup machen" → einzelne Wörter, Whisper braucht jedes nur einmal
+    schluessel = [w for phrase in schluessel for w in phrase.split() if len(w) >= 4]
+    return schluessel, orte, woerter
+
+
+def _programme(code_woerter: set[str]) -> list[str]:
+    """Programme, die Pia selbst aufruft (im Code genannt und installiert), dann die Desktop-Apps"""
+    from app_index import index_laden
+    idx = index_laden(neu=True)
+    aufgerufen, desktop = [], []
+    for app in idx["apps"]:
+        exe = os.path.basename(str(app.get("exec", "")).split()[0]) if app.get("exec") else ""
+        if exe and exe in code_woerter and len(exe) >= 5:
+            aufgerufen.append(exe)
+        elif not app.get("versteckt") and any(art != "path" for _, art in app["begriffe"]):
+            desktop.append(app["name"])
+    return list(dict.fromkeys(aufgerufen + sorted(desktop, key=len)))[:MAX_APPS]
+
+
+def _termine() -> list[str]:
+    """Titel anstehender und wiederkehrender Termine"""
+    jetzt = datetime.now()
+    von, bis = jetzt.date().isoformat(), (jetzt + timedelta(days=TERMIN_VORSCHAU_TAGE)).isoformat()
+    titel = []
+    for e in lade_json("kalender.json", {"einträge": []}).get("einträge", []):
+        if e.get("titel") and e.get("wann") and (e.get("rrule") or von <= e["wann"] <= bis):
+            titel.append((e["wann"] if not e.get("rrule") else bis, e["titel"][:40]))
+    return list(dict.fromkeys(t for _, t in sorted(titel)))[:MAX_TERMINE]
+
+
+def _notiz_woerter() -> list[str]:
+    """Häufigste längere Wörter der letzten Notizen"""
+    notizen = lade_json("schnellnotizen.json", {"notizen": []}).get("notizen", [])[-50:]
+    zaehler = Counter(w for n in notizen for w in _WORT.findall(n.get("text", "")) if len(w) >= 5)
+    return [w for w, _ in zaehler.most_common(MAX_NOTIZ_WOERTER)]
+
+
+def _quellen_stand() -> tuple:
+    from app_index import desktop_verzeichnisse
+    pfade = _code_dateien() + [BASE_DIR / "kalender.json", BASE_DIR / "schnellnotizen.json"] + desktop_verzeichnisse()
+    stand = []
+    for p in pfade:
+        try:
+            stand.append((str(p), os.path.getmtime(p)))
+        except OSError:
+            stand.append((str(p), 0.0))
+    return tuple(stand)
+
+
+# ──────────────────────────────
+# Prompt
+# ──────────────────────────────
+def vokabular_sammeln() -> list[tuple[str, list[str]]]:
+    """[(Abschnitt, Wörter)] – unwichtigster Abschnitt zuerst"""
+    schluessel, orte, code_woerter = _code_lesen()
+    eigene = [str(w) for w in KONFIG.get("stt_vokabular", [])]
+    return [
+        ("notizen", _notiz_woerter()),
+        ("termine", _termine()),
+        ("programme", _programme(code_woerter)),
+        ("orte", list(dict.fromkeys(eigene + orte))),
+        ("befehle", list(dict.fromkeys(schluessel))),
+    ]
+
+
+def prompt_aus_vokabular(abschnitte: list[tuple[str, list[str]]], max_zeichen: int = MAX_ZEICHEN) -> str:
+    """Kommagetrennte Wortliste; passt nicht alles hinein, fällt der Anfang (unwichtigste Wörter) weg"""
+    gesehen, woerter = set(), []
+    for _, liste in reversed(abschnitte):
+        for w in reversed(liste):
+            if w.lower() not in gesehen:
+                gesehen.add(w.lower())
+                woerter.append(w)
+    teile, laenge = [], 0
+    for w in woerter:
+        if laenge + len(w) + 2 > max_zeichen:
+            break
+        teile.append(w)
+        laenge += len(w) + 2
+    return ", ".join(reversed(teile)) + "." if teile else ""
+
+
+def prompt_bauen(erzwingen: bool = False) -> str:
+    """initial_prompt für Whisper – neu gebaut nur, wenn sich Code, Kalender, Notizen oder Apps geändert haben"""
+    global _stand, _prompt
+    with _lock:
+        stand = _quellen_stand()
+        if erzwingen or stand != _stand:
+            _prompt = prompt_aus_vokabular(vokabular_sammeln())
+            _stand = stand
+            logging.info(f"STT-Vokabular neu gebaut ({len(_prompt)} Zeichen)")
+        return _prompt
+
+
+if __name__ == "__main__":
+    for abschnitt, liste in vokabular_sammeln():
+        print(f"{abschnitt:10} ({len(liste)}): {', '.join(liste)[:300]}")
+    print(f"\nPrompt ({len(prompt_bauen(erzwingen=True))} Zeichen):\n{prompt_bauen()}")
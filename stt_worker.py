@@ -0,0 +1,300 @@
+# stt_worker.py – Whisper in einem eigenen Prozess
+# Der Audio-Callback schreibt nur noch in einen Ringpuffer im Shared Memory (kein Queue, kein Lock,
+# blockiert nie). Ein Worker-Prozess liest daraus, transkribiert und schickt den Text über eine Pipe
+# zurück. CTranslate2 und der GIL des Workers bremsen so weder Aufnahme noch Befehle oder TTS.
+# Stirbt der Worker, startet der Hauptprozess ihn neu – der Ring behält die letzten Sekunden.
+#
+# Dieses Modul wird im Worker neu importiert (spawn) – darum hier kein utils-Import auf Modulebene.
+
+import atexit
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SAMPLERATE = 16000
+RING_SEKUNDEN = 30
+FENSTER_S = 10                  # so viel Audio sieht Whisper pro Durchlauf (wie bisher)
+SCHRITT_S = 0.5                 # neu transkribieren, sobald so viel neues Audio da ist
+START_TIMEOUT = 180             # Modell laden kann beim ersten Mal dauern (Download)
+NEUSTART_PAUSE_MAX = 30.0
+
+_KOPF = 16                      # Bytes vor den Samples: Schreibposition (uint64) + Reserve
+
+
+# ──────────────────────────────
+# Ringpuffer im Shared Memory
+# ──────────────────────────────
+class AudioRing:
+    """Ein Schreiber (Audio-Callback), beliebig viele Leser. Die Position zählt alle je geschriebenen
+    Samples; sie wird erst nach den Daten erhöht, Leser sehen also nie halb geschriebene Blöcke."""
+
+    def __init__(self, kapazitaet: int = SAMPLERATE * RING_SEKUNDEN, name: str | None = None):
+        self.kapazitaet = kapazitaet
+        self.besitzer = name is None
+        if self.besitzer:
+            self._shm = shared_memory.SharedMemory(create=True, size=_KOPF + 4 * kapazitaet)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._pos = np.ndarray((1,), dtype=np.uint64, buffer=self._shm.buf[:8])
+        self._daten = np.ndarray((kapazitaet,), dtype=np.float32, buffer=self._shm.buf[_KOPF:])
+        if self.besitzer:
+            self._pos[0] = 0
+
+    def position(self) -> int:
+        return int(self._pos[0])
+
+    def schreiben(self, samples: np.ndarray):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        pos = int(self._pos[0])
+        n = len(samples)
+        if n > self.kapazitaet:
+            samples, pos = samples[-self.kapazitaet:], pos + n - self.kapazitaet
+            n = self.kapazitaet
+        start = pos % self.kapazitaet
+        teil = min(n, self.kapazitaet - start)
+        self._daten[start:start + teil] = samples[:teil]
+        if teil < n:
+            self._daten[:n - teil] = samples[teil:]
+        self._pos[0] = pos + n
+
+    def lesen_ab(self, pos: int):
+        """→ (samples, neue_position, verlorene_samples) – verloren, wenn der Leser überrundet wurde"""
+        ende = int(self._pos[0])
+        verloren = max(0, ende - pos - self.kapazitaet)
+        pos = max(pos, ende - self.kapazitaet)
+        if ende <= pos:
+            return np.empty(0, dtype=np.float32), ende, verloren
+        a, b = pos % self.kapazitaet, ende % self.kapazitaet
+        if a < b:
+            samples = self._daten[a:b].copy()
+        else:
+            samples = np.concatenate((self._daten[a:], self._daten[:b]))
+        # Während des Kopierens überschrieben? Dann ist der Anfang unbrauchbar
+        ueberholt = int(self._pos[0]) - self.kapazitaet - pos
+        if ueberholt > 0:
+            samples = samples[ueberholt:]
+            verloren += ueberholt
+        return samples, ende, verloren
+
+    def schliessen(self):
+        # numpy-Sichten zuerst loslassen, sonst verweigert SharedMemory.close() den Dienst
+        self._pos = self._daten = None
+        try:
+            self._shm.close()
+            if self.besitzer:
+                self._shm.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
+
+
+# ──────────────────────────────
+# Worker-Prozess
+# ──────────────────────────────
+def modell_laden(modell: str, device: str, compute_type: str):
+    from faster_whisper import WhisperModel
+    return WhisperModel(modell, device=device, compute_type=compute_type,
+                        cpu_threads=8, num_workers=4)             # Ryzen 5600X → 8 Threads sinnvoll
+
+
+def transkribieren(model, audio: np.ndarray, prompt: str = "") -> str:
+    """Ein Fenster transkribieren – prompt (Vokabular, siehe stt_vokabular.py) lenkt die Wortwahl"""
+    segments, _ = model.transcribe(
+        audio,
+        language="de",
+        initial_prompt=prompt or None,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=400, max_speech_duration_s=12),
+    )
+    # Segmente sind ein Generator – die eigentliche Arbeit passiert beim Durchlaufen
+    return " ".join(s.text.strip() for s in segments if s.text.strip()).lower().strip()
+
+
+def _worker_main(ring_name: str, kapazitaet: int, verbindung, modell: str, device: str, compute_type: str, prompt: str,
+                 generation: int):
+    ring = AudioRing(kapazitaet, name=ring_name)
+    try:
+        model = modell_laden(modell, device, compute_type)
+    except Exception as e:
+        verbindung.send(("fehler", f"{type(e).__name__}: {e}"))
+        return
+    verbindung.send(("bereit", os.getpid()))
+
+    fenster, schritt = int(SAMPLERATE * FENSTER_S), int(SAMPLERATE * SCHRITT_S)
+    # Mit den letzten Sekunden im Ring anfangen – dort steckt evtl. schon das Wake-Word
+    pos = max(0, ring.position() - fenster)
+    puffer = np.empty(0, dtype=np.float32)
+    neu_seit = 0
+
+    while True:
+        if verbindung.poll(0.05):
+            nachricht = verbindung.recv()
+            if nachricht[0] == "ende":
+                return
+            if nachricht[0] == "reset":
+                puffer, pos, neu_seit = np.empty(0, dtype=np.float32), ring.position(), 0
+                generation = nachricht[1]
+            elif nachricht[0] == "prompt":
+                prompt = nachricht[1]
+            continue
+
+        samples, pos, verloren = ring.lesen_ab(pos)
+        if len(samples):
+            puffer = np.concatenate((puffer, samples))[-fenster:]
+            neu_seit += len(samples)
+        if neu_seit < schritt:
+            continue
+        neu_seit = 0
+
+        start = time.perf_counter()
+        text = transkribieren(model, puffer, prompt)
+        dauer_ms = (time.perf_counter() - start) * 1000
+        verbindung.send(("text", text, dauer_ms, len(puffer) / SAMPLERATE, verloren, generation))
+
+
+# ──────────────────────────────
+# Steuerung im Hauptprozess
+# ──────────────────────────────
+class SttWorker:
+    """Startet den Worker, liest seine Transkripte und startet ihn nach einem Absturz neu.
+    bei_text(text, dauer_ms, sekunden, generation) läuft im Leser-Thread. Jeder Reset erhöht die Generation;
+    Transkripte, die der Worker noch vor dem Reset begonnen hat, kommen mit der alten an und werden verworfen."""
+
+    def __init__(self, ring: AudioRing, modell: str, device: str, compute_type: str, bei_text, prompt: str = ""):
+        self.ring = ring
+        self._args = (modell, device, compute_type)
+        self.prompt = prompt                    # überlebt Neustarts des Workers
+        self.generation = 0
+        self._bei_text = bei_text
+        self._ctx = mp.get_context("spawn")     # kein fork: Threads und CUDA im Hauptprozess
+        self._prozess = None
+        self._verbindung = None
+        self._beendet = False
+        self._lock = threading.Lock()
+        self.statistik = {"transkripte": 0, "neustarts": 0, "ring_verloren_s": 0.0, "letzte_dauer_ms": 0.0, "veraltet": 0}
+
+    @property
+    def pid(self) -> int | None:
+        return self._prozess.pid if self._prozess else None
+
+    def _prozess_starten(self):
+        eltern, kind = self._ctx.Pipe()
+        prozess = self._ctx.Process(target=_worker_main, name="pia-stt",
+                                    args=(self.ring.name, self.ring.kapazitaet, kind, *self._args, self.prompt,
+                                          self.generation), daemon=True)
+        prozess.start()
+        kind.close()
+        if not eltern.poll(START_TIMEOUT):
+            prozess.kill()
+            raise RuntimeError(f"STT-Worker nicht bereit nach {START_TIMEOUT}s")
+        try:
+            nachricht = eltern.recv()
+        except EOFError:
+            raise RuntimeError(f"STT-Worker beim Start beendet (Exit-Code {prozess.exitcode})") from None
+        if nachricht[0] != "bereit":
+            prozess.join(5)
+            raise RuntimeError(f"STT-Worker: {nachricht[1]}")
+        with self._lock:
+            self._prozess, self._verbindung = prozess, eltern
+        logging.info(f"STT-Worker läuft (PID {prozess.pid})")
+
+    def starten(self) -> "SttWorker":
+        self._prozess_starten()
+        threading.Thread(target=self._leser, name="pia-stt-leser", daemon=True).start()
+        return self
+
+    def _leser(self):
+        pause = 1.0
+        while not self._beendet:
+            try:
+                nachricht = self._verbindung.recv()
+            except (EOFError, OSError):
+                if self._beendet:
+                    return
+                self._prozess.join(1)
+                logging.error(f"STT-Worker abgestürzt (Exit-Code {self._prozess.exitcode}) – Neustart in {pause:.0f}s")
+                time.sleep(pause)
+                try:
+                    self._prozess_starten()
+                    self.statistik["neustarts"] += 1
+                    pause = 1.0
+                except Exception as e:
+                    logging.error(f"STT-Worker-Neustart fehlgeschlagen: {e}")
+                    pause = min(NEUSTART_PAUSE_MAX, pause * 2)
+                continue
+
+            if nachricht[0] == "text":
+                _, text, dauer_ms, sekunden, verloren, generation = nachricht
+                if generation != self.generation:
+                    self.statistik["veraltet"] += 1
+                    continue
+                self.statistik["transkripte"] += 1
+                self.statistik["letzte_dauer_ms"] = round(dauer_ms, 1)
+                self.statistik["ring_verloren_s"] += verloren / SAMPLERATE
+                try:
+                    self._bei_text(text, dauer_ms, sekunden, generation)
+                except Exception as e:
+                    logging.error(f"STT-Verarbeitung fehlgeschlagen: {e}", exc_info=True)
+
+    def zuruecksetzen(self) -> int:
+        """Puffer im Worker leeren (nach erkanntem Befehl) → neue Generation"""
+        with self._lock:
+            self.generation += 1
+            try:
+                self._verbindung.send(("reset", self.generation))
+            except (OSError, AttributeError):
+                pass
+            return self.generation
+
+    def prompt_setzen(self, prompt: str):
+        """Neues Vokabular – gilt ab dem nächsten Durchlauf, ohne das Modell neu zu laden"""
+        with self._lock:
+            self.prompt = prompt
+            try:
+                self._verbindung.send(("prompt", prompt))
+            except (OSError, AttributeError):
+                pass
+
+    def beenden(self):
+        self._beendet = True
+        with self._lock:
+            prozess, verbindung = self._prozess, self._verbindung
+        if prozess is None:
+            return
+        try:
+            verbindung.send(("ende",))
+        except OSError:
+            pass
+        prozess.join(3)
+        if prozess.is_alive():
+            prozess.kill()
+            prozess.join(1)
+        verbindung.close()
+        logging.info("STT-Worker beendet")
+
+
+# ──────────────────────────────
+# Gemeinsamer Zustand im Hauptprozess
+# ──────────────────────────────
+# voice_tools.py wird per Hot-Reload neu importiert, dieses Modul nicht. Ring und Transkript-Queue leben
+# darum hier – Mikrofon-Callback, Listener und der bei RESSOURCEN registrierte Worker sehen nach einem
+# Reload weiter dieselben Objekte.
+transkripte = queue.Queue(maxsize=30)   # (Generation, Text) – siehe SttWorker.zuruecksetzen
+_ring = None
+_ring_lock = threading.Lock()
+
+
+def gemeinsamer_ring() -> AudioRing:
+    """Der eine Audio-Ring des Hauptprozesses (beim ersten Aufruf angelegt, bei Prozessende freigegeben)"""
+    global _ring
+    with _ring_lock:
+        if _ring is None:
+            _ring = AudioRing()
+            atexit.register(_ring.schliessen)
+        return _ring
@@ -1,30 +1,32 @@
 # system_tools.py – einfache Linux-Systembefehle
 
-from utils import system_befehl, sprich, logging   # ← nur system_befehl
+from utils import system_befehl, sprich, logging
+from media_backend import MEDIEN
 
 def system_aktion(aktion: str):
     aktion = aktion.lower().strip()
     
-    if aktion in ("lauter", "lautstärke hoch"):
-        system_befehl("pactl set-sink-volume @DEFAULT_SINK@ +5%")
+    # auch ganze Sätze wie "mach lauter" zulassen
+    if any(w in aktion for w in ("lauter", "lautstärke hoch")):
+        MEDIEN.system_lautstaerke(+5)
         return "Lauter gemacht"
     
-    elif aktion in ("leiser", "lautstärke runter"):
-        system_befehl("pactl set-sink-volume @DEFAULT_SINK@ -5%")
+    elif any(w in aktion for w in ("leiser", "lautstärke runter")):
+        MEDIEN.system_lautstaerke(-5)
         return "Leiser gemacht"
     
-    elif aktion == "stumm":
-        system_befehl("pactl set-sink-mute @DEFAULT_SINK@ toggle")
+    elif any(w in aktion for w in ("stumm", "mute")):
+        MEDIEN.system_stumm()
         return "Stummschaltung umgeschaltet"
     
     elif aktion in ("ausschalten", "herunterfahren", "shutdown"):
         sprich("Fahre in einer Minute herunter …")
-        system_befehl("shutdown -h +1")
+        system_befehl(["shutdown", "-h", "+1"], shell=False)
         return "Herunterfahren in 60 Sekunden initiiert"
     
     elif aktion in ("neustart", "reboot"):
         sprich("Starte neu …")
-        system_befehl("reboot")
+        system_befehl(["reboot"], shell=False)
         return "Neustart wird durchgeführt"
     
     else:
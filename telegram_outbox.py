@@ -0,0 +1,279 @@
+# telegram_outbox.py – dauerhafte Warteschlange für Telegram-Nachrichten
+# utils.telegram_senden() legt nur ab (JSON auf Platte) und kehrt sofort zurück. Ein Hintergrund-Thread
+# sammelt kurz hintereinander eintreffende Nachrichten zu einer, hält das Rate-Limit der Bot-API ein
+# und wiederholt Fehlschläge mit wachsendem Abstand. Was beim Beenden noch offen ist, geht beim
+# nächsten Start raus.
+#
+# Lokaler Ersatz für die Bot-API zum Testen:
+#   python telegram_outbox.py --stand-in 8081        (optional --429 jede 3. Anfrage)
+#   PIA4_TELEGRAM_API_URL=http://127.0.0.1:8081 + beliebiger Token/Chat in pia4_konfig.json
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from utils import KONFIG, logging, lade_json, speichere_json, http_anfrage
+
+DATEI = "telegram_outbox.json"
+API_URL = "https://api.telegram.org"
+BATCH_FENSTER = 1.5            # Sekunden warten, ob noch weitere Nachrichten kommen
+MIN_ABSTAND = 1.1              # Bot-API: ca. 1 Nachricht pro Sekunde und Chat
+MAX_LAENGE = 4096              # Telegram-Limit pro Nachricht – längere werden beim Ablegen aufgeteilt
+MAX_CAPTION = 1024             # Bildunterschrift eines Anhangs
+MAX_VERSUCHE = 8
+BACKOFF_START, BACKOFF_MAX = 2.0, 300.0
+
+_lock = threading.Condition()
+_thread = None
+_letzter_versand = 0.0
+_hinweis_gegeben = False
+statistik = {"abgelegt": 0, "gesendet": 0, "batches": 0, "wiederholt": 0, "gedrosselt": 0, "verworfen": 0}
+
+
+def _konfig():
+    token = KONFIG.get("telegram_bot_token", "")
+    chat_id = KONFIG.get("telegram_chat_id", "")
+    api = str(KONFIG.get("telegram_api_url") or os.getenv("PIA4_TELEGRAM_API_URL") or API_URL).rstrip("/")
+    return token, chat_id, api
+
+
+def konfiguriert() -> bool:
+    token, chat_id, _ = _konfig()
+    return bool(token and chat_id)
+
+
+def _laden() -> dict:
+    # Kopie – der lade_json-Cache darf nicht nebenbei verändert werden
+    daten = lade_json(DATEI, {"nachrichten": [], "fehlgeschlagen": []}, use_cache=False)
+    daten.setdefault("nachrichten", [])
+    daten.setdefault("fehlgeschlagen", [])
+    return daten
+
+
+# ──────────────────────────────
+# Ablegen
+# ──────────────────────────────
+def _aufteilen(text: str, laenge: int) -> list[str]:
+    """Text in Stücke ≤ laenge – möglichst an Zeilen-, sonst an Wortgrenzen"""
+    teile = []
+    while len(text) > laenge:
+        schnitt = text.rfind("\n", 0, laenge + 1)
+        if schnitt <= 0:
+            schnitt = text.rfind(" ", 0, laenge + 1)
+        if schnitt <= 0:
+            schnitt = laenge
+        teile.append(text[:schnitt])
+        text = text[schnitt:].lstrip("\n ")
+    return teile + [text]
+
+
+def ablegen(text: str, anhang=None, parse_mode: str | None = None) -> bool:
+    """Legt eine Nachricht dauerhaft ab und startet bei Bedarf den Sender – blockiert nicht auf das Netz.
+    Zu lange Texte werden zu mehreren Nachrichten (jede für sich wiederholbar, Reihenfolge bleibt)."""
+    global _hinweis_gegeben
+    if not konfiguriert():
+        if not _hinweis_gegeben:
+            logging.warning("Telegram nicht konfiguriert (telegram_bot_token / telegram_chat_id) – Nachrichten werden verworfen")
+            _hinweis_gegeben = True
+        return False
+    text = str(text)
+    teile = [(str(anhang), t) for t in _aufteilen(text, MAX_CAPTION)[:1]] if anhang else []
+    rest = text[len(teile[0][1]):].lstrip("\n ") if teile else text
+    if rest or not teile:
+        teile += [(None, t) for t in _aufteilen(rest, MAX_LAENGE)]
+    erstellt = datetime.now().isoformat(timespec="seconds")
+    eintraege = [{
+        "id": uuid.uuid4().hex[:12],
+        "text": t,
+        "anhang": a,
+        "parse_mode": parse_mode,
+        "erstellt": erstellt,
+        "versuche": 0,
+        "naechster_versuch": 0.0,
+    } for a, t in teile]
+    with _lock:
+        daten = _laden()
+        daten["nachrichten"].extend(eintraege)
+        speichere_json(DATEI, daten)
+        statistik["abgelegt"] += 1
+        _lock.notify()
+    outbox_starten()
+    return True
+
+
+def outbox_starten():
+    """Startet den Sender-Thread einmalig (auch für Reste aus dem letzten Lauf)"""
+    global _thread
+    with _lock:
+        if _thread is None and konfiguriert():
+            _thread = threading.Thread(target=_sender_schleife, name="pia-telegram", daemon=True)
+            _thread.start()
+
+
+def offen() -> int:
+    with _lock:
+        return len(_laden()["nachrichten"])
+
+
+# ──────────────────────────────
+# Senden
+# ──────────────────────────────
+def _batch_bilden(nachrichten: list, jetzt: float) -> list:
+    """Fällige Textnachrichten gleichen Formats zusammenfassen (bis MAX_LAENGE); Anhänge einzeln"""
+    faellig = [n for n in nachrichten if n["naechster_versuch"] <= jetzt]
+    if not faellig:
+        return []
+    erste = faellig[0]
+    if erste["anhang"]:
+        return [erste]
+    batch, laenge = [], 0
+    for n in faellig:
+        if n["anhang"] or n["parse_mode"] != erste["parse_mode"]:
+            break
+        if batch and laenge + len(n["text"]) + 2 > MAX_LAENGE:
+            break
+        batch.append(n)
+        laenge += len(n["text"]) + 2
+    return batch
+
+
+def _senden(batch: list):
+    """→ (ok, dauerhaft_fehlgeschlagen, retry_after)"""
+    token, chat_id, api = _konfig()
+    erste = batch[0]
+    try:
+        if erste["anhang"]:
+            with open(erste["anhang"], "rb") as f:
+                r = http_anfrage("POST", f"{api}/bot{token}/sendDocument",
+                                 data={"chat_id": chat_id, "caption": erste["text"][:MAX_CAPTION]},
+                                 files={"document": f}, timeout=(3.05, 60))
+        else:
+            daten = {"chat_id": chat_id, "text": "\n\n".join(n["text"] for n in batch)[:MAX_LAENGE]}
+            if erste["parse_mode"]:
+                daten["parse_mode"] = erste["parse_mode"]
+            r = http_anfrage("POST", f"{api}/bot{token}/sendMessage", json=daten)
+    except FileNotFoundError:
+        return False, True, None
+    except Exception as e:
+        logging.warning(f"Telegram nicht erreichbar: {e}")
+        return False, False, None
+
+    if r.status_code == 200:
+        return True, False, None
+    if r.status_code == 429:
+        try:
+            return False, False, float(r.json()["parameters"]["retry_after"])
+        except Exception:
+            return False, False, BACKOFF_START
+    # 400/401/403/404: Nachricht oder Konfiguration kaputt – Wiederholen hilft nicht
+    dauerhaft = 400 <= r.status_code < 500
+    logging.warning(f"Telegram HTTP {r.status_code}: {r.text[:200]}")
+    return False, dauerhaft, None
+
+
+def _sender_schleife():
+    global _letzter_versand
+    while True:
+        with _lock:
+            while True:
+                nachrichten = _laden()["nachrichten"]
+                jetzt = time.time()
+                if nachrichten:
+                    naechster = min(n["naechster_versuch"] for n in nachrichten)
+                    if naechster <= jetzt:
+                        break
+                    _lock.wait(timeout=naechster - jetzt)
+                else:
+                    _lock.wait()
+            # Kurz sammeln: weitere Nachrichten im Fenster landen im selben Batch
+            ende = time.monotonic() + BATCH_FENSTER
+            while (rest := ende - time.monotonic()) > 0:
+                _lock.wait(timeout=rest)
+
+        pause = _letzter_versand + MIN_ABSTAND - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+
+        with _lock:
+            batch = _batch_bilden(_laden()["nachrichten"], time.time())
+        if not batch:
+            continue
+
+        ok, dauerhaft, retry_after = _senden(batch)
+        _letzter_versand = time.monotonic()
+        if retry_after is not None:
+            # 429 gilt für den ganzen Chat – auch der nächste Batch wartet
+            _letzter_versand += retry_after - MIN_ABSTAND
+        ids = {n["id"] for n in batch}
+
+        with _lock:
+            daten = _laden()
+            if ok:
+                daten["nachrichten"] = [n for n in daten["nachrichten"] if n["id"] not in ids]
+                statistik["gesendet"] += len(batch)
+                statistik["batches"] += 1
+            else:
+                for n in daten["nachrichten"]:
+                    if n["id"] not in ids:
+                        continue
+                    if retry_after is not None:
+                        # 429: die Nachricht ist in Ordnung, nur zu früh – zählt nicht als Fehlversuch
+                        n["naechster_versuch"] = time.time() + retry_after
+                        statistik["gedrosselt"] += 1
+                        continue
+                    n["versuche"] += 1
+                    if dauerhaft or n["versuche"] >= MAX_VERSUCHE:
+                        n["verworfen"] = datetime.now().isoformat(timespec="seconds")
+                        daten["fehlgeschlagen"] = (daten["fehlgeschlagen"] + [n])[-100:]
+                        statistik["verworfen"] += 1
+                        logging.error(f"Telegram-Nachricht {n['id']} aufgegeben nach {n['versuche']} Versuch(en)")
+                    else:
+                        warten = min(BACKOFF_MAX, BACKOFF_START * 2 ** (n["versuche"] - 1))
+                        n["naechster_versuch"] = time.time() + warten
+                        statistik["wiederholt"] += 1
+                daten["nachrichten"] = [n for n in daten["nachrichten"] if "verworfen" not in n]
+            speichere_json(DATEI, daten)
+
+
+# ──────────────────────────────
+# Lokaler Stand-in der Bot-API
+# ──────────────────────────────
+def stand_in(port: int = 8081, jede_n_te_429: int = 0):
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    zaehler = {"n": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            zaehler["n"] += 1
+            laenge = int(self.headers.get("Content-Length", 0))
+            koerper = self.rfile.read(laenge)
+            if jede_n_te_429 and zaehler["n"] % jede_n_te_429 == 0:
+                antwort, status = {"ok": False, "error_code": 429, "parameters": {"retry_after": 2}}, 429
+            else:
+                antwort, status = {"ok": True, "result": {"message_id": zaehler["n"]}}, 200
+                print(f"[Stand-in] {self.path.split('/')[-1]}: {koerper[:300].decode('utf-8', 'replace')}")
+            daten = json.dumps(antwort).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(daten)))
+            self.end_headers()
+            self.wfile.write(daten)
+
+        def log_message(self, *args):
+            pass
+
+    print(f"Telegram-Stand-in auf http://127.0.0.1:{port} (Ctrl+C beendet)")
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    import sys
+    if "--stand-in" in sys.argv:
+        i = sys.argv.index("--stand-in")
+        port = int(sys.argv[i + 1]) if len(sys.argv) > i + 1 and sys.argv[i + 1].isdigit() else 8081
+        stand_in(port, 3 if "--429" in sys.argv else 0)
+    else:
+        print(f"Offene Nachrichten: {offen()}")
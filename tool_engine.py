@@ -0,0 +1,171 @@
+# tool_engine.py – asyncio-Kern für Tools
+# async-def-Tools laufen direkt im Event-Loop, normale (sync) Tools transparent im Thread-Pool.
+# Jeder Aufruf hat einen Timeout und kann über alle_abbrechen() ("stopp") gecancelt werden.
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+from tracing import span
+
+STANDARD_TIMEOUT = 60          # Sekunden, falls ein Tool keinen eigenen Timeout hat
+MAX_WORKER = 16                # Thread-Pool für synchrone Tools
+
+
+def tool_timeout(sekunden: float):
+    """Decorator: eigener Timeout für ein Tool – das tools_holen()-Tupel bleibt unverändert"""
+    def deko(func):
+        func.pia_timeout = sekunden
+        return func
+    return deko
+
+
+def ist_async(func) -> bool:
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+class ToolEngine:
+    def __init__(self, max_worker: int = MAX_WORKER):
+        self._max_worker = max_worker
+        self._loop = None
+        self._thread = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self._laufend = set()          # asyncio.Tasks aller Aufrufe in Bearbeitung
+
+    # ──────────────────────────────
+    # Event-Loop im Hintergrund-Thread
+    # ──────────────────────────────
+    def _loop_holen(self):
+        with self._lock:
+            if self._loop is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._max_worker, thread_name_prefix="pia-tool"
+                )
+                self._loop = asyncio.new_event_loop()
+                self._loop.set_default_executor(self._pool)
+                bereit = threading.Event()
+
+                def laufen():
+                    asyncio.set_event_loop(self._loop)
+                    self._loop.call_soon(bereit.set)
+                    self._loop.run_forever()
+
+                self._thread = threading.Thread(target=laufen, name="pia-engine", daemon=True)
+                self._thread.start()
+                bereit.wait()
+                logging.debug(f"ToolEngine gestartet ({self._max_worker} Worker)")
+            return self._loop
+
+    def _im_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    # ──────────────────────────────
+    # Aufrufen
+    # ──────────────────────────────
+    async def aufrufen(self, func, *args, timeout: float | None = None, **kwargs):
+        """Coroutine: führt ein Tool (sync oder async) mit Timeout aus"""
+        if timeout is None:
+            timeout = getattr(func, "pia_timeout", STANDARD_TIMEOUT)
+
+        if ist_async(func):
+            arbeit = func(*args, **kwargs)
+        else:
+            # Kontext (z. B. Befehls-ID) in den Worker-Thread mitnehmen
+            ctx = contextvars.copy_context()
+            arbeit = asyncio.get_running_loop().run_in_executor(
+                self._pool, functools.partial(ctx.run, func, *args, **kwargs)
+            )
+
+        task = asyncio.ensure_future(asyncio.wait_for(arbeit, timeout))
+        self._laufend.add(task)
+        try:
+            with span("tool", getattr(func, "__name__", str(func))):
+                return await task
+        except asyncio.TimeoutError:
+            name = getattr(func, "__name__", str(func))
+            logging.warning(f"Tool {name} nach {timeout}s abgebrochen (Timeout)")
+            raise TimeoutError(f"{name}: Timeout nach {timeout}s")
+        finally:
+            self._laufend.discard(task)
+
+    def starten(self, func, *args, timeout: float | None = None, **kwargs) -> concurrent.futures.Future:
+        """Startet ein Tool im Hintergrund und liefert sofort ein Future zurück"""
+        loop = self._loop_holen()
+        return asyncio.run_coroutine_threadsafe(self.aufrufen(func, *args, timeout=timeout, **kwargs), loop)
+
+    def ausfuehren(self, func, *args, timeout: float | None = None, **kwargs):
+        """Blockierender Aufruf – TimeoutError bzw. concurrent.futures.CancelledError bei Abbruch"""
+        if self._im_loop_thread():
+            # Aus dem Loop selbst darf nicht blockierend gewartet werden
+            if ist_async(func):
+                raise RuntimeError("async-Tool aus dem Event-Loop bitte mit 'await engine.aufrufen()' starten")
+            return func(*args, **kwargs)
+        return self.starten(func, *args, timeout=timeout, **kwargs).result()
+
+    # ──────────────────────────────
+    # Abbrechen / Beenden
+    # ──────────────────────────────
+    def laufende(self) -> int:
+        return len(self._laufend)
+
+    def alle_abbrechen(self) -> int:
+        """Bricht alle laufenden Tool-Aufrufe ab. Sync-Tools im Thread laufen im Hintergrund zu Ende,
+        ihr Ergebnis wird aber verworfen – der Aufrufer ist sofort wieder frei."""
+        if self._loop is None:
+            return 0
+
+        async def abbrechen():
+            tasks = list(self._laufend)
+            for t in tasks:
+                t.cancel()
+            return len(tasks)
+
+        anzahl = asyncio.run_coroutine_threadsafe(abbrechen(), self._loop).result(timeout=5)
+        if anzahl:
+            logging.info(f"ToolEngine: {anzahl} laufende Aufgabe(n) abgebrochen")
+        return anzahl
+
+    def beenden(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._loop = self._thread = self._pool = None
+
+
+ENGINE = ToolEngine()
+
+
+def tool_ausfuehren(func, *args, timeout: float | None = None, **kwargs):
+    """Kurzform für ENGINE.ausfuehren()"""
+    return ENGINE.ausfuehren(func, *args, timeout=timeout, **kwargs)
+
+
+if __name__ == "__main__":
+    import time
+
+    def langsam(x):
+        time.sleep(x)
+        return f"fertig nach {x}s"
+
+    async def schnell_async():
+        await asyncio.sleep(0.1)
+        return "async fertig"
+
+    print(tool_ausfuehren(langsam, 0.2))
+    print(tool_ausfuehren(schnell_async))
+    try:
+        tool_ausfuehren(langsam, 2, timeout=0.5)
+    except TimeoutError as e:
+        print(f"Timeout: {e}")
+
+    f = ENGINE.starten(langsam, 3)
+    time.sleep(0.2)
+    print(f"Abgebrochen: {ENGINE.alle_abbrechen()}")
+    print(f"Future abgebrochen: {f.cancelled()}")
@@ -0,0 +1,183 @@
+# tracing.py – leichte Latenz-Spans für den Befehlsweg (STT → Routing → Tool → Ollama → TTS)
+# Spans landen als JSONL in traces.jsonl (Schreiben im Hintergrund-Thread), Perzentile seit Start
+# gibt statistik() aus, chrome_trace_exportieren() erzeugt eine Datei für chrome://tracing / Perfetto.
+# Die Datei rotiert wie pia4.log: über TRACE_MAX_BYTES wird sie zu traces.jsonl.1 (… .TRACE_BACKUPS).
+# Bewusst nur Standardbibliothek, damit utils es ohne Kreisimport nutzen kann.
+
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__))).resolve()
+TRACE_DATEI = BASE_DIR / "traces.jsonl"
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+MAX_WERTE = 5000                # pro Stufe/Tool für die Perzentile
+
+SITZUNG = uuid.uuid4().hex[:8]
+BEFEHL_ID = contextvars.ContextVar("befehl_id", default=None)
+
+_werte = defaultdict(lambda: deque(maxlen=MAX_WERTE))    # (stufe, name) → Dauern in ms
+_werte_lock = threading.Lock()
+_schreib_queue = queue.Queue()
+_schreiber = None
+
+
+def neue_befehl_id() -> str:
+    """Setzt eine neue Befehls-ID im aktuellen Kontext (wird in Worker-Threads mitgenommen)"""
+    bid = uuid.uuid4().hex[:10]
+    BEFEHL_ID.set(bid)
+    return bid
+
+
+def _trace_dateien() -> list[Path]:
+    """Rotierte Dateien zuerst (älteste vorn), dann die aktuelle"""
+    alte = [TRACE_DATEI.with_name(f"{TRACE_DATEI.name}.{i}") for i in range(TRACE_BACKUPS, 0, -1)]
+    return [p for p in alte + [TRACE_DATEI] if p.exists()]
+
+
+def _rotieren():
+    for i in range(TRACE_BACKUPS - 1, 0, -1):
+        quelle = TRACE_DATEI.with_name(f"{TRACE_DATEI.name}.{i}")
+        if quelle.exists():
+            os.replace(quelle, TRACE_DATEI.with_name(f"{TRACE_DATEI.name}.{i + 1}"))
+    if TRACE_BACKUPS:
+        os.replace(TRACE_DATEI, TRACE_DATEI.with_name(f"{TRACE_DATEI.name}.1"))
+    else:
+        TRACE_DATEI.unlink()
+
+
+def _schreiben():
+    f = open(TRACE_DATEI, "a", encoding="utf-8")
+    try:
+        while True:
+            eintrag = _schreib_queue.get()
+            if eintrag is None:
+                return
+            if isinstance(eintrag, threading.Event):        # chrome_trace_exportieren wartet darauf
+                f.flush()
+                eintrag.set()
+                continue
+            f.write(json.dumps(eintrag, ensure_ascii=False) + "\n")
+            if _schreib_queue.empty():
+                f.flush()
+            if f.tell() > TRACE_MAX_BYTES:
+                f.close()
+                _rotieren()
+                f = open(TRACE_DATEI, "a", encoding="utf-8")
+    finally:
+        f.close()
+
+
+def _schreiber_starten():
+    global _schreiber
+    if _schreiber is None:
+        _schreiber = threading.Thread(target=_schreiben, name="pia-trace", daemon=True)
+        _schreiber.start()
+        atexit.register(lambda: (_schreib_queue.put(None), _schreiber.join(timeout=2)))
+
+
+def span_erfassen(stufe: str, name: str, dauer_ms: float, start_us: float | None = None, **attribute):
+    """Fertige Messung eintragen (z. B. von Ollama gemeldete Dauern)"""
+    if start_us is None:
+        start_us = time.time() * 1e6 - dauer_ms * 1000
+    with _werte_lock:
+        _werte[(stufe, name)].append(dauer_ms)
+    _schreiber_starten()
+    _schreib_queue.put({
+        "sitzung": SITZUNG,
+        "befehl": BEFEHL_ID.get(),
+        "stufe": stufe,
+        "name": name,
+        "start_us": round(start_us),
+        "dauer_ms": round(dauer_ms, 3),
+        "thread": threading.current_thread().name,
+        **({"attr": attribute} if attribute else {}),
+    })
+
+
+@contextmanager
+def span(stufe: str, name: str | None = None, **attribute):
+    """with span("tool", "wetter_holen"): ..."""
+    start_us = time.time() * 1e6
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_erfassen(stufe, name or stufe, (time.perf_counter() - t0) * 1000, start_us, **attribute)
+
+
+# ────────────────────────────────────────────────
+# Auswertung
+# ────────────────────────────────────────────────
+def _perzentil(sortiert: list, p: float) -> float:
+    if not sortiert:
+        return 0.0
+    k = (len(sortiert) - 1) * p
+    i = int(k)
+    j = min(i + 1, len(sortiert) - 1)
+    return sortiert[i] + (sortiert[j] - sortiert[i]) * (k - i)
+
+
+def statistik() -> str:
+    """p50/p95/p99 pro Stufe und pro Tool seit dem Start"""
+    with _werte_lock:
+        daten = {k: sorted(v) for k, v in _werte.items() if v}
+    if not daten:
+        return "Noch keine Messwerte seit dem Start."
+
+    zeilen = [f"{'Stufe':14} {'Name':24} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)"]
+    for (stufe, name), werte in sorted(daten.items()):
+        zeilen.append(
+            f"{stufe:14} {name[:24]:24} {len(werte):6d} "
+            f"{_perzentil(werte, 0.5):9.1f} {_perzentil(werte, 0.95):9.1f} {_perzentil(werte, 0.99):9.1f}"
+        )
+    return "\n".join(zeilen)
+
+
+def chrome_trace_exportieren(ziel: str | Path | None = None, sitzung: str | None = None) -> Path:
+    """Schreibt alle Spans einer Sitzung (Standard: die laufende) im Chrome-Trace-Format"""
+    sitzung = sitzung or SITZUNG
+    ziel = Path(ziel) if ziel else BASE_DIR / f"trace_{sitzung}.json"
+
+    # Alles bis hierher Eingereihte muss geschrieben und geflusht sein – auch die Zeile in Arbeit
+    if _schreiber is not None and _schreiber.is_alive():
+        geschrieben = threading.Event()
+        _schreib_queue.put(geschrieben)
+        geschrieben.wait(timeout=2)
+
+    threads, events = {}, []
+    for datei in _trace_dateien():
+        with open(datei, "r", encoding="utf-8") as f:
+            for zeile in f:
+                try:
+                    s = json.loads(zeile)
+                except json.JSONDecodeError:
+                    continue
+                if s.get("sitzung") != sitzung:
+                    continue
+                tid = threads.setdefault(s.get("thread", "?"), len(threads) + 1)
+                events.append({
+                    "name": s["name"],
+                    "cat": s["stufe"],
+                    "ph": "X",
+                    "ts": s["start_us"],
+                    "dur": round(s["dauer_ms"] * 1000),
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"befehl": s.get("befehl"), **s.get("attr", {})},
+                })
+
+    events += [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+               for name, tid in threads.items()]
+    with open(ziel, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return ziel
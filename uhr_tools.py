@@ -6,6 +6,7 @@ from utils import sprich
 WOCHENTAGE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
 
 def jetzt_sagen(was: str = "alles"):
+    """Sagt aktuelle Uhrzeit, Datum oder Wochentag"""
     jetzt = datetime.now()
     if was.lower() in ("uhrzeit", "zeit", "jetzt"):
         text = jetzt.strftime("%H:%M Uhr")
@@ -19,6 +20,16 @@ def jetzt_sagen(was: str = "alles"):
     sprich(text)
     return text
 
+TOOL_BEISPIELE = {
+    "jetzt_sagen": [
+        "wie viel uhr haben wir",
+        "sag mir wie spät es ist",
+        "welchen tag haben wir heute",
+        "den wievielten haben wir",
+        "welcher wochentag ist heute",
+    ],
+}
+
 def tools_holen():
     return [
         ("jetzt_sagen", jetzt_sagen, "Uhr / Zeit"),
@@ -1,11 +1,15 @@
 import os
+import contextvars
 import json
 import logging
+import multiprocessing
 import subprocess
 import threading
+import time
 from datetime import datetime
 from pathlib import Path
 import socket
+from tracing import span
 
 # ────────────────────────────────────────────────
 # Basisverzeichnis
@@ -13,19 +17,75 @@ import socket
 BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__))).resolve()
 os.makedirs(BASE_DIR, exist_ok=True)
 
-# Logging
-logging.basicConfig(
-    filename=BASE_DIR / "pia4.log",
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)-7s | %(message)s',
-    encoding='utf-8',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)-7s | %(message)s'))
-logging.getLogger('').addHandler(console_handler)
+# ────────────────────────────────────────────────
+# Logging: Aufrufer schreibt nur in eine Queue, Datei + Konsole bedient ein Listener-Thread
+# ────────────────────────────────────────────────
+LOG_DATEI = BASE_DIR / "pia4.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+LOG_FORMAT = '%(asctime)s | %(levelname)-7s | %(message)s'
+
+_log_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Eintrag – inkl. Befehls-ID zum Abgleich mit traces.jsonl"""
+    def format(self, record):
+        eintrag = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "befehl": getattr(record, "befehl", None),
+            "sitzung": getattr(record, "sitzung", None),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            eintrag["exc"] = self.formatException(record.exc_info)
+        return json.dumps(eintrag, ensure_ascii=False)
+
+def _befehl_filter(record):
+    # Läuft im aufrufenden Thread – nur dort ist die Befehls-ID (ContextVar) sichtbar
+    import tracing
+    record.befehl = tracing.BEFEHL_ID.get()
+    record.sitzung = tracing.SITZUNG
+    return True
+
+def logging_einrichten(json_modus: bool = False, level=logging.INFO, konsole_level=logging.INFO):
+    """Richtet QueueHandler/QueueListener ein (idempotent). Datei rotiert nach Größe."""
+    global _log_listener
+    import atexit
+    import queue
+    from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+    if _log_listener is not None:
+        _log_listener.stop()
+
+    datei_handler = RotatingFileHandler(LOG_DATEI, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+    datei_handler.setFormatter(JsonFormatter() if json_modus else logging.Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+    konsole = logging.StreamHandler()
+    konsole.setLevel(konsole_level)
+    konsole.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(_befehl_filter)
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _log_listener = QueueListener(log_queue, datei_handler, konsole, respect_handler_level=True)
+    _log_listener.start()
+    if not getattr(logging_einrichten, "_atexit", False):
+        atexit.register(lambda: _log_listener and _log_listener.stop())
+        logging_einrichten._atexit = True
+
+# Ein STT-Worker (spawn) importiert pia4.py bzw. pia4_bootloader.py als __mp_main__ neu – ein zweiter
+# RotatingFileHandler auf pia4.log würde beim Rotieren dem des Hauptprozesses die Datei wegnehmen
+if multiprocessing.parent_process() is None:
+    logging_einrichten()
 
 # ANSI-Farben
 class Colors:
@@ -110,22 +170,77 @@ KONFIG = lade_json("pia4_konfig.json", {
     "telegram_chat_id": ""
 })
 
+# Laufmodus des aktuellen Befehls ("sprache" | "terminal") – wandert wie die Befehls-ID in Worker-Threads mit
+MODUS = contextvars.ContextVar("pia_modus", default="terminal")
+
 # ────────────────────────────────────────────────
 # TTS: gTTS primär + Piper leise als Offline-Fallback
 # ────────────────────────────────────────────────
 piper_voice = None
-try:
-    from piper.voice import PiperVoice
-    model_path = BASE_DIR / "de_DE-thorsten-medium.onnx"
-    config_path = BASE_DIR / "de_DE-thorsten-medium.onnx.json"
-    if model_path.exists() and config_path.exists():
-        piper_voice = PiperVoice.load(str(model_path), str(config_path))
-        logging.info("Piper offline TTS geladen")
-    else:
-        logging.debug("Piper-Modelldateien nicht gefunden → nur gTTS wird verwendet")
-except Exception:
-    logging.debug("Piper nicht verfügbar → nur gTTS wird verwendet")
-    piper_voice = None
+_piper_geprueft = False
+_piper_lock = threading.Lock()
+
+def piper_laden():
+    """Lädt die Piper-Stimme einmalig – verwaltet über ressourcen.RESSOURCEN ("piper")"""
+    global piper_voice, _piper_geprueft
+    with _piper_lock:
+        if _piper_geprueft:
+            return piper_voice
+        _piper_geprueft = True
+        try:
+            from piper.voice import PiperVoice
+            model_path = BASE_DIR / "de_DE-thorsten-medium.onnx"
+            config_path = BASE_DIR / "de_DE-thorsten-medium.onnx.json"
+            if model_path.exists() and config_path.exists():
+                piper_voice = PiperVoice.load(str(model_path), str(config_path))
+                logging.info("Piper offline TTS geladen")
+            else:
+                logging.debug("Piper-Modelldateien nicht gefunden → nur gTTS wird verwendet")
+        except Exception:
+            logging.debug("Piper nicht verfügbar → nur gTTS wird verwendet")
+            piper_voice = None
+        return piper_voice
+
+def piper_entladen():
+    global piper_voice, _piper_geprueft
+    with _piper_lock:
+        piper_voice = None
+        _piper_geprueft = False
+
+_sprich_lock = threading.Lock()   # parallele Tools (Mehrfach-Befehle) sollen nicht durcheinander reden
+
+# Wiedergabe-Status für die Aufnahme (voice_tools): solange Pia spricht, werden Mikrofon-Frames verworfen
+WIEDERGABE_NACHLAUF = 0.3         # Sekunden Raumhall nach Wiedergabeende, die noch als "Pia spricht" gelten
+wiedergabe_aktiv = threading.Event()
+_wiedergabe_ende = 0.0
+_wiedergabe_prozess = None
+
+def wiedergabe_laeuft() -> bool:
+    return wiedergabe_aktiv.is_set() or time.monotonic() - _wiedergabe_ende < WIEDERGABE_NACHLAUF
+
+def wiedergabe_stoppen() -> bool:
+    """Barge-in: bricht die laufende Sprachausgabe ab"""
+    prozess = _wiedergabe_prozess
+    if prozess is not None and prozess.poll() is None:
+        prozess.terminate()
+        return True
+    return False
+
+def _abspielen(pfad):
+    global _wiedergabe_prozess, _wiedergabe_ende
+    with _sprich_lock, span("tts_wiedergabe", "mpg123"):
+        wiedergabe_aktiv.set()
+        try:
+            _wiedergabe_prozess = subprocess.Popen(["mpg123", "-q", str(pfad)])
+            try:
+                _wiedergabe_prozess.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                _wiedergabe_prozess.kill()
+                _wiedergabe_prozess.wait()
+        finally:
+            _wiedergabe_prozess = None
+            _wiedergabe_ende = time.monotonic()
+            wiedergabe_aktiv.clear()
 
 def sprich(text: str):
     """Sprachausgabe: gTTS bevorzugt, Piper als stille Offline-Alternative"""
@@ -133,26 +248,40 @@ def sprich(text: str):
     if not text:
         return
 
+    # Offene Kreise (gesundheit.py) überspringen – offline wartet so nur die erste Ausgabe auf gTTS
+    from gesundheit import GESUNDHEIT
+
     # 1. gTTS (gute Qualität)
-    try:
-        from gtts import gTTS
-        tts = gTTS(text=text, lang="de", slow=False)
-        tmp_mp3 = BASE_DIR / "tmp_sprache.mp3"
-        tts.save(tmp_mp3)
-        subprocess.run(["mpg123", "-q", str(tmp_mp3)], check=False, timeout=15)
-        tmp_mp3.unlink(missing_ok=True)
-        return
-    except Exception as e:
-        logging.warning(f"gTTS-Fehler (kein Internet?): {e}")
+    if GESUNDHEIT.verfuegbar("gtts"):
+        try:
+            from gtts import gTTS
+            tts = gTTS(text=text, lang="de", slow=False)
+            tmp_mp3 = BASE_DIR / f"tmp_sprache_{threading.get_ident()}.mp3"
+            start = time.perf_counter()
+            try:
+                with span("tts_synthese", "gtts", zeichen=len(text)), GESUNDHEIT.messen("gtts"):
+                    tts.save(tmp_mp3)
+            except Exception as e:
+                http_erfassen("translate.google.com", (time.perf_counter() - start) * 1000, type(e).__name__)
+                raise
+            http_erfassen("translate.google.com", (time.perf_counter() - start) * 1000)
+            _abspielen(tmp_mp3)
+            tmp_mp3.unlink(missing_ok=True)
+            return
+        except Exception as e:
+            logging.warning(f"gTTS-Fehler (kein Internet?): {e}")
 
     # 2. Piper als Offline-Fallback (kein Warning bei Fehlschlag)
-    if piper_voice:
+    from ressourcen import RESSOURCEN
+    stimme = RESSOURCEN.holen("piper")
+    if stimme and GESUNDHEIT.verfuegbar("piper"):
         try:
-            wav_bytes = piper_voice.synthesize(text)
-            tmp_wav = BASE_DIR / "tmp_pia.wav"
+            with span("tts_synthese", "piper", zeichen=len(text)), GESUNDHEIT.messen("piper"):
+                wav_bytes = stimme.synthesize(text)
+            tmp_wav = BASE_DIR / f"tmp_pia_{threading.get_ident()}.wav"
             with open(tmp_wav, "wb") as f:
                 f.write(wav_bytes)
-            subprocess.run(["mpg123", "-q", str(tmp_wav)], check=False, timeout=15)
+            _abspielen(tmp_wav)
             tmp_wav.unlink(missing_ok=True)
             return
         except:
@@ -163,11 +292,124 @@ def sprich(text: str):
 
 
 # ────────────────────────────────────────────────
-# Telegram deaktiviert
+# HTTP: gemeinsame Sessions pro Host + Latenz-/Fehler-Statistik
 # ────────────────────────────────────────────────
-def telegram_senden(nachricht: str, anhang=None, parse_mode: str = "MarkdownV2"):
-    logging.warning("Telegram ist deaktiviert – nutze Server-Backup")
-    return False
+HTTP_TIMEOUT = (3.05, 10)          # (Verbindungsaufbau, Lesen) in Sekunden
+HTTP_RETRIES = 2
+HTTP_LATENZ_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_http_lock = threading.Lock()
+_http_sessions = {}
+_http_stats = {}
+
+def http_session(host: str):
+    """Liefert die gepoolte requests.Session für einen Host (wird beim ersten Aufruf angelegt)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    with _http_lock:
+        session = _http_sessions.get(host)
+        if session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "Mozilla/5.0 (compatible; Pia4/1.0)"
+            _http_sessions[host] = session
+        return session
+
+def http_erfassen(host: str, dauer_ms: float, fehler: str | None = None):
+    """Trägt eine Messung in die Host-Statistik ein – auch für Clients ohne eigene Session (ollama, gTTS)"""
+    with _http_lock:
+        s = _http_stats.setdefault(host, {
+            "anfragen": 0,
+            "fehler": {},
+            "summe_ms": 0.0,
+            "max_ms": 0.0,
+            "buckets": [0] * (len(HTTP_LATENZ_BUCKETS_MS) + 1),
+        })
+        s["anfragen"] += 1
+        s["summe_ms"] += dauer_ms
+        s["max_ms"] = max(s["max_ms"], dauer_ms)
+        idx = next((i for i, grenze in enumerate(HTTP_LATENZ_BUCKETS_MS) if dauer_ms <= grenze), len(HTTP_LATENZ_BUCKETS_MS))
+        s["buckets"][idx] += 1
+        if fehler:
+            s["fehler"][fehler] = s["fehler"].get(fehler, 0) + 1
+
+def http_anfrage(methode: str, url: str, timeout=None, **kwargs):
+    """HTTP-Anfrage über die gemeinsame Session des Hosts – mit Timeout, Retries und Messung.
+    Exceptions (requests.RequestException) werden wie bei requests direkt weitergereicht."""
+    from urllib.parse import urlsplit
+
+    host = urlsplit(url).netloc
+    session = http_session(host)
+    start = time.perf_counter()
+    try:
+        r = session.request(methode, url, timeout=timeout or HTTP_TIMEOUT, **kwargs)
+    except Exception as e:
+        http_erfassen(host, (time.perf_counter() - start) * 1000, type(e).__name__)
+        raise
+    http_erfassen(host, (time.perf_counter() - start) * 1000, f"HTTP {r.status_code}" if r.status_code >= 400 else None)
+    return r
+
+def http_get(url: str, timeout=None, **kwargs):
+    return http_anfrage("GET", url, timeout=timeout, **kwargs)
+
+def _bucket_perzentil(buckets: list, anteil: float) -> str:
+    gesamt = sum(buckets)
+    if not gesamt:
+        return "-"
+    grenze = gesamt * anteil
+    laufend = 0
+    for i, anzahl in enumerate(buckets):
+        laufend += anzahl
+        if laufend >= grenze:
+            return f"≤{HTTP_LATENZ_BUCKETS_MS[i]} ms" if i < len(HTTP_LATENZ_BUCKETS_MS) else f">{HTTP_LATENZ_BUCKETS_MS[-1]} ms"
+    return "-"
+
+def http_statistik() -> str:
+    """Textübersicht: Anfragen, Fehler und Latenz-Histogramm pro Host"""
+    with _http_lock:
+        stats = {host: {**s, "fehler": dict(s["fehler"]), "buckets": list(s["buckets"])} for host, s in _http_stats.items()}
+
+    if not stats:
+        return "Noch keine HTTP-Anfragen seit dem Start."
+
+    zeilen = []
+    for host, s in sorted(stats.items()):
+        schnitt = s["summe_ms"] / s["anfragen"]
+        fehler = sum(s["fehler"].values())
+        zeilen.append(
+            f"{host}: {s['anfragen']} Anfragen, {fehler} Fehler, "
+            f"Ø {schnitt:.0f} ms, p50 {_bucket_perzentil(s['buckets'], 0.5)}, "
+            f"p95 {_bucket_perzentil(s['buckets'], 0.95)}, max {s['max_ms']:.0f} ms"
+        )
+        histo = "  ".join(
+            f"≤{grenze}:{anzahl}" for grenze, anzahl in zip(HTTP_LATENZ_BUCKETS_MS, s["buckets"]) if anzahl
+        )
+        if s["buckets"][-1]:
+            histo += f"  >{HTTP_LATENZ_BUCKETS_MS[-1]}:{s['buckets'][-1]}"
+        zeilen.append(f"  Histogramm (ms): {histo}")
+        if s["fehler"]:
+            zeilen.append("  Fehler: " + ", ".join(f"{art} ×{anzahl}" for art, anzahl in s["fehler"].items()))
+
+    return "\n".join(zeilen)
+
+# ────────────────────────────────────────────────
+# Telegram: über die dauerhafte Outbox (telegram_outbox.py) – kehrt sofort zurück
+# ────────────────────────────────────────────────
+def telegram_senden(nachricht: str, anhang=None, parse_mode: str | None = None):
+    """Nachricht (optional mit Datei-Anhang) in die Outbox legen. True = abgelegt, nicht: schon zugestellt"""
+    from telegram_outbox import ablegen
+    return ablegen(nachricht, anhang=anhang, parse_mode=parse_mode)
 
 # ────────────────────────────────────────────────
 # System-Hilfsfunktionen
@@ -227,6 +469,12 @@ def load_env_overrides():
 
 load_env_overrides()
 
+# JSON-Logs / Log-Level aus Konfig oder ENV (PIA4_LOG_JSON=1, PIA4_LOG_LEVEL=DEBUG)
+_log_json = str(KONFIG.get("log_json", os.getenv("PIA4_LOG_JSON", ""))).lower() in ("1", "true", "ja", "yes")
+_log_level = str(KONFIG.get("log_level", os.getenv("PIA4_LOG_LEVEL", "INFO"))).upper()
+if _log_json or _log_level != "INFO":
+    logging_einrichten(json_modus=_log_json, level=getattr(logging, _log_level, logging.INFO))
+
 # ────────────────────────────────────────────────
 if __name__ == "__main__":
     print("utils.py geladen – gTTS primär + Piper (leise)")
\ No newline at end of file
@@ -0,0 +1,44 @@
+# venv_start.py – startet Pia4 direkt mit dem Python aus pia4-venv311
+# Nur Standardbibliothek (os/sys): muss VOR utils & Co. laufen, damit der Kaltstart genau
+# einen Interpreter und einen Satz Imports kostet – kein "bash -c 'source activate'" mehr.
+
+import os
+import sys
+
+VENV_NAME = "pia4-venv311"
+VENV_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), VENV_NAME)
+
+
+def venv_python(venv_dir: str = VENV_DIR) -> str | None:
+    """Pfad zum Interpreter im venv (Linux/Termux: bin/python3, Windows: Scripts\\python.exe)"""
+    for teil in (("bin", "python3"), ("bin", "python"), ("Scripts", "python.exe")):
+        pfad = os.path.join(venv_dir, *teil)
+        if os.path.isfile(pfad) and os.access(pfad, os.X_OK):
+            return pfad
+    return None
+
+
+def im_venv(venv_dir: str = VENV_DIR) -> bool:
+    return os.path.realpath(sys.prefix) == os.path.realpath(venv_dir)
+
+
+def venv_sicherstellen(skript: str):
+    """Ersetzt den laufenden Prozess per os.execv durch das venv-Python – kehrt nur zurück,
+    wenn wir schon im venv sind oder es keins gibt (dann läuft Pia4 im aktuellen Interpreter)."""
+    if im_venv():
+        return
+    python = venv_python()
+    if python is None:
+        print(f"→ Kein {VENV_NAME} gefunden – starte mit {sys.executable}")
+        return
+    if os.environ.get("PIA4_VENV_EXEC") == python:
+        # Schutz gegen Endlosschleife, falls das venv-Python sys.prefix anders meldet
+        return
+
+    # Was "source activate" täte: VIRTUAL_ENV + PATH für Unterprozesse (pip, ollama-Wrapper …)
+    os.environ["PIA4_VENV_EXEC"] = python
+    os.environ["VIRTUAL_ENV"] = VENV_DIR
+    os.environ["PATH"] = os.path.dirname(python) + os.pathsep + os.environ.get("PATH", "")
+    os.environ.pop("PYTHONHOME", None)
+    sys.stdout.flush()
+    os.execv(python, [python, os.path.abspath(skript)] + sys.argv[1:])
@@ -3,77 +3,290 @@ import os
 import time
 import threading
 import queue
+import re
 import numpy as np
 import sounddevice as sd
-from faster_whisper import WhisperModel
-from utils import BASE_DIR, logging, sprich
+from utils import BASE_DIR, KONFIG, MODUS, logging, sprich, wiedergabe_laeuft, wiedergabe_stoppen
+from tracing import span_erfassen
+from ressourcen import RESSOURCEN, rss_mb
+from stt_worker import SAMPLERATE, SttWorker, gemeinsamer_ring, transkripte
+from stt_vokabular import prompt_bauen
 
 WAKE_WORD = "hey pia"
-MODEL_SIZE = "large-v3-turbo"           # Alternativen: "distil-large-v3", "base", "small"
+# Whisper schreibt das Wake-Word mal "hey, pia", mal "hei pia" – der Befehl ist alles danach
+_WAKE_MUSTER = re.compile(r"\b(?:hey|hei|hi)\W*pia\b\W*")
+# Mit Vokabular-Prompt reicht auf der CPU oft "small" – vergleichen: python -m benchmarks.stt_modelle
+MODEL_SIZE = KONFIG.get("stt_modell", "large-v3-turbo")   # Alternativen: "distil-large-v3", "base", "small"
 DEVICE = "cuda" if os.path.exists("/dev/nvidia0") else "cpu"
 COMPUTE_TYPE = "int8" if "cuda" in DEVICE else "default"
 
-print(f"[STT] Lade Faster-Whisper {MODEL_SIZE}  device={DEVICE}  type={COMPUTE_TYPE}")
+AKTIVITAET_RMS = 0.02                   # ab hier gilt ein Block als Sprache → entladenes Modell vorwärmen
+VOKABULAR_PRUEFEN_S = 30                # so oft nachsehen, ob Kalender/Notizen/Apps neue Wörter bringen
 
-model = WhisperModel(
-    MODEL_SIZE,
-    device=DEVICE,
-    compute_type=COMPUTE_TYPE,
-    cpu_threads=8,                      # Ryzen 5600X → 8 Threads sinnvoll
-    num_workers=4
-)
+# Audio-Ring im Shared Memory: der Callback schreibt, der STT-Worker-Prozess liest. Ring und
+# Transkript-Queue gehören stt_worker.py, damit sie einen Hot-Reload dieses Moduls überstehen.
+RING = gemeinsamer_ring()
 
-audio_queue = queue.Queue(maxsize=30)
+def _transkript_erhalten(text: str, dauer_ms: float, sekunden: float, generation: int):
+    span_erfassen("stt", MODEL_SIZE, dauer_ms, sekunden=round(sekunden, 2))
+    if text:
+        try:
+            transkripte.put_nowait((generation, text))
+        except queue.Full:
+            logging.warning("STT: Transkript verworfen – Listener kommt nicht hinterher")
+
+def _vokabular() -> str:
+    try:
+        return prompt_bauen() if KONFIG.get("stt_vokabular_prompt", True) else ""
+    except Exception as e:
+        logging.warning(f"STT-Vokabular nicht verfügbar: {e}")
+        return ""
+
+def _worker_erzeugen():
+    print(f"[STT] Starte Whisper-Worker {MODEL_SIZE}  device={DEVICE}  type={COMPUTE_TYPE}")
+    return SttWorker(RING, MODEL_SIZE, DEVICE, COMPUTE_TYPE, _transkript_erhalten, prompt=_vokabular()).starten()
+
+def _worker_groesse_mb() -> float:
+    worker = RESSOURCEN.objekt("whisper")
+    return rss_mb(worker.pid) if worker and worker.pid else 0.0
+
+# Entladen beendet den Worker – damit ist der Speicher sicher wieder beim System
+RESSOURCEN.registrieren("whisper", _worker_erzeugen, lambda worker: worker.beenden(), leerlauf_s=600,
+                        groesse_mb=_worker_groesse_mb, schaetzung_mb=1600)
+
+def modell_laden():
+    """Whisper-Worker holen (startet beim ersten Bedarf bzw. nach dem Entladen im Leerlauf)"""
+    return RESSOURCEN.holen("whisper")
+
+# Barge-in: während Pia spricht, kommen nur deutlich lautere Blöcke (RMS, float32) durch
+BARGE_IN_RMS = float(KONFIG.get("barge_in_rms", 0.08))
+mikro_statistik = {"verworfen": 0, "barge_in": 0, "status_fehler": 0, "callbacks": 0,
+                   "jitter_ms_mittel": 0.0, "jitter_ms_max": 0.0}
+_letzter_callback = 0.0
+_sprache_gehoert = threading.Event()
 
 def audio_callback(indata, frames, time_info, status):
+    # Läuft im Audio-Thread: nur messen, filtern und in den Ring kopieren – nie blockieren
+    global _letzter_callback
+    jetzt = time.perf_counter()
+    if _letzter_callback:
+        jitter_ms = abs((jetzt - _letzter_callback) - frames / SAMPLERATE) * 1000
+        mikro_statistik["jitter_ms_mittel"] += 0.05 * (jitter_ms - mikro_statistik["jitter_ms_mittel"])
+        mikro_statistik["jitter_ms_max"] = max(mikro_statistik["jitter_ms_max"], jitter_ms)
+    _letzter_callback = jetzt
+    mikro_statistik["callbacks"] += 1
     if status:
+        mikro_statistik["status_fehler"] += 1       # z. B. input overflow = verlorene Frames
         logging.warning(f"Audio-Status: {status}")
-    audio_queue.put(indata.copy())
+    rms = float(np.sqrt(np.mean(np.square(indata))))
+    if wiedergabe_laeuft():
+        # Eigene Stimme nicht transkribieren – kostet CPU und triggert sonst auf "Pia" in Antworten
+        if rms < BARGE_IN_RMS:
+            mikro_statistik["verworfen"] += 1
+            return
+        mikro_statistik["barge_in"] += 1
+    if rms > AKTIVITAET_RMS:
+        _sprache_gehoert.set()
+    RING.schreiben(indata)
+
+def mikrofon_statistik() -> str:
+    m = mikro_statistik
+    zeilen = [f"Mikrofon: {m['callbacks']} Blöcke, Jitter Ø {m['jitter_ms_mittel']:.1f} ms / max {m['jitter_ms_max']:.1f} ms, "
+              f"{m['status_fehler']} Status-Fehler (Overflow), {m['verworfen']} während Ausgabe verworfen, {m['barge_in']} Barge-in"]
+    worker = RESSOURCEN.objekt("whisper")
+    if worker is not None:
+        w = worker.statistik
+        zeilen.append(f"STT-Worker (PID {worker.pid}): {w['transkripte']} Durchläufe, zuletzt {w['letzte_dauer_ms']:.0f} ms, "
+                      f"{w['neustarts']} Neustart(s), {w['ring_verloren_s']:.1f}s Audio überrundet, "
+                      f"{w['veraltet']} nach Reset verworfen, Vokabular-Prompt {len(worker.prompt)} Zeichen")
+    else:
+        zeilen.append("STT-Worker: nicht geladen")
+    for art, e in endpunkt_statistik.items():
+        if e["n"]:
+            zeilen.append(f"Äußerungsende ({art}): {e['n']}×, Wartezeit nach letzter Änderung Ø {e['ms'] / e['n']:.0f} ms")
+    return "\n".join(zeilen)
+
+# ──────────────────────────────
+# Äußerungsende & spekulatives Vorausrechnen
+# ──────────────────────────────
+# Der Worker liefert alle ~0,5 s ein neues Transkript des Fensters. Ein Befehl gilt als fertig, wenn er
+# sich über ENDE_DURCHLAEUFE Transkripte nicht mehr ändert. Der gemeinsame Anfang der letzten beiden
+# ist "stabil" – landet er ohnehin beim LLM, rechnet Ollama darauf schon voraus (ollama_tools).
+# Schlüsselwort-Befehle ("öffne firefox") brauchen die längere Pause nicht: ein gleiches Transkript genügt.
+# Die Wartezeit seit der letzten Änderung landet in endpunkt_statistik (siehe mikrofon_statistik).
+ENDE_DURCHLAEUFE = 3
+ENDE_DURCHLAEUFE_BEFEHL = 2
+WAKE_FEHLT_MAX = 2                      # so viele Transkripte ohne Wake-Word in Folge beenden die Äußerung
+MAX_BEFEHL_S = 15
+SPEKULATION_MIN_WOERTER = 3
+STOPPWOERTER = ("stopp", "stop", "abbrechen", "halt", "hör auf")
+
+endpunkt_statistik = {"befehl": {"n": 0, "ms": 0.0}, "llm": {"n": 0, "ms": 0.0}}
+
+def wake_word_finden(text: str) -> str | None:
+    """→ Befehl nach dem Wake-Word ("" = nur das Wake-Word), None ohne Wake-Word"""
+    m = _WAKE_MUSTER.search(text)
+    return text[m.end():].strip() if m else None
+
+def _fortsetzen(kommando: str, text: str) -> str | None:
+    """Das Wake-Word ist aus dem Fenster gerutscht: beginnt text mit dem Ende des bisherigen Befehls
+    (mind. zwei Wörter), geht es dahinter weiter → verlängerter Befehl, sonst None"""
+    a, b = kommando.split(), text.split()
+    for i in range(len(a) - 1):
+        n = len(a) - i
+        if b[:n] == a[i:]:
+            return " ".join(a + b[n:])
+    return None
+
+def _stabiler_anfang(a: str, b: str) -> str:
+    wa, wb = a.split(), b.split()
+    n = 0
+    while n < min(len(wa), len(wb)) and wa[n] == wb[n]:
+        n += 1
+    return " ".join(wa[:n])
+
+class Aeusserung:
+    """Ein Befehl nach dem Wake-Word, der noch wächst"""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.kommando = ""
+        self.vorher = ""
+        self.gleich = 0
+        self.spekuliert = ""
+        self.fehlt = 0
+        self.geaendert = self.start
+        self.durchlaeufe = ENDE_DURCHLAEUFE
+
+    def weiter(self, text: str):
+        kommando = wake_word_finden(text)
+        if kommando is None:
+            # Ein einzelnes verhörtes Wake-Word beendet nichts – rutscht es aus dem Fenster, geht der
+            # Befehl dahinter trotzdem weiter
+            kommando = _fortsetzen(self.kommando, text) if self.kommando else None
+            if kommando is None:
+                self.fehlt += 1
+                return
+        self.fehlt = 0
+        self.vorher = self.kommando
+        if kommando == self.kommando:
+            self.gleich += 1
+        else:
+            self.gleich, self.geaendert = 0, time.monotonic()
+            self.kommando = kommando
+            self.durchlaeufe = ENDE_DURCHLAEUFE if self._zum_llm() else ENDE_DURCHLAEUFE_BEFEHL
+
+    def _zum_llm(self) -> bool:
+        """Nur Schlüsselwörter prüfen – die Embedding-Suche wäre für jedes Teil-Transkript zu teuer"""
+        from assistant_core import schluesselwort_befehl
+        return not schluesselwort_befehl(self.kommando)
+
+    def fertig(self) -> bool:
+        if self.fehlt >= WAKE_FEHLT_MAX or time.monotonic() - self.start > MAX_BEFEHL_S:
+            return True
+        if not self.kommando:                   # nur "Hey Pia" – auf den Befehl warten
+            return False
+        if self.kommando.strip(" .!") in STOPPWOERTER:
+            return True
+        if self.gleich < self.durchlaeufe - 1:
+            return False
+        e = endpunkt_statistik["llm" if self.durchlaeufe == ENDE_DURCHLAEUFE else "befehl"]
+        e["n"] += 1
+        e["ms"] += (time.monotonic() - self.geaendert) * 1000
+        return True
+
+    def vorausrechnen(self):
+        stabil = _stabiler_anfang(self.vorher, self.kommando)
+        if len(stabil.split()) < SPEKULATION_MIN_WOERTER or stabil == self.spekuliert:
+            return
+        from assistant_core import llm_vorausrechnen
+        if llm_vorausrechnen(stabil):
+            self.spekuliert = stabil
+            logging.debug(f"[Wake] Spekulativ an Ollama: '{stabil}'")
+
+    def abschliessen(self):
+        if self.spekuliert:
+            from ollama_tools import spekulation_abgleichen
+            spekulation_abgleichen(self.kommando)
+
+def befehl_starten(kommando: str):
+    """Befehl im Hintergrund ausführen – der Listener hört weiter, damit "stopp" greifen kann"""
+    from assistant_core import befehl_verarbeiten
+    from tool_engine import ENGINE
+
+    MODUS.set("sprache")        # engeres Latenzbudget für den Ollama-Router
+    if kommando.strip(" .!") in STOPPWOERTER:
+        sprich(befehl_verarbeiten(kommando.strip(" .!")))
+        return
+
+    def fertig(future):
+        if future.cancelled():
+            return
+        try:
+            antwort = future.result()
+        except Exception as e:
+            logging.error(f"Befehl '{kommando}' fehlgeschlagen: {e}")
+            return
+        ENGINE.starten(sprich, antwort)
+
+    ENGINE.starten(befehl_verarbeiten, kommando, timeout=300).add_done_callback(fertig)
 
 def sprachmodus():
     sprich("Hey-Pia-Modus ist jetzt aktiv. Sag einfach 'Hey Pia' und dann deinen Befehl.")
-    print("[Sprachmodus] Mikrofon wird gestartet – sag 'Hey Pia ...'")
+    print("[Sprachmodus] Mikrofon wird gestartet – sag 'Hey Pia ...' ('Hey Pia stopp' bricht ab)")
 
     def listener_loop():
+        modell_laden()
         with sd.InputStream(
-            samplerate=16000,
+            samplerate=SAMPLERATE,
             channels=1,
             dtype='float32',
             blocksize=8000,
             callback=audio_callback
         ) as stream:
             print("[STT] Mikrofon-Stream läuft")
-            buffer = np.array([], dtype=np.float32)
+            aeusserung = None
+            vokabular_geprueft = time.monotonic()
 
             while True:
                 try:
-                    chunk = audio_queue.get(timeout=1.5)
-                    buffer = np.concatenate((buffer, chunk.flatten()))
-
-                    # Buffer nicht endlos wachsen lassen
-                    if len(buffer) > 16000 * 10:
-                        buffer = buffer[-16000*10:]
-
-                    segments, info = model.transcribe(
-                        buffer,
-                        language="de",
-                        vad_filter=True,
-                        vad_parameters=dict(
-                            min_silence_duration_ms=400,
-                            max_speech_duration_s=12
-                        )
-                    )
-
-                    text = " ".join(s.text.strip() for s in segments if s.text.strip()).lower().strip()
-
-                    if text and WAKE_WORD in text:
-                        kommando = text.split(WAKE_WORD, 1)[-1].strip()
-                        if kommando:
-                            print(f"[Wake] Erkannt: '{kommando}'")
-                            from assistant_core import befehl_verarbeiten
-                            antwort = befehl_verarbeiten(kommando)
-                            sprich(antwort)
-                        buffer = np.array([], dtype=np.float32)  # Buffer zurücksetzen
+                    # Im Leerlauf entladen: der Ring läuft weiter, bei Sprache startet der Worker im
+                    # Hintergrund und transkribiert ab den letzten Sekunden – das Wake-Word geht nicht verloren
+                    worker = RESSOURCEN.objekt("whisper")
+                    if worker is None:
+                        if _sprache_gehoert.wait(timeout=1.5):
+                            _sprache_gehoert.clear()
+                            RESSOURCEN.vorwaermen("whisper")
+                        continue
+                    _sprache_gehoert.clear()
+                    if aeusserung is None and time.monotonic() - vokabular_geprueft > VOKABULAR_PRUEFEN_S:
+                        vokabular_geprueft = time.monotonic()
+                        prompt = _vokabular()
+                        if prompt != worker.prompt:
+                            worker.prompt_setzen(prompt)
+
+                    generation, text = transkripte.get(timeout=1.5)
+                    if generation != worker.generation:     # noch vor dem letzten Reset begonnen
+                        continue
+                    RESSOURCEN.benutzt("whisper")
+                    if aeusserung is None:
+                        if wake_word_finden(text) is None:
+                            continue
+                        aeusserung = Aeusserung()
+                        RESSOURCEN.vorwaermen("ollama")         # Befehl landet evtl. beim LLM
+                        if wiedergabe_laeuft() and wiedergabe_stoppen():
+                            print("[Wake] Barge-in – Ausgabe unterbrochen")
+                    aeusserung.weiter(text)
+
+                    if not aeusserung.fertig():
+                        aeusserung.vorausrechnen()
+                        continue
+                    if aeusserung.kommando:
+                        print(f"[Wake] Erkannt: '{aeusserung.kommando}'")
+                        aeusserung.abschliessen()
+                        befehl_starten(aeusserung.kommando)
+                    aeusserung = None
+                    worker.zuruecksetzen()                  # ältere Durchläufe enthalten dasselbe Wake-Word
 
                 except queue.Empty:
                     continue
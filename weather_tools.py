@@ -2,9 +2,13 @@
 
 import requests
 from datetime import datetime
-from utils import KONFIG, logging, sprich
+from utils import KONFIG, logging, sprich, http_get
+from tool_engine import tool_timeout
+from gesundheit import GESUNDHEIT
 
+@tool_timeout(20)
 def wetter_holen(stadt="Eschwege"):
+    """Aktuelles Wetter und Temperatur für eine Stadt"""
     api_key = KONFIG.get("openweather_api_key")
     if not api_key:
         return "Kein OpenWeather API-Key eingetragen."
@@ -18,9 +22,13 @@ def wetter_holen(stadt="Eschwege"):
         f"?q={stadt}&appid={api_key}&units=metric&lang=de"
     )
 
+    if not GESUNDHEIT.verfuegbar("openweathermap"):
+        return "Wetterdienst gerade nicht erreichbar."
+
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
+        with GESUNDHEIT.messen("openweathermap"):
+            r = http_get(url)
+            r.raise_for_status()
         data = r.json()
 
         if data.get("cod") != 200:
@@ -46,6 +54,17 @@ def wetter_holen(stadt="Eschwege"):
         logging.error(f"Wetter-Abfrage fehlgeschlagen: {e}")
         return "Wetterdienst gerade nicht erreichbar."
 
+TOOL_BEISPIELE = {
+    "wetter_holen": [
+        "wie wird das wetter",
+        "regnet es gerade in berlin",
+        "brauche ich heute einen regenschirm",
+        "wie warm ist es draußen",
+        "wie viel grad haben wir in kassel",
+        "scheint heute die sonne",
+    ],
+}
+
 def tools_holen():
     return [
         ("wetter_holen", wetter_holen, "Wetter"),
@@ -2,9 +2,13 @@
 
 import requests
 from bs4 import BeautifulSoup
-from utils import logging, sprich
+from utils import logging, sprich, http_get
+from tool_engine import tool_timeout
+from gesundheit import GESUNDHEIT
 
+@tool_timeout(25)
 def web_suche(suchbegriff: str, anzahl: int = 5):
+    """Sucht im Internet (DuckDuckGo) und liefert die wichtigsten Treffer"""
     suchbegriff = suchbegriff.strip()
     if not suchbegriff:
         return "Kein Suchbegriff angegeben."
@@ -12,10 +16,13 @@ def web_suche(suchbegriff: str, anzahl: int = 5):
     # DuckDuckGo HTML (einfacher, weniger JS)
     url = f"https://html.duckduckgo.com/html/?q={requests.utils.quote(suchbegriff)}"
 
+    if not GESUNDHEIT.verfuegbar("duckduckgo"):
+        return "Internetsuche gerade nicht möglich."
+
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; Pia4/1.0)"}
-        r = requests.get(url, headers=headers, timeout=12)
-        r.raise_for_status()
+        with GESUNDHEIT.messen("duckduckgo"):
+            r = http_get(url, timeout=(3.05, 12))
+            r.raise_for_status()
 
         soup = BeautifulSoup(r.text, "html.parser")
         ergebnisse = []
@@ -44,6 +51,15 @@ def web_suche(suchbegriff: str, anzahl: int = 5):
         logging.error(f"Web-Suche fehlgeschlagen: {e}")
         return "Internetsuche gerade nicht möglich."
 
+TOOL_BEISPIELE = {
+    "web_suche": [
+        "google mal python tutorial",
+        "finde im internet etwas über solaranlagen",
+        "recherchiere die öffnungszeiten vom baumarkt",
+        "schau online nach rezepten für lasagne",
+    ],
+}
+
 def tools_holen():
     return [
         ("web_suche", web_suche, "Internet-Suche"),
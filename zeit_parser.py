@@ -0,0 +1,255 @@
+# zeit_parser.py – regelbasierte deutsche Datums-/Zeitangaben für Kalenderbefehle
+# "termin arzt morgen 14 uhr" → ("arzt", 2026-10-20 14:00). Keine LLM-Runde, alle Muster werden
+# beim Import einmal kompiliert; ein Aufruf kostet Mikrosekunden (python -m benchmarks.zeit_parser).
+#
+# Verstanden wird u. a.: heute / morgen / übermorgen, (am / nächsten) Dienstag, am 3. März (2027),
+# am 3.3., 2026-02-15, in 3 Tagen / in 2 Wochen, in 20 Minuten / in einer halben Stunde,
+# um 14 Uhr / 14:30 / 14 Uhr 30 / um drei, halb drei / viertel nach drei / viertel vor drei,
+# morgens / mittags / nachmittags / abends / nachts.
+
+import re
+from datetime import datetime, timedelta, date, time
+
+ZAHLWOERTER = {
+    "null": 0, "ein": 1, "eins": 1, "eine": 1, "einem": 1, "einer": 1, "zwei": 2, "drei": 3, "vier": 4,
+    "fünf": 5, "sechs": 6, "sieben": 7, "acht": 8, "neun": 9, "zehn": 10, "elf": 11, "zwölf": 12,
+    "fünfzehn": 15, "zwanzig": 20, "dreißig": 30, "vierzig": 40, "fünfundvierzig": 45, "fünfzig": 50,
+}
+WOCHENTAGE = {"montag": 0, "dienstag": 1, "mittwoch": 2, "donnerstag": 3, "freitag": 4, "samstag": 5,
+              "sonnabend": 5, "sonntag": 6}
+MONATE = {"januar": 1, "jan": 1, "jänner": 1, "februar": 2, "feb": 2, "märz": 3, "mär": 3, "maerz": 3,
+          "april": 4, "apr": 4, "mai": 5, "juni": 6, "jun": 6, "juli": 7, "jul": 7, "august": 8, "aug": 8,
+          "september": 9, "sept": 9, "sep": 9, "oktober": 10, "okt": 10, "november": 11, "nov": 11,
+          "dezember": 12, "dez": 12}
+TAGESZEITEN = {"früh": 8, "morgens": 8, "morgen": 8, "vormittag": 10, "vormittags": 10, "mittag": 12,
+               "mittags": 12, "nachmittag": 15, "nachmittags": 15, "abend": 19, "abends": 19,
+               "nacht": 22, "nachts": 22}
+SPAET = {"nachmittag", "nachmittags", "abend", "abends"}
+NACHT = {"nacht", "nachts"}            # "3 uhr nachts" bleibt 3:00, "10 uhr nachts" → 22:00, "12 uhr nachts" → 0:00
+
+# Füllwörter, die nach dem Herausschneiden der Zeitangabe am Rand des Titels übrig bleiben
+_RAND = {"am", "um", "ab", "gegen", "für", "den", "der", "die", "das", "bis", "zum", "zur", "in", "an", "und"}
+
+
+def _wortliste(woerter) -> str:
+    # längste zuerst, damit "übermorgen" vor "morgen" und "september" vor "sep" greift
+    return "|".join(sorted(map(re.escape, woerter), key=len, reverse=True))
+
+
+_ZAHL = rf"\d{{1,2}}|{_wortliste(ZAHLWOERTER)}"
+
+# ──────────────────────────────
+# Grammatik: (Name, kompiliertes Muster) – Reihenfolge = Vorrang
+# ──────────────────────────────
+_DATUM_REGELN = [
+    ("relativ_zeit", re.compile(
+        r"\bin\s+(?:(?P<halb>einer\s+halben|ner\s+halben)|(?P<anderthalb>anderthalb|eineinhalb)|(?P<n>\d+|"
+        + _wortliste(ZAHLWOERTER) + r"))\s+(?P<einheit>minuten?|min|stunden?|std)\b")),
+    ("iso", re.compile(r"\b(?P<j>\d{4})-(?P<m>\d{2})-(?P<t>\d{2})(?:[ t](?P<h>\d{2}):(?P<mi>\d{2}))?\b")),
+    ("datum_zahl", re.compile(
+        r"(?:\bam\s+)?\b(?P<t>\d{1,2})\.(?P<m>\d{1,2})\.(?P<j>\d{4}|\d{2}(?!\d))?(?!\d)")),
+    ("datum_monat", re.compile(
+        r"(?:\bam\s+)?\b(?P<t>\d{1,2})\.?\s*(?P<monat>" + _wortliste(MONATE) + r")\b\.?(?:\s+(?P<j>\d{4})\b)?")),
+    ("relativ_tage", re.compile(
+        r"\bin\s+(?P<n>\d+|" + _wortliste(ZAHLWOERTER) + r")\s+(?P<einheit>tag(?:en)?|wochen?)\b")),
+    ("wochentag", re.compile(
+        r"(?:\b(?P<mod>am|diesen|kommenden|nächsten|naechsten|nächste\s+woche)\s+)?\b(?P<wtag>"
+        + _wortliste(WOCHENTAGE) + r")s?\b")),
+    # "am morgen" ist die Tageszeit, "morgen" allein der nächste Tag
+    ("tag_relativ", re.compile(r"(?<!\bam )(?<!\bden )\b(?P<rel>übermorgen|uebermorgen|morgen|heute)\b")),
+]
+
+_ZEIT_REGELN = [
+    ("viertel_halb", re.compile(
+        r"(?:\b(?:um|gegen|ab)\s+)?\b(?P<art>halb|viertel\s+nach|viertel\s+vor|dreiviertel)\s+(?P<h>"
+        + _ZAHL + r")\b(?:\s*uhr\b)?")),
+    ("uhrzeit", re.compile(
+        r"(?:\b(?P<praep>um|gegen|ab)\s+)?\b(?P<h>\d{1,2})(?:(?P<trenner>[:.])(?P<m>\d{2}))?"
+        r"(?:\s*(?P<uhr>uhr)\b(?:\s+(?P<m2>\d{1,2})\b(?!\s*(?:uhr|\.|:)))?)?")),
+    ("uhrzeit_wort", re.compile(
+        r"(?:\b(?P<praep>um|gegen|ab)\s+)?\b(?P<h>" + _wortliste(ZAHLWOERTER) + r")(?:\s+(?P<uhr>uhr)\b)?")),
+]
+
+_TAGESZEIT = re.compile(r"(?:\b(?:am|gegen)\s+)?\b(?P<tz>" + _wortliste(TAGESZEITEN) + r")\b")
+
+
+def _zahl(wort: str) -> int:
+    return int(wort) if wort.isdigit() else ZAHLWOERTER[wort]
+
+
+def _frei(spanne, belegt) -> bool:
+    a, b = spanne
+    return all(b <= x or a >= y for x, y in belegt)
+
+
+def _datum_auswerten(name, m, jetzt: datetime):
+    """→ (date, time|None) oder None, wenn der Treffer doch keine Datumsangabe ist"""
+    heute = jetzt.date()
+    if name == "relativ_zeit":
+        if m["halb"]:
+            minuten = 30
+        elif m["anderthalb"]:
+            minuten = 90
+        else:
+            minuten = _zahl(m["n"]) * (60 if m["einheit"].startswith(("stunde", "std")) else 1)
+        ziel = jetzt + timedelta(minutes=minuten)
+        return ziel.date(), ziel.time().replace(second=0, microsecond=0)
+    if name == "iso":
+        try:
+            d = date(int(m["j"]), int(m["m"]), int(m["t"]))
+        except ValueError:
+            return None
+        return d, time(int(m["h"]), int(m["mi"])) if m["h"] else None
+    if name in ("datum_zahl", "datum_monat"):
+        monat = int(m["m"]) if name == "datum_zahl" else MONATE[m["monat"]]
+        jahr = int(m["j"]) if m["j"] else heute.year
+        if jahr < 100:
+            jahr += 2000
+        try:
+            d = date(jahr, monat, int(m["t"]))
+        except ValueError:
+            return None
+        if not m["j"] and d < heute:
+            d = d.replace(year=d.year + 1)          # "am 3. März" im Oktober → nächstes Jahr
+        return d, None
+    if name == "relativ_tage":
+        n = _zahl(m["n"])
+        return heute + timedelta(days=n * (7 if m["einheit"].startswith("woche") else 1)), None
+    if name == "wochentag":
+        ziel = WOCHENTAGE[m["wtag"]]
+        tage = (ziel - heute.weekday()) % 7
+        mod = (m["mod"] or "").replace("naechsten", "nächsten")
+        if mod == "nächsten" and tage == 0:
+            tage = 7
+        elif mod.startswith("nächste woche"):
+            tage = (7 - heute.weekday()) + ziel
+        return heute + timedelta(days=tage), None
+    if name == "tag_relativ":
+        rel = m["rel"].replace("uebermorgen", "übermorgen")
+        return heute + timedelta(days={"heute": 0, "morgen": 1, "übermorgen": 2}[rel]), None
+    return None
+
+
+def _zeit_auswerten(name, m):
+    """→ (stunde, minute, eindeutig) oder None. eindeutig=False: 1–6 Uhr ist vermutlich nachmittags"""
+    if name == "viertel_halb":
+        h = _zahl(m["h"])
+        art = m["art"].split()[-1] if m["art"] != "dreiviertel" else "dreiviertel"
+        if art == "halb":
+            return (h - 1) % 24, 30, False
+        if art == "nach":
+            return h % 24, 15, False
+        return (h - 1) % 24, 45, False                    # viertel vor / dreiviertel
+    if name == "uhrzeit":
+        # Eine nackte Zahl ist keine Uhrzeit – es braucht "um", "uhr" oder "14:30"
+        if not (m["praep"] or m["uhr"] or m["trenner"] == ":"):
+            return None
+        h, mi = int(m["h"]), int(m["m"] or m["m2"] or 0)
+        if h > 24 or mi > 59:
+            return None
+        return h % 24, mi, h > 12 or m["h"].startswith("0")
+    if name == "uhrzeit_wort":
+        if not (m["praep"] or m["uhr"]):
+            return None
+        h = _zahl(m["h"])
+        return (h, 0, False) if h <= 12 else None
+    return None
+
+
+def zeit_extrahieren(text: str, jetzt: datetime | None = None) -> tuple[str, datetime | None, bool]:
+    """Zerlegt text in (titel, zeitpunkt, mit_uhrzeit). zeitpunkt None = keine Zeitangabe gefunden"""
+    jetzt = jetzt or datetime.now()
+    klein = text.lower()
+    belegt = []
+    tag = uhr = None
+    wochentag_heute = False
+
+    for name, muster in _DATUM_REGELN:
+        for m in muster.finditer(klein):
+            if not _frei(m.span(), belegt):
+                continue
+            ergebnis = _datum_auswerten(name, m, jetzt)
+            if ergebnis:
+                tag, uhr = ergebnis
+                belegt.append(m.span())
+                wochentag_heute = name == "wochentag" and m["mod"] in (None, "am") and tag == jetzt.date()
+                break
+        if tag:
+            break
+
+    stunde = minute = None
+    eindeutig = True
+    if uhr is None:
+        for name, muster in _ZEIT_REGELN:
+            for m in muster.finditer(klein):
+                if not _frei(m.span(), belegt):
+                    continue
+                ergebnis = _zeit_auswerten(name, m)
+                if ergebnis:
+                    stunde, minute, eindeutig = ergebnis
+                    belegt.append(m.span())
+                    break
+            if stunde is not None:
+                break
+
+    tz = None
+    for m in _TAGESZEIT.finditer(klein):
+        if _frei(m.span(), belegt) and not (m["tz"] == "morgen" and not m.group(0).startswith("am")):
+            tz = m["tz"]
+            belegt.append(m.span())
+            break
+
+    if stunde is not None:
+        if tz in SPAET and stunde < 12:
+            stunde += 12
+        elif tz in NACHT and 6 <= stunde <= 12:
+            stunde = (stunde + 12) % 24
+        elif tz is None and not eindeutig and 1 <= stunde <= 6:
+            stunde += 12                                    # "um halb drei" → 14:30 (Termine)
+        uhr = time(stunde, minute)
+    elif uhr is None and tz:
+        uhr = time(TAGESZEITEN[tz], 0)
+
+    if tag is None and uhr is not None:
+        # Nur eine Uhrzeit: heute, falls noch nicht vorbei – sonst morgen
+        tag = jetzt.date() if uhr > jetzt.time() else jetzt.date() + timedelta(days=1)
+    elif wochentag_heute and uhr is not None and uhr <= jetzt.time():
+        tag += timedelta(days=7)                            # "am montag um 7" am Montag um 9 → nächste Woche
+
+    titel = _titel(text, belegt)
+    if tag is None:
+        return titel, None, False
+    return titel, datetime.combine(tag, uhr or time(8, 0)), uhr is not None
+
+
+def _titel(text: str, belegt: list) -> str:
+    teile, pos = [], 0
+    for a, b in sorted(belegt):
+        teile.append(text[pos:a])
+        pos = b
+    teile.append(text[pos:])
+    woerter = " ".join(" ".join(teile).replace(",", " ").split()).split()
+    while woerter and woerter[0].lower() in _RAND:
+        woerter.pop(0)
+    while woerter and woerter[-1].lower() in _RAND:
+        woerter.pop()
+    return " ".join(woerter).strip(" .,-")
+
+
+def termin_zerlegen(text: str, jetzt: datetime | None = None) -> tuple[str, str | None]:
+    """Für calendar_tools.termin_hinzufügen: (titel, "YYYY-MM-DD HH:MM" | "YYYY-MM-DD" | None)"""
+    titel, wann, mit_uhrzeit = zeit_extrahieren(text, jetzt)
+    if wann is None:
+        return titel, None
+    return titel, wann.strftime("%Y-%m-%d %H:%M" if mit_uhrzeit else "%Y-%m-%d")
+
+
+if __name__ == "__main__":
+    import sys
+    beispiele = sys.argv[1:] or [
+        "arzt morgen 14 uhr", "friseur am freitag", "meeting um 10", "zahnarzt nächsten dienstag",
+        "oma anrufen übermorgen um halb drei", "pizza in 20 minuten", "steuer am 3. märz",
+        "werkstatt am 12.11. um 8:15", "kino heute abend um 8", "kaffee mit anna", "müll morgen früh",
+    ]
+    for b in beispiele:
+        print(f"{b:42} → {termin_zerlegen(b)}")